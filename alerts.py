@@ -0,0 +1,101 @@
+"""Bounded alert store with coalescing and cheap integer IDs."""
+from collections import OrderedDict
+from contextlib import contextmanager
+
+SEVERITIES = ("info", "success", "warning", "error")
+SEVERITY_LEVEL = {severity: level for level, severity in enumerate(SEVERITIES)}
+DEFAULT_CAPACITY = 50
+
+
+class Alert:
+    """One message for the view; `count` is how many times it was coalesced."""
+
+    __slots__ = ('id', 'type', 'message', 'count')
+
+    def __init__(self, alert_id, alert_type, message):
+        self.id = alert_id
+        self.type = alert_type
+        self.message = message
+        self.count = 1
+
+    def __repr__(self):
+        return f"Alert({self.id}, {self.type!r}, {self.message!r}, count={self.count})"
+
+
+class AlertLog:
+    """Fixed-capacity alert ring, oldest evicted first.
+
+    Alerts sharing a key coalesce: the existing entry takes the new message,
+    bumps its count and moves to the newest position instead of adding a row.
+    The key defaults to the message, so exact repeats always coalesce.
+    """
+
+    __slots__ = ('capacity', 'min_severity', '_entries', '_next_id', '_muted')
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, min_severity="info"):
+        if capacity < 1:
+            raise ValueError("Alert capacity must be at least 1")
+        self.capacity = capacity
+        self.min_severity = SEVERITY_LEVEL[min_severity]
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._muted = 0
+
+    def add(self, alert_type, message, key=None):
+        """Add or coalesce an alert; return it, or None when muted or below the severity floor."""
+        if self._muted or SEVERITY_LEVEL[alert_type] < self.min_severity:
+            return None
+        if key is None:
+            key = message
+        self._next_id += 1
+        entries = self._entries
+        alert = entries.get(key)
+        if alert is not None:
+            alert.id = self._next_id
+            alert.type = alert_type
+            alert.message = message
+            alert.count += 1
+            entries.move_to_end(key)
+            return alert
+        alert = entries[key] = Alert(self._next_id, alert_type, message)
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+        return alert
+
+    def mute(self):
+        """Drop every alert until unmute() is called."""
+        self._muted += 1
+
+    def unmute(self):
+        self._muted = max(0, self._muted - 1)
+
+    @property
+    def muted(self):
+        return self._muted > 0
+
+    @contextmanager
+    def suppressed(self):
+        """Drop alerts raised inside the block, e.g. during batch and simulation runs."""
+        self.mute()
+        try:
+            yield self
+        finally:
+            self.unmute()
+
+    def latest(self, n):
+        """The newest `n` alerts, oldest first."""
+        entries = self._entries
+        if n >= len(entries):
+            return list(entries.values())
+        values = reversed(entries.values())
+        return [next(values) for _ in range(n)][::-1]
+
+    def clear(self):
+        """Clear all alerts; IDs keep increasing."""
+        self._entries.clear()
+
+    def __iter__(self):
+        return iter(list(self._entries.values()))
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,684 +1,812 @@
+import os
+import uuid
 import streamlit as st
-import random
 import pandas as pd
-import uuid
-from collections import deque
+from engine import PAIR_WINDOW, PREDICTORS, STRATEGIES, Session
+from dominance import RULES, SESSION, window_label
+from persistence import IdleSessions, SessionBusy, SessionStore
+from roads import DERIVED
+import patterns
+import metrics
+import montecarlo
+import risk
+import charts
+
+BET_PAGE_SIZE = 200  # Bets rendered per page of the Bet History table
+ROAD_COLUMNS = 36  # Most recent columns drawn for each road
+DATABASE = os.environ.get("TRACKER_DB", "tracker.db")  # Where sessions survive refreshes and restarts
+CORPUS = os.environ.get("TRACKER_CORPUS")  # Optional pattern index built by patterns.py
+SESSION_BUDGET = int(os.environ.get("TRACKER_SESSION_BUDGET") or 32 << 20)  # Bytes one table may hold before fit() compacts it
+IDLE_SECONDS = float(os.environ.get("TRACKER_IDLE_SECONDS") or 900)  # Unused time before a browser session's tables go to the store
+GRID_COLUMNS = 4  # Table cards per row of the Tables grid
+RISK_MIN_BETS = 10  # Bets recorded before the bootstrap risk table is shown
+RISK_LIVE_RESAMPLES = 1000  # Resamples behind the risk table refreshed after every hand
+RISK_WINDOW = 500  # Most recent bets the live risk table resamples
+# Sidebar inputs that show the selected table and its settings, reset when switching tables.
+TABLE_INPUTS = ("table_select", "initial_bankroll_input", "base_amount_input", "strategy_select", "predictor_select",
+                "window_select")
+
+STYLE = """
+    <link href="https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css" rel="stylesheet">
+    <style>
+    body, .stApp {
+        background-color: #1F2528;
+        font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+        color: #E5E7EB;
+    }
+    .card {
+        background-color: #2C2F33;
+        border-radius: 0.75rem;
+        padding: 1.5rem;
+        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
+        margin-bottom: 1rem;
+    }
+    .card-player {
+        background-color: #3B82F6;
+        border-radius: 0.75rem;
+        padding: 1.5rem;
+        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
+        margin-bottom: 1rem;
+    }
+    .card-banker {
+        background-color: #EF4444;
+        border-radius: 0.75rem;
+        padding: 1.5rem;
+        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
+        margin-bottom: 1rem;
+    }
+    .stButton>button {
+        background-color: #6366F1;
+        color: white;
+        border-radius: 0.5rem;
+        padding: 0.75rem 1.5rem;
+        font-weight: 600;
+        transition: background-color: 0.2s;
+        width: 100%;
+    }
+    .stButton>button:hover {
+        background-color: #4F46E5;
+    }
+    .stButton>button:disabled {
+        background-color: #4B5563;
+        cursor: not-allowed;
+    }
+    .stNumberInput input, .stSelectbox select {
+        background-color: #23272A;
+        color: white;
+        border: 1px solid #4B5563;
+        border-radius: 0.5rem;
+        padding: 0.5rem;
+    }
+    .stDataFrame table {
+        background-color: #23272A;
+        color: white;
+        border-collapse: collapse;
+    }
+    .stDataFrame th {
+        background-color: #374151;
+        color: white;
+        font-weight: 600;
+        padding: 0.75rem;
+    }
+    .stDataFrame td {
+        padding: 0.75rem;
+        border-bottom: 1px solid #4B5563;
+    }
+    .stDataFrame tr:nth-child(even) {
+        background-color: #2D3748;
+    }
+    h1 {
+        font-size: 2.25rem;
+        font-weight: 700;
+        color: #F3F4F6;
+        margin-bottom: 1rem;
+    }
+    h2 {
+        font-size: 1.5rem;
+        font-weight: 600;
+        color: #D1D5DB;
+        margin-bottom: 0.75rem;
+    }
+    .alert {
+        padding: 1rem;
+        border-radius: 0.5rem;
+        margin-bottom: 1rem;
+    }
+    .alert-success {
+        background-color: #10B981;
+        color: white;
+    }
+    .alert-error {
+        background-color: #EF4444;
+        color: white;
+    }
+    .alert-info {
+        background-color: #3B82F6;
+        color: white;
+    }
+    .alert-warning {
+        background-color: #F59E0B;
+        color: white;
+    }
+    .sidebar .stButton>button {
+        margin-bottom: 0.5rem;
+    }
+    .result-history {
+        display: flex;
+        flex-wrap: nowrap;
+        overflow-x: auto;
+        scroll-behavior: smooth;
+        gap: 0.25rem;
+        padding: 0.5rem;
+        max-width: 100%;
+    }
+    .result-item {
+        min-width: 2rem;
+        height: 2rem;
+        line-height: 2rem;
+        text-align: center;
+        border-radius: 0.25rem;
+        font-size: 0.875rem;
+        font-weight: bold;
+        color: white;
+    }
+    .result-p {
+        background-color: #3B82F6;
+    }
+    .result-b {
+        background-color: #EF4444;
+    }
+    .result-t {
+        background-color: #10B981;
+    }
+    .road {
+        display: grid;
+        grid-template-rows: repeat(6, 1.25rem);
+        grid-auto-flow: column;
+        grid-auto-columns: 1.25rem;
+        gap: 1px;
+        overflow-x: auto;
+        margin-bottom: 0.75rem;
+    }
+    .road span {
+        border-radius: 9999px;
+        font-size: 0.625rem;
+        line-height: 1.25rem;
+        text-align: center;
+        color: white;
+    }
+    .road .big-1 {
+        border: 3px solid #3B82F6;
+    }
+    .road .big-2 {
+        border: 3px solid #EF4444;
+    }
+    .road .bead-1, .road .derived-2 {
+        background-color: #3B82F6;
+    }
+    .road .bead-2, .road .derived-1 {
+        background-color: #EF4444;
+    }
+    .road .bead-3 {
+        background-color: #10B981;
+    }
+    .table-card {
+        padding: 0.75rem;
+        margin-bottom: 0.5rem;
+    }
+    .strategy-label {
+        font-size: 0.875rem;
+        font-weight: 500;
+        color: #D1D5DB;
+        margin-bottom: 0.5rem;
+    }
+    </style>
+"""
+
+@st.cache_resource
+def session_store():
+    """The store shared by every browser session of this server."""
+    return SessionStore(DATABASE)
+
+@st.cache_resource
+def idle_sessions():
+    """Every browser session's tables, offloaded to the store once idle; shared by the server."""
+    return IdleSessions(session_store(), IDLE_SECONDS)
+
+@st.cache_resource
+def pattern_corpus():
+    """Load the shared pattern corpus once per server, if one is configured."""
+    corpus = patterns.PatternIndex.load(CORPUS) if CORPUS else None
+    patterns.use_corpus(corpus)
+    return corpus
+
+@st.cache_resource
+def metrics_exporter():
+    """Instrument the engine and start the metrics endpoint once per server, if metrics are on."""
+    metrics.instrument(Session)
+    return metrics.serve() if metrics.PORT else None
 
 def initialize_session_state():
-    """Initialize session state variables if not already set."""
-    if 'pair_types' not in st.session_state:
-        st.session_state.pair_types = deque(maxlen=100)  # Store up to 100 pairs
-        st.session_state.results = deque(maxlen=200)  # Store raw results
-        st.session_state.base_amount = 10.0
-        st.session_state.result_tracker = 1000.0  # Start with initial bankroll
-        st.session_state.peak_bankroll = 1000.0  # Track highest bankroll
-        st.session_state.session_profit = 0.0  # Track profits separately
-        st.session_state.profit_lock = 0.0
-        st.session_state.previous_result = None
-        st.session_state.state_history = []
-        st.session_state.next_prediction = "N/A"
-        st.session_state.current_dominance = "N/A"
-        st.session_state.bet_amount = 10.0
-        st.session_state.max_profit = 0.0
-        st.session_state.stats = {
-            'wins': 0,
-            'losses': 0,
-            'ties': 0,
-            'streaks': [],
-            'odd_pairs': 0,
-            'even_pairs': 0,
-            'alternating_pairs': 0,
-            'bet_history': []
-        }
-        st.session_state.alerts = []  # List to store active alerts
-        st.session_state.profit_lock_threshold = 2 * st.session_state.base_amount
-        # Money management variables
-        st.session_state.betting_strategy = "Flatbet"
-        st.session_state.t3_level = 1
-        st.session_state.t3_results = []
-        st.session_state.flatbet_level = 1  # Flatbet Level Up level
-        st.session_state.flatbet_net_loss = 0.0  # Track net loss for Flatbet Level Up
-        st.session_state.stop_loss = 0.8  # Stop at 80% of initial bankroll
-        st.session_state.win_limit = 1.5  # Win at 150% of initial bankroll
-        st.session_state.initial_bankroll = 1000.0  # Default initial bankroll
-        st.session_state.game_count = 0  # Track number of recorded games
+    """Restore this browser session's tables from the store, or start a new table, if not already set.
+
+    The table ids live in the URL, so a refresh or a server restart reopens
+    the same tables; `table` is the one shown in full, `tables` all of them.
+    """
+    pattern_corpus()
+    metrics_exporter()
+    idle_sessions().sweep()
+    if 'tables' not in st.session_state:
+        table = st.query_params.get("table")
+        ids = [table_id for table_id in st.query_params.get("tables", "").split(",") if table_id]
+        if table and table not in ids:
+            ids.insert(0, table)
+        store = session_store()
+        try:
+            tables = {table_id: store.open(table_id) for table_id in ids or [uuid.uuid4().hex]}
+        except SessionBusy as exc:
+            stop_busy(exc)
+        st.session_state.tables = tables
+        select_table(table if table in ids else next(iter(st.session_state.tables)))
+
+def stop_busy(exc):
+    """Stop this run with an error for a table another process, such as service.py, is writing."""
+    st.error(f"{exc} It can be opened here once that process releases it.")
+    st.stop()
+
+def table_session(table):
+    """The engine of one of this browser session's tables, reopened if it was offloaded while idle.
+
+    Every access marks the browser session active and keeps the table
+    within SESSION_BUDGET.
+    """
+    owner = st.session_state.setdefault('owner', uuid.uuid4().hex)
+    views = st.session_state.setdefault('view_cache', {})
+    try:
+        session = idle_sessions().get(owner, st.session_state.tables, table, views)
+    except SessionBusy as exc:
+        stop_busy(exc)
+    session.fit(SESSION_BUDGET)
+    return session
+
+def get_session():
+    """Return the engine of the table shown in full."""
+    return table_session(st.session_state.table)
+
+def table_label(table):
+    """Display name of a table: its position among this session's tables."""
+    return f"Table {list(st.session_state.tables).index(table) + 1}"
+
+def select_table(table):
+    """Show `table` in full; the sidebar inputs are dropped so they pick up its settings."""
+    st.session_state.table = table
+    st.query_params["table"] = table
+    st.query_params["tables"] = ",".join(st.session_state.tables)
+    for key in TABLE_INPUTS:
+        st.session_state.pop(key, None)
+    for key in [key for key in st.session_state if key.startswith("rule_")]:
+        del st.session_state[key]
+
+def switch_table():
+    """Show the table picked in the sidebar."""
+    select_table(st.session_state.table_select)
+
+def add_table():
+    """Start tracking another table and show it."""
+    table = uuid.uuid4().hex
+    st.session_state.tables[table] = session_store().open(table)
+    select_table(table)
+
+def close_table():
+    """Stop tracking the table shown and delete its stored history."""
+    table = st.session_state.table
+    tables = st.session_state.tables
+    del tables[table]
+    session_store().delete(table)
+    cache = st.session_state.get('view_cache', {})
+    for key in [key for key in cache if key[0] == table]:
+        del cache[key]
+    if not tables:
+        new = uuid.uuid4().hex
+        tables[new] = session_store().open(new)
+    select_table(next(iter(tables)))
 
 def set_money_management():
     """Set the base amount, initial bankroll, and money management parameters from user input."""
+    session = get_session()
     try:
         base_amount = float(st.session_state.base_amount_input)
         initial_bankroll = float(st.session_state.initial_bankroll_input)
-        if 1 <= base_amount <= 100:
-            if initial_bankroll >= 10:
-                if base_amount > initial_bankroll * 0.05:
-                    st.session_state.alerts.append({"type": "warning", "message": "Base amount exceeds 5% of initial bankroll, which may be risky.", "id": str(uuid.uuid4())})
-                st.session_state.base_amount = base_amount
-                st.session_state.initial_bankroll = initial_bankroll
-                st.session_state.result_tracker = initial_bankroll
-                st.session_state.peak_bankroll = initial_bankroll
-                st.session_state.session_profit = 0.0
-                st.session_state.profit_lock_threshold = 2 * base_amount
-                st.session_state.bet_amount = base_amount
-                st.session_state.game_count = 0
-                st.session_state.alerts.append({"type": "success", "message": f"Base amount (${base_amount:.2f}) and initial bankroll (${initial_bankroll:.2f}) updated successfully.", "id": str(uuid.uuid4())})
-            else:
-                st.session_state.alerts.append({"type": "error", "message": "Initial bankroll must be at least $10.", "id": str(uuid.uuid4())})
-        else:
-            st.session_state.alerts.append({"type": "error", "message": "Base amount must be between $1 and $100.", "id": str(uuid.uuid4())})
     except ValueError:
-        st.session_state.alerts.append({"type": "error", "message": "Please enter valid numbers for base amount and initial bankroll.", "id": str(uuid.uuid4())})
+        session.alert("error", "Please enter valid numbers for base amount and initial bankroll.")
+        return
+    session.configure(base_amount, initial_bankroll)
 
 def set_betting_strategy():
     """Set the betting strategy and reset strategy-specific parameters."""
-    st.session_state.betting_strategy = st.session_state.strategy_select
-    if st.session_state.betting_strategy == "T3":
-        st.session_state.t3_level = 1
-        st.session_state.t3_results = []
-    elif st.session_state.betting_strategy == "Flatbet Level Up":
-        st.session_state.flatbet_level = 1
-        st.session_state.flatbet_net_loss = 0.0
-    st.session_state.bet_amount = st.session_state.base_amount
-    st.session_state.alerts.append({"type": "success", "message": f"Betting strategy set to {st.session_state.betting_strategy}.", "id": str(uuid.uuid4())})
+    get_session().set_strategy(st.session_state.strategy_select)
+
+def set_prediction():
+    """Set the predictor, the dominance window that drives the next bet and the rule of every window."""
+    windows = get_session().state.windows
+    rules = {size: st.session_state[f"rule_{window_label(size)}"] for size in (SESSION,) + windows.sizes}
+    get_session().set_prediction(st.session_state.window_select, rules, st.session_state.predictor_select)
 
 def reset_betting():
     """Reset betting parameters."""
-    st.session_state.result_tracker = st.session_state.initial_bankroll
-    st.session_state.peak_bankroll = st.session_state.initial_bankroll
-    st.session_state.session_profit = 0.0
-    st.session_state.bet_amount = st.session_state.base_amount
-    st.session_state.max_profit = 0.0
-    st.session_state.next_prediction = "N/A"
-    st.session_state.current_dominance = "N/A"
-    st.session_state.t3_level = 1
-    st.session_state.t3_results = []
-    st.session_state.flatbet_level = 1
-    st.session_state.flatbet_net_loss = 0.0
-    st.session_state.game_count = 0
-    st.session_state.alerts.append({"type": "success", "message": "Betting parameters reset.", "id": str(uuid.uuid4())})
+    get_session().reset_betting()
 
 def reset_all():
     """Reset all session data."""
-    st.session_state.pair_types = deque(maxlen=100)
-    st.session_state.results = deque(maxlen=200)
-    st.session_state.result_tracker = 1000.0
-    st.session_state.peak_bankroll = 1000.0
-    st.session_state.session_profit = 0.0
-    st.session_state.profit_lock = 0.0
-    st.session_state.base_amount = 10.0
-    st.session_state.previous_result = None
-    st.session_state.state_history = []
-    st.session_state.next_prediction = "N/A"
-    st.session_state.current_dominance = "N/A"
-    st.session_state.bet_amount = 10.0
-    st.session_state.max_profit = 0.0
-    st.session_state.stats = {
-        'wins': 0,
-        'losses': 0,
-        'ties': 0,
-        'streaks': [],
-        'odd_pairs': 0,
-        'even_pairs': 0,
-        'alternating_pairs': 0,
-        'bet_history': []
-    }
-    st.session_state.profit_lock_threshold = 2 * st.session_state.base_amount
-    st.session_state.betting_strategy = "Flatbet"
-    st.session_state.t3_level = 1
-    st.session_state.t3_results = []
-    st.session_state.flatbet_level = 1
-    st.session_state.flatbet_net_loss = 0.0
-    st.session_state.initial_bankroll = 1000.0
-    st.session_state.game_count = 0
-    st.session_state.alerts.append({"type": "success", "message": "All session data reset, profit lock reset.", "id": str(uuid.uuid4())})
-
-def apply_betting_strategy(outcome, result, bet_selection):
-    """Apply the selected betting strategy and return bet amount and outcome."""
-    bet_amount = st.session_state.bet_amount
-    bet_outcome = None
-
-    if st.session_state.betting_strategy == "Flatbet":
-        bet_amount = min(st.session_state.base_amount, st.session_state.result_tracker)
-    elif st.session_state.betting_strategy == "Flatbet Level Up":
-        bet_amount = min(st.session_state.base_amount * st.session_state.flatbet_level, st.session_state.result_tracker)
-        if outcome:
-            if outcome == 'win':
-                new_bankroll = st.session_state.result_tracker + (bet_amount * 0.95 if bet_selection == "Banker" else bet_amount)
-                st.session_state.flatbet_net_loss += bet_amount  # Net loss decreases with a win
-                if st.session_state.flatbet_net_loss >= 0 or (new_bankroll >= st.session_state.peak_bankroll and st.session_state.session_profit >= 0):
-                    st.session_state.flatbet_level = 1
-                    st.session_state.flatbet_net_loss = 0.0
-                    if new_bankroll >= st.session_state.peak_bankroll and st.session_state.session_profit >= 0:
-                        st.session_state.alerts.append({"type": "success", "message": f"Bankroll reached peak (${new_bankroll:.2f}) with profit. Flatbet Level reset to 1.", "id": str(uuid.uuid4())})
-            elif outcome == 'loss':
-                st.session_state.flatbet_net_loss -= bet_amount  # Net loss increases with a loss
-                threshold = -5.0 * st.session_state.flatbet_level * st.session_state.base_amount
-                if st.session_state.flatbet_net_loss <= threshold:
-                    st.session_state.flatbet_level += 1
-                    st.session_state.flatbet_net_loss = 0.0  # Reset net loss after leveling up
-        # Ensure bet_amount is updated for the next bet
-        next_bet = st.session_state.base_amount * st.session_state.flatbet_level
-        st.session_state.bet_amount = min(next_bet, st.session_state.result_tracker)
-    elif st.session_state.betting_strategy == "T3":
-        proposed_bet = st.session_state.base_amount * st.session_state.t3_level
-        bet_amount = min(proposed_bet, st.session_state.result_tracker)
-        if bet_amount < proposed_bet:
-            st.session_state.t3_level = max(1, int(bet_amount / st.session_state.base_amount))
-            st.session_state.alerts.append({"type": "warning", "message": f"T3 bet reduced to ${bet_amount:.2f} due to bankroll limit.", "id": str(uuid.uuid4())})
-
-        # Update T3 results based on outcome
-        if outcome:
-            if outcome == 'win':
-                if len(st.session_state.t3_results) == 0:  # First result in sequence
-                    st.session_state.t3_level = max(1, st.session_state.t3_level - 1)
-                st.session_state.t3_results.append('W')
-            elif outcome == 'loss':
-                st.session_state.t3_results.append('L')
-            
-            # Update T3 level after 3 results
-            if len(st.session_state.t3_results) == 3:
-                wins = st.session_state.t3_results.count('W')
-                losses = st.session_state.t3_results.count('L')
-                if wins > losses:
-                    st.session_state.t3_level = max(1, st.session_state.t3_level - 1)
-                elif losses > wins:
-                    st.session_state.t3_level += 1
-                st.session_state.t3_results = []
-        
-        # Cap T3 level to prevent excessive bets
-        max_t3_bet = st.session_state.result_tracker / st.session_state.base_amount
-        st.session_state.t3_level = min(st.session_state.t3_level, max(1, int(max_t3_bet)))
-
-    # Update bet amount for next round
-    if st.session_state.betting_strategy == "Flatbet":
-        next_bet = st.session_state.base_amount
-    elif st.session_state.betting_strategy == "Flatbet Level Up":
-        next_bet = st.session_state.base_amount * st.session_state.flatbet_level
-    else:  # T3
-        next_bet = st.session_state.base_amount * st.session_state.t3_level
-    st.session_state.bet_amount = min(next_bet, st.session_state.result_tracker)
-
-    return bet_amount, bet_outcome
+    get_session().reset_all()
 
+def new_session():
+    """Reset all session data and start over."""
+    session = get_session()
+    session.reset_all()
+    session.alert("success", "New session started.")
+
+@metrics.timed('tracker_record_result_seconds')
 def record_result(result):
     """Record a game result and update state with Dominant Pairs betting logic."""
-    if st.session_state.initial_bankroll > 0:
-        if st.session_state.result_tracker <= st.session_state.initial_bankroll * st.session_state.stop_loss:
-            st.session_state.alerts.append({"type": "warning", "message": f"Stop-loss reached ({st.session_state.stop_loss*100:.0f}% of initial bankroll). Please reset betting to continue.", "id": str(uuid.uuid4())})
-            return
-        if st.session_state.session_profit >= st.session_state.initial_bankroll * (st.session_state.win_limit - 1):
-            lock_amount = st.session_state.session_profit
-            st.session_state.profit_lock += lock_amount
-            st.session_state.session_profit = 0.0
-            st.session_state.result_tracker = st.session_state.initial_bankroll
-            st.session_state.peak_bankroll = st.session_state.initial_bankroll
-            st.session_state.bet_amount = st.session_state.base_amount
-            st.session_state.t3_level = 1
-            st.session_state.t3_results = []
-            st.session_state.flatbet_level = 1
-            st.session_state.flatbet_net_loss = 0.0
-            st.session_state.alerts.append({"type": "success", "message": f"Win limit reached! Locked ${lock_amount:.2f}. Total locked: ${st.session_state.profit_lock:.2f}. Please reset betting.", "id": str(uuid.uuid4())})
-            return
-
-    st.session_state.game_count += 1
-
-    state = {
-        'pair_types': list(st.session_state.pair_types),
-        'results': list(st.session_state.results),
-        'previous_result': st.session_state.previous_result,
-        'result_tracker': st.session_state.result_tracker,
-        'peak_bankroll': st.session_state.peak_bankroll,
-        'session_profit': st.session_state.session_profit,
-        'profit_lock': st.session_state.profit_lock,
-        'stats': st.session_state.stats.copy(),
-        'next_prediction': st.session_state.next_prediction,
-        'current_dominance': st.session_state.current_dominance,
-        'bet_amount': st.session_state.bet_amount,
-        'max_profit': st.session_state.max_profit,
-        't3_level': st.session_state.t3_level,
-        't3_results': st.session_state.t3_results.copy(),
-        'betting_strategy': st.session_state.betting_strategy,
-        'flatbet_level': st.session_state.flatbet_level,
-        'flatbet_net_loss': st.session_state.flatbet_net_loss,
-        'initial_bankroll': st.session_state.initial_bankroll,
-        'game_count': st.session_state.game_count
-    }
-    st.session_state.state_history.append(state)
-
-    if result == 'T':
-        st.session_state.stats['ties'] += 1
-        st.session_state.previous_result = result
-        st.session_state.alerts.append({"type": "info", "message": "Tie recorded.", "id": str(uuid.uuid4())})
-        return
-
-    st.session_state.results.append(result)
-
-    if st.session_state.previous_result is None or st.session_state.previous_result == 'T':
-        st.session_state.previous_result = result
-        st.session_state.next_prediction = "N/A"
-        st.session_state.alerts.append({"type": "info", "message": f"Result {result} recorded.", "id": str(uuid.uuid4())})
-        return
-
-    pair = (st.session_state.previous_result, result)
-    st.session_state.pair_types.append(pair)
-    pair_type = "Even" if pair[0] == pair[1] else "Odd"
-    st.session_state.stats['odd_pairs' if pair_type == "Odd" else 'even_pairs'] += 1
-
-    if len(st.session_state.pair_types) >= 2:
-        last_two_pairs = list(st.session_state.pair_types)[-2:]
-        if last_two_pairs[0][1] != last_two_pairs[1][1]:
-            st.session_state.stats['alternating_pairs'] += 1
-
-    if len(st.session_state.pair_types) >= 5:
-        odd_count = st.session_state.stats['odd_pairs']
-        even_count = st.session_state.stats['even_pairs']
-        if odd_count > even_count:
-            st.session_state.current_dominance = "Odd"
-            st.session_state.next_prediction = "Player" if result == "B" else "Banker"
-        else:
-            st.session_state.current_dominance = "Even"
-            st.session_state.next_prediction = "Player" if result == "P" else "Banker"
-
-        if st.session_state.bet_amount == 0.0:
-            st.session_state.bet_amount = min(st.session_state.base_amount, st.session_state.result_tracker)
-
-        if len(st.session_state.pair_types) >= 6:
-            previous_prediction = st.session_state.state_history[-1]['next_prediction']
-            if previous_prediction != "N/A":
-                bet_amount, _ = apply_betting_strategy(None, result, previous_prediction)
-                if bet_amount > 0:
-                    if (previous_prediction == "Player" and result == "P") or \
-                       (previous_prediction == "Banker" and result == "B"):
-                        win_amount = bet_amount * 0.95 if previous_prediction == "Banker" else bet_amount
-                        st.session_state.result_tracker += win_amount
-                        st.session_state.session_profit += win_amount
-                        st.session_state.stats['wins'] += 1
-                        outcome = 'win'
-                        if st.session_state.session_profit >= st.session_state.profit_lock_threshold:
-                            lock_amount = st.session_state.session_profit
-                            st.session_state.profit_lock += lock_amount
-                            st.session_state.session_profit = 0.0
-                            st.session_state.result_tracker = st.session_state.initial_bankroll
-                            st.session_state.peak_bankroll = st.session_state.initial_bankroll
-                            st.session_state.bet_amount = st.session_state.base_amount
-                            st.session_state.t3_level = 1
-                            st.session_state.t3_results = []
-                            st.session_state.flatbet_level = 1
-                            st.session_state.flatbet_net_loss = 0.0
-                            st.session_state.alerts.append({"type": "success", "message": f"Profit locked at ${lock_amount:.2f}. Total locked: ${st.session_state.profit_lock:.2f}.", "id": str(uuid.uuid4())})
-                        elif st.session_state.session_profit > st.session_state.max_profit:
-                            st.session_state.max_profit = st.session_state.session_profit
-                            st.session_state.alerts.append({"type": "success", "message": f"New max profit: ${st.session_state.max_profit:.2f}", "id": str(uuid.uuid4())})
-                    else:
-                        bet_amount = min(bet_amount, st.session_state.result_tracker)
-                        st.session_state.result_tracker -= bet_amount
-                        st.session_state.session_profit -= bet_amount
-                        st.session_state.stats['losses'] += 1
-                        outcome = 'loss'
-                        st.session_state.alerts.append({"type": "error", "message": f"Loss! -${bet_amount:.2f}", "id": str(uuid.uuid4())})
-                        if st.session_state.result_tracker <= 0:
-                            st.session_state.alerts.append({"type": "error", "message": "Bankroll depleted! Please reset betting to continue.", "id": str(uuid.uuid4())})
-                            return
-
-                    apply_betting_strategy(outcome, result, previous_prediction)
-
-                    # Update peak bankroll after the bet
-                    st.session_state.peak_bankroll = max(st.session_state.peak_bankroll, st.session_state.result_tracker)
-
-                    st.session_state.stats['bet_history'].append({
-                        'Bet': previous_prediction,
-                        'Result': result,
-                        'Amount': bet_amount,
-                        'Outcome': 'Win' if outcome == 'win' else 'Loss',
-                        'Bankroll': st.session_state.result_tracker,
-                        'Profit': st.session_state.session_profit,
-                        'Strategy': st.session_state.betting_strategy,
-                        'T3_Level': st.session_state.t3_level if st.session_state.betting_strategy == "T3" else None,
-                        'Flatbet_Level': st.session_state.flatbet_level if st.session_state.betting_strategy == "Flatbet Level Up" else None
-                    })
-
-    st.session_state.previous_result = result
-    st.session_state.alerts.append({"type": "info", "message": f"Result {result} recorded. Next bet: {st.session_state.next_prediction} (${st.session_state.bet_amount:.2f})", "id": str(uuid.uuid4())})
+    get_session().record(result)
 
+@metrics.timed('tracker_undo_seconds')
 def undo():
     """Undo the last action."""
-    if not st.session_state.state_history:
-        st.session_state.alerts.append({"type": "error", "message": "No actions to undo.", "id": str(uuid.uuid4())})
-        return
+    get_session().undo()
 
-    last_state = st.session_state.state_history.pop()
-    st.session_state.pair_types = deque(last_state['pair_types'], maxlen=100)
-    st.session_state.results = deque(last_state['results'], maxlen=200)
-    st.session_state.previous_result = last_state['previous_result']
-    st.session_state.result_tracker = last_state['result_tracker']
-    st.session_state.peak_bankroll = last_state['peak_bankroll']
-    st.session_state.session_profit = last_state['session_profit']
-    st.session_state.profit_lock = last_state['profit_lock']
-    st.session_state.stats = last_state['stats']
-    st.session_state.next_prediction = last_state['next_prediction']
-    st.session_state.current_dominance = last_state['current_dominance']
-    st.session_state.bet_amount = last_state['bet_amount']
-    st.session_state.max_profit = last_state['max_profit']
-    st.session_state.t3_level = last_state['t3_level']
-    st.session_state.t3_results = last_state['t3_results']
-    st.session_state.betting_strategy = last_state['betting_strategy']
-    st.session_state.flatbet_level = last_state['flatbet_level']
-    st.session_state.flatbet_net_loss = last_state['flatbet_net_loss']
-    st.session_state.initial_bankroll = last_state['initial_bankroll']
-    st.session_state.game_count = last_state['game_count']
-    st.session_state.alerts.append({"type": "success", "message": "Last action undone.", "id": str(uuid.uuid4())})
+def redo():
+    """Redo the last undone action."""
+    get_session().redo()
+
+def undo_to_hand():
+    """Undo back to the hand number entered in the sidebar."""
+    get_session().undo_to_hand(int(st.session_state.undo_to_input))
 
 def simulate_games():
     """Simulate 100 games."""
-    outcomes = ['P', 'B', 'T']
-    weights = [0.446, 0.458, 0.096]
-    for _ in range(100):
-        if st.session_state.result_tracker <= 0:
-            st.session_state.alerts.append({"type": "error", "message": "Bankroll depleted during simulation!", "id": str(uuid.uuid4())})
-            break
-        if st.session_state.result_tracker <= st.session_state.initial_bankroll * st.session_state.stop_loss:
-            st.session_state.alerts.append({"type": "warning", "message": f"Stop-loss reached during simulation.", "id": str(uuid.uuid4())})
-            break
-        if st.session_state.session_profit >= st.session_state.initial_bankroll * (st.session_state.win_limit - 1):
-            lock_amount = st.session_state.session_profit
-            st.session_state.profit_lock += lock_amount
-            st.session_state.session_profit = 0.0
-            st.session_state.result_tracker = st.session_state.initial_bankroll
-            st.session_state.peak_bankroll = st.session_state.initial_bankroll
-            st.session_state.bet_amount = st.session_state.base_amount
-            st.session_state.t3_level = 1
-            st.session_state.t3_results = []
-            st.session_state.flatbet_level = 1
-            st.session_state.flatbet_net_loss = 0.0
-            st.session_state.alerts.append({"type": "success", "message": f"Win limit reached during simulation! Locked ${lock_amount:.2f}.", "id": str(uuid.uuid4())})
-            break
-        result = random.choices(outcomes, weights)[0]
-        record_result(result)
-    st.session_state.alerts.append({"type": "success", "message": "Simulated up to 100 games. Check stats and history for results.", "id": str(uuid.uuid4())})
+    get_session().simulate(100)
+
+def run_monte_carlo():
+    """Simulate many sessions with the current money management settings."""
+    state = get_session().state
+    result = montecarlo.simulate(
+        int(st.session_state.mc_sessions_input), int(st.session_state.mc_hands_input),
+        state.betting_strategy, base_amount=state.base_amount, initial_bankroll=state.initial_bankroll,
+        stop_loss=state.stop_loss, win_limit=state.win_limit, profit_lock_threshold=state.profit_lock_threshold,
+        window=state.dominance_window, rule=state.windows.rules[state.dominance_window], predictor=state.predictor,
+        shoe=st.session_state.mc_shoe_input)
+    frame = pd.DataFrame(result)
+    frame['exit'] = pd.Categorical.from_codes(frame['exit'], montecarlo.EXIT_NAMES)
+    # Keep only the summaries the panel shows: the per-session frame can run to millions of rows.
+    st.session_state.monte_carlo = (frame.describe().T, frame['exit'].value_counts(normalize=True).rename("Share"))
+    get_session().alert("success", f"Simulated {len(frame)} sessions ({frame['hands_played'].sum()} hands) with {state.betting_strategy} and the {state.predictor} predictor.")
 
 def clear_alerts():
     """Clear all alerts."""
-    st.session_state.alerts = []
-
-def main():
-    """Main Streamlit application."""
-    initialize_session_state()
-
-    st.markdown("""
-        <link href="https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css" rel="stylesheet">
-        <style>
-        body, .stApp {
-            background-color: #1F2528;
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            color: #E5E7EB;
-        }
-        .card {
-            background-color: #2C2F33;
-            border-radius: 0.75rem;
-            padding: 1.5rem;
-            box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-            margin-bottom: 1rem;
-        }
-        .card-player {
-            background-color: #3B82F6;
-            border-radius: 0.75rem;
-            padding: 1.5rem;
-            box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-            margin-bottom: 1rem;
-        }
-        .card-banker {
-            background-color: #EF4444;
-            border-radius: 0.75rem;
-            padding: 1.5rem;
-            box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-            margin-bottom: 1rem;
-        }
-        .stButton>button {
-            background-color: #6366F1;
-            color: white;
-            border-radius: 0.5rem;
-            padding: 0.75rem 1.5rem;
-            font-weight: 600;
-            transition: background-color: 0.2s;
-            width: 100%;
-        }
-        .stButton>button:hover {
-            background-color: #4F46E5;
-        }
-        .stButton>button:disabled {
-            background-color: #4B5563;
-            cursor: not-allowed;
-        }
-        .stNumberInput input, .stSelectbox select {
-            background-color: #23272A;
-            color: white;
-            border: 1px solid #4B5563;
-            border-radius: 0.5rem;
-            padding: 0.5rem;
-        }
-        .stDataFrame table {
-            background-color: #23272A;
-            color: white;
-            border-collapse: collapse;
-        }
-        .stDataFrame th {
-            background-color: #374151;
-            color: white;
-            font-weight: 600;
-            padding: 0.75rem;
-        }
-        .stDataFrame td {
-            padding: 0.75rem;
-            border-bottom: 1px solid #4B5563;
-        }
-        .stDataFrame tr:nth-child(even) {
-            background-color: #2D3748;
-        }
-        h1 {
-            font-size: 2.25rem;
-            font-weight: 700;
-            color: #F3F4F6;
-            margin-bottom: 1rem;
-        }
-        h2 {
-            font-size: 1.5rem;
-            font-weight: 600;
-            color: #D1D5DB;
-            margin-bottom: 0.75rem;
-        }
-        .alert {
-            padding: 1rem;
-            border-radius: 0.5rem;
-            margin-bottom: 1rem;
-        }
-        .alert-success {
-            background-color: #10B981;
-            color: white;
-        }
-        .alert-error {
-            background-color: #EF4444;
-            color: white;
-        }
-        .alert-info {
-            background-color: #3B82F6;
-            color: white;
-        }
-        .alert-warning {
-            background-color: #F59E0B;
-            color: white;
-        }
-        .sidebar .stButton>button {
-            margin-bottom: 0.5rem;
-        }
-        .result-history {
-            display: flex;
-            flex-wrap: nowrap;
-            overflow-x: auto;
-            scroll-behavior: smooth;
-            gap: 0.25rem;
-            padding: 0.5rem;
-            max-width: 100%;
-        }
-        .result-item {
-            min-width: 2rem;
-            height: 2rem;
-            line-height: 2rem;
-            text-align: center;
-            border-radius: 0.25rem;
-            font-size: 0.875rem;
-            font-weight: bold;
-            color: white;
-        }
-        .result-p {
-            background-color: #3B82F6;
-        }
-        .result-b {
-            background-color: #EF4444;
-        }
-        .result-t {
-            background-color: #10B981;
-        }
-        .strategy-label {
-            font-size: 0.875rem;
-            font-weight: 500;
-            color: #D1D5DB;
-            margin-bottom: 0.5rem;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-
-    alert_container = st.container()
-    with alert_container:
-        for alert in st.session_state.alerts[-3:]:
-            alert_class = f"alert alert-{alert['type'].lower()}"
-            st.markdown(f'<div class="{alert_class}" style="word-wrap: break-word;">{alert["message"]}</div>', unsafe_allow_html=True)
-        if st.session_state.alerts:
-            if st.button("Clear Alerts"):
-                clear_alerts()
-
-    st.markdown('<h1>Baccarat Tracker</h1>', unsafe_allow_html=True)
-
+    get_session().clear_alerts()
+
+def cached_view(name, build, table=None):
+    """Return build(state) for a table (default: the one shown), rebuilt only when it has changed since the last render."""
+    table = table or st.session_state.table
+    session = table_session(table)
+    cache = st.session_state.view_cache
+    hit = cache.get((table, name))
+    if hit is None or hit[0] != session.revision:
+        hit = cache[table, name] = (session.revision, build(session.state))
+    return hit[1]
+
+@metrics.timed('tracker_record_result_seconds')
+def record_table_result(table, result):
+    """Record a result on any table from its card in the Tables grid."""
+    table_session(table).record(result)
+
+def build_table_card(state):
+    """Compact card of one table for the Tables grid: next bet, stake, bankroll and hands."""
+    card_class = {"Player": "card-player", "Banker": "card-banker"}.get(state.next_prediction, "card")
+    return f"""
+        <div class="{card_class} table-card">
+            <p class="text-base font-bold text-white">{state.next_prediction} ${state.bet_amount:.2f}</p>
+            <p class="text-sm text-gray-200">Bankroll ${state.result_tracker:.2f} · Lock ${state.profit_lock:.2f}</p>
+            <p class="text-sm text-gray-200">{state.betting_strategy} · {state.game_count} hands</p>
+        </div>
+    """
+
+def build_overview(state):
+    """Overview cards HTML."""
+    next_bet_class = "card"
+    if state.next_prediction == "Player":
+        next_bet_class = "card-player"
+    elif state.next_prediction == "Banker":
+        next_bet_class = "card-banker"
+    if state.betting_strategy == "T3":
+        level = f"T3 Level: {state.t3_level}, Results: {state.t3_results}"
+    elif state.betting_strategy == "Flatbet Level Up":
+        level = f"Flatbet Level: {state.flatbet_level}"
+    else:
+        level = "Fixed bet"
+    return f"""
+        <div class="card">
+            <p class="text-sm font-semibold text-gray-400">Bankroll</p>
+            <p class="text-xl font-bold text-white">${state.result_tracker:.2f}</p>
+        </div>
+        <div class="card">
+            <p class="text-sm font-semibold text-gray-400">Session Profit</p>
+            <p class="text-xl font-bold text-white">${state.session_profit:.2f}</p>
+        </div>
+        <div class="card">
+            <p class="text-sm font-semibold text-gray-400">Profit Lock</p>
+            <p class="text-xl font-bold text-green-400">${state.profit_lock:.2f}</p>
+        </div>
+        <div class="{next_bet_class}">
+            <p class="text-sm font-semibold text-gray-200">Next Bet</p>
+            <p class="text-xl font-bold text-white">{state.next_prediction}</p>
+        </div>
+        <div class="card">
+            <p class="text-sm font-semibold text-gray-400">Bet Amount</p>
+            <p class="text-xl font-bold text-white">${state.bet_amount:.2f}</p>
+        </div>
+        <div class="card">
+            <p class="text-sm font-semibold text-gray-400">{state.betting_strategy}</p>
+            <p class="text-base text-white">{level}</p>
+        </div>
+    """
+
+def build_result_strip(state):
+    """HTML strip of the last 20 results, or None before the first result."""
+    if not state.results:
+        return None
+    result_html = "".join(
+        f'<span class="result-item result-{r.lower()}">{r}</span>'
+        for r in state.results.recent(20)
+    )
+    return f"""
+        <div class="card">
+            <p class="text-sm font-semibold text-gray-400">Last 20 Results (P: Player, B: Banker, T: Tie)</p>
+            <div class="result-history" id="resultHistory">
+                {result_html}
+            </div>
+        </div>
+        <script>
+            document.addEventListener('DOMContentLoaded', function() {{
+                const resultDiv = document.getElementById('resultHistory');
+                if (resultDiv) {{
+                    resultDiv.scrollLeft = resultDiv.scrollWidth;
+                }}
+            }});
+        </script>
+    """
+
+def road_html(grid, kind, labels=None):
+    """One road as a six-row CSS grid, filled column by column."""
+    cells = []
+    for col in grid.T:
+        for code in col:
+            label = labels[code] if labels and code else ""
+            cells.append(f'<span class="{kind}-{code}">{label}</span>' if code else '<span></span>')
+    return f'<div class="road">{"".join(cells)}</div>'
+
+def build_roads(state):
+    """Bead Plate, Big Road and derived roads HTML, or None before the first result."""
+    roads = state.roads
+    if not roads.results:
+        return None
+    big = roads.view("Big Road", ROAD_COLUMNS)
+    ties = roads.tie_view(ROAD_COLUMNS)
+    big_cells = []
+    for col, tie_col in zip(big.T, ties.T):
+        for code, tie_count in zip(col, tie_col):
+            label = str(tie_count) if tie_count else ""
+            big_cells.append(f'<span class="big-{code}">{label}</span>' if code else '<span></span>')
+    sections = [
+        '<p class="text-sm font-semibold text-gray-400">Bead Plate</p>',
+        road_html(roads.bead_view(ROAD_COLUMNS), "bead", " PBT"),
+        '<p class="text-sm font-semibold text-gray-400">Big Road (numbers count ties)</p>',
+        f'<div class="road">{"".join(big_cells)}</div>',
+    ]
+    for name, _ in DERIVED:
+        sections.append(f'<p class="text-sm font-semibold text-gray-400">{name}</p>')
+        sections.append(road_html(roads.view(name, ROAD_COLUMNS), "derived"))
+    return f'<div class="card">{"".join(sections)}</div>'
+
+def build_deal_history(state):
+    """Deal History table of recent pairs, or None before the first pair."""
+    if not state.pair_count:
+        return None
+    pairs = state.results.pairs(PAIR_WINDOW)
+    return pd.DataFrame({
+        "Pair": [first + second for first, second in pairs],
+        "Type": ["Even" if first == second else "Odd" for first, second in pairs],
+    })
+
+def build_statistics(state):
+    """Statistics card HTML."""
+    total_games = state.wins + state.losses
+    win_rate = (state.wins / total_games * 100) if total_games > 0 else 0
+    stats = state.stats
+    current = f"{stats.side} x{stats.streak}" if stats.streak else "None"
+    records = ", ".join(f"{strategy}: {won}W/{lost}L" for strategy, won, lost in stats.records()) or "No bets yet"
+    return f"""
+        <div class="card">
+            <p class="text-sm font-semibold text-gray-400">Statistics</p>
+            <p class="text-base text-white">Win Rate: {win_rate:.1f}%</p>
+            <p class="text-base text-white">Streak: {current}, Longest: {stats.max_streak}, Avg: {stats.average_streak:.1f}</p>
+            <p class="text-base text-white">Bet Result: Mean ${stats.mean:.2f}, Std Dev ${stats.std:.2f}</p>
+            <p class="text-base text-white">Max Drawdown: ${stats.max_drawdown:.2f}</p>
+            <p class="text-base text-white">Record: {records}</p>
+            <p class="text-base text-white">Patterns: Odd: {state.odd_pairs}, Even: {state.even_pairs}, Alternating: {state.alternating_pairs}</p>
+        </div>
+    """
+
+def build_charts(state):
+    """Bankroll, accuracy and level figure over every bet, downsampled to charts.POINTS; None before two bets."""
+    if len(state.bet_history) < 2:
+        return None
+    return charts.figure(state.bet_history, state.initial_bankroll)
+
+def build_risk(state, resamples=RISK_LIVE_RESAMPLES, window=RISK_WINDOW):
+    """Bootstrap confidence intervals from the newest `window` bets (all if None), or None before RISK_MIN_BETS."""
+    bet_history = state.bet_history
+    if len(bet_history) < RISK_MIN_BETS:
+        return None
+    start = 0 if window is None else max(0, len(bet_history) - window)
+    result = risk.bootstrap(bet_history.net(start), state.initial_bankroll, state.stop_loss, state.win_limit,
+                            resamples=resamples, seed=0)
+    return pd.DataFrame(risk.summarize(result), columns=["Measure", "Estimate", "Low", "High"])
+
+def build_dominance(state):
+    """Dominance Windows table, or None before the first pair."""
+    if not state.pair_count:
+        return None
+    return pd.DataFrame(state.windows.summary(state.previous_result), columns=["Window", "Odd", "Even", "Dominance", "Rule", "Prediction"])
+
+@st.fragment
+@metrics.timed('tracker_render_seconds', section='table_card')
+def table_card(table):
+    """One table of the grid; recording on it reruns only this card unless it is also shown in full."""
+    active = table == st.session_state.table
+    st.markdown(f'<p class="strategy-label">{table_label(table)}{" (shown)" if active else ""}</p>', unsafe_allow_html=True)
+    st.markdown(cached_view('card', build_table_card, table), unsafe_allow_html=True)
+    col1, col2, col3, col4 = st.columns(4)
+    clicked = False
+    for col, (label, result) in zip((col1, col2, col3), (("P", 'P'), ("B", 'B'), ("T", 'T'))):
+        with col:
+            clicked |= st.button(label, key=f"card_{result}_{table}", on_click=record_table_result, args=(table, result))
+    with col4:
+        if st.button("Show", key=f"card_show_{table}", disabled=active, on_click=select_table, args=(table,)):
+            st.rerun()
+    session_store().flush()
+    if clicked and active:
+        st.rerun()
+
+def tables_grid():
+    """Every table's next bet and bankroll, a card each, when more than one table is tracked."""
+    tables = st.session_state.tables
+    if len(tables) < 2:
+        return
+    st.markdown('<h2>Tables</h2>', unsafe_allow_html=True)
+    tables = list(tables)
+    for row in range(0, len(tables), GRID_COLUMNS):
+        for col, table in zip(st.columns(GRID_COLUMNS), tables[row:row + GRID_COLUMNS]):
+            with col:
+                table_card(table)
+
+@st.fragment
+@metrics.timed('tracker_render_seconds', section='overview')
+def overview_panel():
+    """Bankroll, profit, next bet and strategy level cards."""
+    st.markdown('<h2>Overview</h2>', unsafe_allow_html=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(cached_view('overview', build_overview), unsafe_allow_html=True)
+
+@st.fragment
+@metrics.timed('tracker_render_seconds', section='result_strip')
+def result_strip_panel():
+    """Strip of the most recent results."""
+    st.markdown('<h2>Result History</h2>', unsafe_allow_html=True)
+    result_html = cached_view('result_strip', build_result_strip)
+    if result_html:
+        st.markdown(result_html, unsafe_allow_html=True)
+    else:
+        st.markdown('<p class="text-gray-400">No results yet.</p>', unsafe_allow_html=True)
+
+@st.fragment
+@metrics.timed('tracker_render_seconds', section='roads')
+def roads_panel():
+    """Bead Plate, Big Road, Big Eye Boy, Small Road and Cockroach Pig."""
+    st.markdown('<h2>Roads</h2>', unsafe_allow_html=True)
+    roads_html = cached_view('roads', build_roads)
+    if roads_html:
+        st.markdown(roads_html, unsafe_allow_html=True)
+    else:
+        st.markdown('<p class="text-gray-400">No results yet.</p>', unsafe_allow_html=True)
+
+@st.fragment
+@metrics.timed('tracker_render_seconds', section='deal_history')
+def deal_history_panel():
+    """Table of recent pairs and their types."""
+    st.markdown('<h2>Deal History</h2>', unsafe_allow_html=True)
+    history = cached_view('deal_history', build_deal_history)
+    if history is not None:
+        st.dataframe(history, use_container_width=True, height=300)
+    else:
+        st.markdown('<p class="text-gray-400">No history yet.</p>', unsafe_allow_html=True)
+
+@st.fragment
+@metrics.timed('tracker_render_seconds', section='statistics')
+def statistics_panel():
+    """Statistics card and the dominance window comparison."""
+    st.markdown(cached_view('statistics', build_statistics), unsafe_allow_html=True)
+    st.markdown('<h2>Dominance Windows</h2>', unsafe_allow_html=True)
+    windows = cached_view('dominance', build_dominance)
+    if windows is not None:
+        st.dataframe(windows, use_container_width=True, hide_index=True)
+    else:
+        st.markdown('<p class="text-gray-400">No pairs yet.</p>', unsafe_allow_html=True)
+
+@st.fragment
+@metrics.timed('tracker_render_seconds', section='charts')
+def charts_panel():
+    """Bankroll curve, rolling prediction accuracy and strategy level over the session's bets."""
+    st.markdown('<h2>Charts</h2>', unsafe_allow_html=True)
+    fig = cached_view('charts', build_charts)
+    if fig is not None:
+        st.plotly_chart(fig, use_container_width=True, key="charts")
+    else:
+        st.markdown('<p class="text-gray-400">No bets placed yet.</p>', unsafe_allow_html=True)
+
+@st.fragment
+@metrics.timed('tracker_render_seconds', section='risk')
+def risk_panel():
+    """How lucky the session has been: its bets resampled into many paths from the initial bankroll.
+
+    After each hand only a bounded table is rebuilt: RISK_LIVE_RESAMPLES
+    resamples of the newest RISK_WINDOW bets. The full RESAMPLES over every
+    bet run only on request and are shown until the next hand.
+    """
+    st.markdown('<h2>Risk</h2>', unsafe_allow_html=True)
+    frame = cached_view('risk', build_risk)
+    if frame is not None:
+        session = get_session()
+        cache = st.session_state.view_cache
+        key = (st.session_state.table, 'risk_full')
+        if st.button(f"Run {risk.RESAMPLES:,} resamples of every bet", key="risk_full"):
+            cache[key] = (session.revision, build_risk(session.state, risk.RESAMPLES, None))
+        full = cache.get(key)
+        if full is not None and full[0] == session.revision:
+            frame = full[1]
+            st.caption(f"{risk.RESAMPLES:,} block-bootstrap resamples of all {len(session.state.bet_history):,} bets, {risk.LEVEL:.0%} intervals.")
+        else:
+            bets = min(len(session.state.bet_history), RISK_WINDOW)
+            st.caption(f"{RISK_LIVE_RESAMPLES:,} block-bootstrap resamples of the last {bets:,} bets, {risk.LEVEL:.0%} intervals.")
+        st.dataframe(frame, use_container_width=True, hide_index=True)
+    else:
+        st.markdown(f'<p class="text-gray-400">Shown after {RISK_MIN_BETS} bets.</p>', unsafe_allow_html=True)
+
+@st.fragment
+@metrics.timed('tracker_render_seconds', section='bet_history')
+def bet_history_panel():
+    """Paginated bet history; changing page reruns only this panel."""
+    st.markdown('<h2>Bet History</h2>', unsafe_allow_html=True)
+    bet_history = get_session().state.bet_history
+    if bet_history:
+        pages = bet_history.pages(BET_PAGE_SIZE)
+        page = 0
+        if pages > 1:
+            page = st.number_input(f"Bet History Page (1 = latest {BET_PAGE_SIZE}, {pages} pages)", min_value=1, max_value=pages, value=1, step=1, key="bet_page_input") - 1
+        st.dataframe(bet_history.page(page, BET_PAGE_SIZE), use_container_width=True, height=200)
+    else:
+        st.markdown('<p class="text-gray-400">No bets placed yet.</p>', unsafe_allow_html=True)
+
+@st.fragment
+@metrics.timed('tracker_render_seconds', section='live_table')
+def live_table():
+    """Tables grid, alerts, record buttons and every panel a recorded hand can change.
+
+    Clicking a button in here reruns only this fragment, so the stylesheet,
+    sidebar and Monte Carlo summary are not re-sent; each panel rebuilds its
+    input only when the session revision has moved. The grid is in here so
+    the shown table's card follows the buttons below it.
+    """
+    tables_grid()
+    session = get_session()
+    for alert in session.alerts.latest(3):
+        alert_class = f"alert alert-{alert.type}"
+        repeats = f" (x{alert.count})" if alert.count > 1 else ""
+        st.markdown(f'<div class="{alert_class}" style="word-wrap: break-word;">{alert.message}{repeats}</div>', unsafe_allow_html=True)
+    if session.alerts:
+        st.button("Clear Alerts", on_click=clear_alerts)
+
+    overview_panel()
+    result_strip_panel()
+
+    st.markdown('<h2>Record Result</h2>', unsafe_allow_html=True)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.button("Player", on_click=record_result, args=('P',))
+    with col2:
+        st.button("Banker", on_click=record_result, args=('B',))
+    with col3:
+        st.button("Tie", on_click=record_result, args=('T',))
+    with col4:
+        st.button("Undo", on_click=undo, disabled=not session.journal)
+    with col5:
+        st.button("Redo", on_click=redo, disabled=not session.redo_stack)
+
+    roads_panel()
+    deal_history_panel()
+    statistics_panel()
+    charts_panel()
+    risk_panel()
+    bet_history_panel()
+    session_store().flush()
+
+@metrics.timed('tracker_render_seconds', section='sidebar')
+def sidebar(state):
+    """Money management, prediction, session and simulation controls."""
     with st.sidebar:
         st.markdown('<h2>Controls</h2>', unsafe_allow_html=True)
-        
+
+        with st.expander("Tables", expanded=len(st.session_state.tables) > 1):
+            labels = {table: table_label(table) for table in st.session_state.tables}
+            tables = list(labels)
+            st.selectbox("Show Table", tables, index=tables.index(st.session_state.table), format_func=labels.get, key="table_select", on_change=switch_table)
+            st.button("Add Table", on_click=add_table)
+            st.button("Close Table", on_click=close_table, help="Stop tracking the table shown and delete its history.")
+
         with st.expander("Money Management", expanded=True):
-            st.number_input("Initial Bankroll ($10-$10000)", min_value=10.0, max_value=10000.0, value=st.session_state.initial_bankroll, step=10.0, key="initial_bankroll_input")
-            st.number_input("Base Amount ($1-$100)", min_value=1.0, max_value=100.0, value=st.session_state.base_amount, step=1.0, key="base_amount_input")
-            st.markdown(f'<p class="text-sm text-gray-400">Profit Lock Threshold: ${st.session_state.profit_lock_threshold:.2f} (2x Base)</p>', unsafe_allow_html=True)
+            st.number_input("Initial Bankroll ($10-$10000)", min_value=10.0, max_value=10000.0, value=state.initial_bankroll, step=10.0, key="initial_bankroll_input")
+            st.number_input("Base Amount ($1-$100)", min_value=1.0, max_value=100.0, value=state.base_amount, step=1.0, key="base_amount_input")
+            st.markdown(f'<p class="text-sm text-gray-400">Profit Lock Threshold: ${state.profit_lock_threshold:.2f} (2x Base)</p>', unsafe_allow_html=True)
             st.markdown('<p class="strategy-label">Select Betting Strategy</p>', unsafe_allow_html=True)
-            strategy_options = ["Flatbet", "Flatbet Level Up", "T3"]
+            strategy_options = list(STRATEGIES)
             st.selectbox("Betting Strategy", strategy_options, key="strategy_select", help="Flatbet: Fixed bet amount. Flatbet Level Up: Increases bet level after significant losses, resets to level 1 at peak bankroll with profit or when net loss is recovered. T3: Dynamic bet sizing based on win/loss patterns.")
-            st.markdown(f'<p class="text-sm text-gray-400">Current Strategy: {st.session_state.betting_strategy}</p>', unsafe_allow_html=True)
-            if st.session_state.betting_strategy == "T3":
-                st.markdown(f'<p class="text-sm text-gray-400">T3 Level: {st.session_state.t3_level}, Results: {st.session_state.t3_results}</p>', unsafe_allow_html=True)
-            elif st.session_state.betting_strategy == "Flatbet Level Up":
-                st.markdown(f'<p class="text-sm text-gray-400">Flatbet Level: {st.session_state.flatbet_level}</p>', unsafe_allow_html=True)
+            st.markdown(f'<p class="text-sm text-gray-400">Current Strategy: {state.betting_strategy}</p>', unsafe_allow_html=True)
             st.button("Apply Money Management", on_click=lambda: [set_money_management(), set_betting_strategy()])
 
+        with st.expander("Prediction"):
+            st.selectbox("Predictor", PREDICTORS, index=PREDICTORS.index(state.predictor), key="predictor_select", help="Dominant Pairs: bet on the Odd/Even pair type that dominates the window. Pattern: bet on what most often followed the latest results, in this session and in the loaded corpus.")
+            window_options = (SESSION,) + state.windows.sizes
+            st.selectbox("Bet on Window", window_options, index=window_options.index(state.dominance_window), format_func=window_label, key="window_select", help="Odd/Even dominance is counted over the whole session or only the most recent pairs.")
+            for size in window_options:
+                st.selectbox(f"{window_label(size)} Rule", RULES, index=RULES.index(state.windows.rules[size]), key=f"rule_{window_label(size)}", help="Follow: bet on the dominant pair type repeating. Fade: bet against it.")
+            st.button("Apply Prediction", on_click=set_prediction)
+
         with st.expander("Session Actions"):
             st.button("Reset Betting", on_click=reset_betting)
             st.button("Reset Session", on_click=reset_all)
-            st.button("New Session", on_click=lambda: [reset_all(), st.session_state.alerts.append({"type": "success", "message": "New session started.", "id": str(uuid.uuid4())})])
+            st.button("New Session", on_click=new_session)
             st.button("Simulate 100 Games", on_click=simulate_games)
+            st.number_input("Undo to Hand", min_value=0, value=0, step=1, key="undo_to_input", help="Hand number as counted in the table's hands total; every later hand is undone.")
+            st.button("Undo to Hand", on_click=undo_to_hand)
+
+        with st.expander("Monte Carlo"):
+            st.number_input("Sessions", min_value=1, max_value=1000000, value=10000, step=1000, key="mc_sessions_input")
+            st.number_input("Hands per Session", min_value=1, max_value=100000, value=100, step=100, key="mc_hands_input")
+            st.checkbox("Deal from 8-Deck Shoes", value=False, key="mc_shoe_input", help="Deal every hand from shuffled 8-deck shoes with a burn, a cut card and the third-card rules, instead of drawing it with fixed P/B/T odds.")
+            st.button("Run Simulation", on_click=run_monte_carlo)
+
+@metrics.timed('tracker_render_seconds', section='monte_carlo')
+def monte_carlo_panel():
+    """Summary of the last Monte Carlo run, if any."""
+    if 'monte_carlo' in st.session_state:
+        summary, exits = st.session_state.monte_carlo
+        st.markdown('<h2>Monte Carlo</h2>', unsafe_allow_html=True)
+        st.dataframe(summary, use_container_width=True)
+        st.dataframe(exits, use_container_width=True)
 
-    with st.container():
-        st.markdown('<h2>Overview</h2>', unsafe_allow_html=True)
-        col1, col2 = st.columns(2)
-        with col1:
-            next_bet_class = "card"
-            if st.session_state.next_prediction == "Player":
-                next_bet_class = "card-player"
-            elif st.session_state.next_prediction == "Banker":
-                next_bet_class = "card-banker"
-                
-            st.markdown(f"""
-                <div class="card">
-                    <p class="text-sm font-semibold text-gray-400">Bankroll</p>
-                    <p class="text-xl font-bold text-white">${st.session_state.result_tracker:.2f}</p>
-                </div>
-                <div class="card">
-                    <p class="text-sm font-semibold text-gray-400">Session Profit</p>
-                    <p class="text-xl font-bold text-white">${st.session_state.session_profit:.2f}</p>
-                </div>
-                <div class="card">
-                    <p class="text-sm font-semibold text-gray-400">Profit Lock</p>
-                    <p class="text-xl font-bold text-green-400">${st.session_state.profit_lock:.2f}</p>
-                </div>
-                <div class="{next_bet_class}">
-                    <p class="text-sm font-semibold text-gray-200">Next Bet</p>
-                    <p class="text-xl font-bold text-white">{st.session_state.next_prediction}</p>
-                </div>
-                <div class="card">
-                    <p class="text-sm font-semibold text-gray-400">Bet Amount</p>
-                    <p class="text-xl font-bold text-white">${st.session_state.bet_amount:.2f}</p>
-                </div>
-            """, unsafe_allow_html=True)
-
-        st.markdown('<h2>Result History</h2>', unsafe_allow_html=True)
-        if st.session_state.results:
-            recent_results = list(st.session_state.results)[-20:]
-            result_items = [
-                f'<span class="result-item result-{r.lower()}">{r}</span>'
-                for r in recent_results
-            ]
-            result_html = "".join(result_items)
-            st.markdown(f"""
-                <div class="card">
-                    <p class="text-sm font-semibold text-gray-400">Last 20 Results (P: Player, B: Banker, T: Tie)</p>
-                    <div class="result-history" id="resultHistory">
-                        {result_html}
-                    </div>
-                </div>
-                <script>
-                    document.addEventListener('DOMContentLoaded', function() {{
-                        const resultDiv = document.getElementById('resultHistory');
-                        if (resultDiv) {{
-                            resultDiv.scrollLeft = resultDiv.scrollWidth;
-                        }}
-                    }});
-                </script>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown('<p class="text-gray-400">No results yet.</p>', unsafe_allow_html=True)
-
-        st.markdown('<h2>Record Result</h2>', unsafe_allow_html=True)
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.button("Player", on_click=lambda: record_result('P'))
-        with col2:
-            st.button("Banker", on_click=lambda: record_result('B'))
-        with col3:
-            st.button("Tie", on_click=lambda: record_result('T'))
-        with col4:
-            st.button("Undo", on_click=undo)
-
-        st.markdown('<h2>Deal History</h2>', unsafe_allow_html=True)
-        if st.session_state.pair_types:
-            history_data = [
-                {"Pair": f"{pair[0]}{pair[1]}", "Type": "Even" if pair[0] == pair[1] else "Odd"}
-                for pair in st.session_state.pair_types
-            ]
-            st.dataframe(pd.DataFrame(history_data), use_container_width=True, height=300)
-        else:
-            st.markdown('<p class="text-gray-400">No history yet.</p>', unsafe_allow_html=True)
-
-        total_games = st.session_state.stats['wins'] + st.session_state.stats['losses']
-        win_rate = (st.session_state.stats['wins'] / total_games * 100) if total_games > 0 else 0
-        avg_streak = sum(st.session_state.stats['streaks']) / len(st.session_state.stats['streaks']) if st.session_state.stats['streaks'] else 0
-        st.markdown(f"""
-            <div class="card">
-                <p class="text-sm font-semibold text-gray-400">Statistics</p>
-                <p class="text-base text-white">Win Rate: {win_rate:.1f}%</p>
-                <p class="text-base text-white">Avg Streak: {avg_streak:.1f}</p>
-                <p class="text-base text-white">Patterns: Odd: {st.session_state.stats['odd_pairs']}, Even: {st.session_state.stats['even_pairs']}, Alternating: {st.session_state.stats['alternating_pairs']}</p>
-            </div>
-        """, unsafe_allow_html=True)
-
-        st.markdown('<h2>Bet History</h2>', unsafe_allow_html=True)
-        if st.session_state.stats.get('bet_history'):
-            bet_history = pd.DataFrame(st.session_state.stats['bet_history'])
-            st.dataframe(bet_history, use_container_width=True, height=200)
-        else:
-            st.markdown('<p class="text-gray-400">No bets placed yet.</p>', unsafe_allow_html=True)
+def main():
+    """Main Streamlit application."""
+    initialize_session_state()
+    st.markdown(STYLE, unsafe_allow_html=True)
+    title = f" — {table_label(st.session_state.table)}" if len(st.session_state.tables) > 1 else ""
+    st.markdown(f'<h1>Baccarat Tracker{title}</h1>', unsafe_allow_html=True)
+    sidebar(get_session().state)
+    live_table()
+    monte_carlo_panel()
+    metrics.sample(st.session_state)
 
 if __name__ == "__main__":
     main()
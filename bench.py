@@ -0,0 +1,236 @@
+"""Benchmarks for the tracker's hot paths, with a baseline comparison mode.
+
+Example:
+    python bench.py --output bench.json
+    python bench.py --output new.json --baseline bench.json --tolerance 0.25
+
+Every case builds a deterministic session of N hands per strategy and
+measures recording, the betting strategy, undo/redo, simulate() and memory.
+Unless --no-app is given, it also measures a full rerun of app.py and a
+button click through Streamlit's AppTest harness. Results are written as
+JSON. With --baseline, any time or memory metric that grew by more than the
+tolerance (tail latencies excepted) is reported and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from engine import DEFAULT_BASE_AMOUNT, OUTCOMES, STRATEGIES, WEIGHTS, Session
+from metrics import deep_size
+
+SIZES = (10, 1_000, 10_000, 100_000)
+BANKROLL = 1e9  # Large enough that no case runs out of money and stops betting
+APP_BANKROLL = 10_000.0  # Largest bankroll the sidebar accepts
+UNDO_SAMPLE = 1000  # Hands undone and redone one at a time per case
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+def results(hands, seed=0):
+    """The deterministic result sequence every case of `hands` hands replays."""
+    return random.Random(seed).choices(OUTCOMES, WEIGHTS, k=hands)
+
+
+def _session(strategy, bankroll=BANKROLL):
+    """An empty session that keeps betting as long as its bankroll lasts."""
+    session = Session(quiet=True)
+    session.configure(DEFAULT_BASE_AMOUNT, bankroll)
+    session.set_strategy(strategy)
+    session.state.win_limit = float('inf')
+    return session
+
+
+def fixture(strategy, hands, seed=0, bankroll=BANKROLL):
+    """A session that has recorded `hands` hands under `strategy`."""
+    session = _session(strategy, bankroll)
+    session.replay(results(hands, seed))
+    return session
+
+
+def _percentiles(samples_ns):
+    samples = np.asarray(samples_ns, dtype=np.float64) / 1000.0
+    if not len(samples):
+        return {}
+    return {
+        'mean_us': float(samples.mean()),
+        'p50_us': float(np.percentile(samples, 50)),
+        'p99_us': float(np.percentile(samples, 99)),
+        'max_us': float(samples.max()),
+    }
+
+
+def bench_engine(strategy, hands, seed=0):
+    """Time and size one strategy at one session length; return {metric: value}."""
+    clock = time.perf_counter_ns
+    session = _session(strategy)
+    record = session.record
+    samples = []
+    for result in results(hands, seed):
+        start = clock()
+        record(result)
+        samples.append(clock() - start)
+    metrics = {f'record_{name}': value for name, value in _percentiles(samples).items()}
+    metrics['record_hands_per_s'] = hands / (sum(samples) / 1e9)
+
+    samples = []
+    for outcome in ('win', 'loss') * 500:
+        start = clock()
+        session.apply_betting_strategy(outcome, "Banker")
+        samples.append(clock() - start)
+    metrics.update({f'strategy_{name}': value for name, value in _percentiles(samples).items()})
+    session = fixture(strategy, hands, seed)  # apply_betting_strategy moved the progression
+
+    undone = min(UNDO_SAMPLE, hands)
+    samples = []
+    for _ in range(undone):
+        start = clock()
+        session.undo()
+        samples.append(clock() - start)
+    metrics.update({f'undo_{name}': value for name, value in _percentiles(samples).items()})
+    samples = []
+    for _ in range(undone):
+        start = clock()
+        session.redo()
+        samples.append(clock() - start)
+    metrics.update({f'redo_{name}': value for name, value in _percentiles(samples).items()})
+    start = clock()
+    session.undo_to(0)
+    metrics['undo_all_ms'] = (clock() - start) / 1e6
+
+    session = fixture(strategy, hands, seed)
+    start = clock()
+    session.simulate(100, random.Random(seed))
+    metrics['simulate_100_ms'] = (clock() - start) / 1e6
+
+    tracemalloc.start()
+    session = fixture(strategy, hands, seed)
+    metrics['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    metrics['journal_bytes'] = deep_size(session.journal)
+    metrics['bet_history_bytes'] = deep_size(session.state.bet_history)
+    metrics['alerts_bytes'] = deep_size(session.alerts)
+    metrics['session_bytes'] = deep_size(session)
+    return metrics
+
+
+def bench_app(strategy, hands, seed=0, repeat=3):
+    """Time full app.py reruns and a Player click with a `hands`-hand session loaded."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    session = fixture(strategy, hands, seed, APP_BANKROLL)
+    at.session_state.tables = {"bench": session}
+    at.session_state.table = "bench"
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"app.py raised: {at.exception}")
+    metrics = {}
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - start)
+    metrics['app_rerun_ms'] = min(samples) * 1000
+    samples = []
+    for _ in range(repeat):
+        button = next(button for button in at.button if button.label == "Player")
+        start = time.perf_counter()
+        button.click().run()
+        samples.append(time.perf_counter() - start)
+    metrics['app_click_ms'] = min(samples) * 1000
+    return metrics
+
+
+def run(sizes=SIZES, strategies=STRATEGIES, app=True, seed=0):
+    """Run every case; return the JSON-ready report."""
+    cases = {}
+    for strategy in strategies:
+        for hands in sizes:
+            name = f"{strategy}/{hands}"
+            print(f"{name} ...", file=sys.stderr, flush=True)
+            metrics = bench_engine(strategy, hands, seed)
+            if app:
+                metrics.update(bench_app(strategy, hands, seed))
+            cases[name] = metrics
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': seed,
+        },
+        'cases': cases,
+    }
+
+
+def _lower_is_better(metric):
+    return metric.endswith(('_us', '_ms', '_bytes'))
+
+
+def _gated(metric):
+    """Whether a change in `metric` can fail the comparison; tail latencies are too noisy to."""
+    return not metric.endswith(('_p99_us', '_max_us'))
+
+
+def compare(report, baseline, tolerance=0.2):
+    """Return (case, metric, baseline, current, ratio) for every metric that regressed."""
+    regressions = []
+    for case, metrics in report['cases'].items():
+        old = baseline['cases'].get(case)
+        if old is None:
+            continue
+        for metric, value in metrics.items():
+            before = old.get(metric)
+            if not before or not _gated(metric):
+                continue
+            ratio = value / before
+            worse = ratio > 1 + tolerance if _lower_is_better(metric) else ratio < 1 - tolerance
+            if worse:
+                regressions.append((case, metric, before, value, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tracker's hot paths.")
+    parser.add_argument('--output', help="JSON file to write the results to (default: stdout)")
+    parser.add_argument('--baseline', help="Earlier results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed relative change before a metric counts as a regression")
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES), help="Session lengths in hands")
+    parser.add_argument('--strategy', nargs='+', default=list(STRATEGIES), choices=STRATEGIES)
+    parser.add_argument('--no-app', action='store_true', help="Skip the AppTest rerun benchmarks")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if not args.no_app:
+        # Keep the app's session store out of the working directory.
+        os.environ.setdefault("TRACKER_DB", os.path.join(tempfile.mkdtemp(), "bench.db"))
+    report = run(args.sizes, args.strategy, not args.no_app, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for case, metric, before, value, ratio in regressions:
+            print(f"REGRESSION {case} {metric}: {before:.4g} -> {value:.4g} ({ratio:.2f}x)", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Card-accurate baccarat shoes, dealt for many shoes at once.
+
+Example:
+    python cards.py --shoes 100000 --output dealt.txt.gz
+    python shoes.py dealt.txt.gz --strategy T3
+
+Each shoe is 8 shuffled decks. The first card is burned along with as many
+more as its value (tens and faces burn ten). Hands are dealt Player, Banker,
+Player, Banker, then the third cards by the standard tableau. A cut card
+sits CUT_CARD cards from the back; the hand that brings it out is finished
+and one more is dealt. Every step works on a (shoes x cards) array, one hand
+of every shoe at a time, so a shoe's hands keep the correlation their shared
+cards give them, unlike montecarlo.deal's i.i.d. draws. Outcomes use the
+same codes as montecarlo, so they feed BatchSession and shoes.py unchanged.
+"""
+import argparse
+import gzip
+import sys
+import time
+
+import numpy as np
+
+from engine import OUTCOMES
+from montecarlo import BANKER, PLAYER, TIE
+
+DECKS = 8
+CUT_CARD = 14  # Cards left behind the cut card
+HAND_CARDS = 6  # Most cards one hand can take
+NO_HAND = -1  # Outcome code padding a shoe that has already ended
+BLOCK_SHOES = 10_000  # Shoes dealt per array when writing a file
+
+# Baccarat value of each rank, ace to king: tens and faces count zero.
+RANK_VALUES = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 0, 0, 0, 0], dtype=np.int8)
+
+
+def _banker_tableau():
+    """BANKER_DRAWS[banker total, player's third card]: whether the Banker draws after the Player did."""
+    draws = np.zeros((10, 10), dtype=bool)
+    draws[:3] = True
+    draws[3] = True
+    draws[3, 8] = False
+    draws[4, 2:8] = True
+    draws[5, 4:8] = True
+    draws[6, 6:8] = True
+    return draws
+
+
+BANKER_DRAWS = _banker_tableau()
+
+
+def shuffled(shoes, decks=DECKS, rng=None):
+    """A (shoes x 52 * decks) int8 array of card values, each row an independently shuffled shoe."""
+    rng = np.random.default_rng(rng)
+    shoe = np.tile(RANK_VALUES, 4 * decks)
+    return rng.permuted(np.broadcast_to(shoe, (shoes, len(shoe))), axis=1).astype(np.int8)
+
+
+def deal_hand(cards, position):
+    """Deal one hand from every shoe at its position; return (outcome codes, cards used)."""
+    rows = np.arange(len(cards))
+
+    def card(offset):
+        return cards[rows, position + offset]
+
+    player = (card(0) + card(2)) % 10
+    banker = (card(1) + card(3)) % 10
+    natural = (player >= 8) | (banker >= 8)
+    player_draws = ~natural & (player <= 5)
+    third = card(4)
+    banker_draws = ~natural & np.where(player_draws, BANKER_DRAWS[banker, third], banker <= 5)
+    player = np.where(player_draws, (player + third) % 10, player)
+    banker = np.where(banker_draws, (banker + card(4 + player_draws)) % 10, banker)
+    outcome = np.where(player > banker, PLAYER, np.where(banker > player, BANKER, TIE)).astype(np.int8)
+    return outcome, 4 + player_draws + banker_draws
+
+
+def deal_shoes(shoes, decks=DECKS, cut=CUT_CARD, rng=None):
+    """Deal `shoes` whole shoes; return a (shoes x hands) int8 outcome array padded with NO_HAND, and hands per shoe."""
+    if cut < 2 * HAND_CARDS - 1:
+        raise ValueError(f"The cut card must leave at least {2 * HAND_CARDS - 1} cards for the last hands")
+    cards = shuffled(shoes, decks, rng)
+    # Pad so the cards a finished shoe "deals" read past the end harmlessly.
+    cards = np.pad(cards, ((0, 0), (0, HAND_CARDS)))
+    end = cards.shape[1] - HAND_CARDS - cut
+    first = cards[:, 0]
+    position = 1 + np.where(first == 0, 10, first).astype(np.int64)  # The burn
+    live = np.ones(shoes, dtype=bool)
+    last = np.zeros(shoes, dtype=bool)  # The cut card is out: this is the final hand
+    hands = []
+    while live.any():
+        outcome, used = deal_hand(cards, position)
+        hands.append(np.where(live, outcome, NO_HAND).astype(np.int8))
+        position = np.where(live, position + used, position)
+        live &= ~last
+        last = live & (position >= end)
+    outcomes = np.stack(hands, axis=1)
+    return outcomes, (outcomes != NO_HAND).sum(axis=1)
+
+
+class ShoeStream:
+    """Consecutive shoes per session, handed out as (sessions x hands) blocks like montecarlo.deal.
+
+    A shoe cut short by one block carries on in the next, so a session sees
+    unbroken shoes however the hands are chunked.
+    """
+
+    def __init__(self, sessions, decks=DECKS, cut=CUT_CARD, rng=None):
+        self.decks = decks
+        self.cut = cut
+        self.rng = np.random.default_rng(rng)
+        self.buffer = np.empty((sessions, 0), dtype=np.int8)
+        self.count = np.zeros(sessions, dtype=np.int64)  # Hands buffered per session
+
+    def _refill(self, hands):
+        sessions = len(self.count)
+        while self.count.min() < hands:
+            outcomes, dealt = deal_shoes(sessions, self.decks, self.cut, self.rng)
+            width = int((self.count + dealt).max())
+            if width > self.buffer.shape[1]:
+                self.buffer = np.pad(self.buffer, ((0, 0), (0, width - self.buffer.shape[1])))
+            offsets = np.arange(outcomes.shape[1])
+            filled = offsets < dealt[:, None]
+            rows = np.broadcast_to(np.arange(sessions)[:, None], filled.shape)
+            self.buffer[rows[filled], (self.count[:, None] + offsets)[filled]] = outcomes[filled]
+            self.count += dealt
+
+    def deal(self, hands):
+        """The next `hands` outcomes of every session."""
+        self._refill(hands)
+        block = self.buffer[:, :hands].copy()
+        self.buffer = self.buffer[:, hands:]
+        self.count -= hands
+        return block
+
+
+def shoe_strings(outcomes):
+    """'PBT...' strings of a padded outcome array, one per shoe."""
+    letters = np.frombuffer(''.join(OUTCOMES).encode(), dtype=np.uint8)
+    for row in outcomes:
+        yield letters[row[row != NO_HAND]].tobytes().decode()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deal card-accurate shoes, one per line, for shoes.py.")
+    parser.add_argument('--shoes', type=int, default=10000)
+    parser.add_argument('--decks', type=int, default=DECKS)
+    parser.add_argument('--cut', type=int, default=CUT_CARD, help="Cards left behind the cut card")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', help="File to write (gzipped if it ends in .gz; default: stdout)")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    if args.output is None:
+        out = sys.stdout
+    elif args.output.endswith('.gz'):
+        out = gzip.open(args.output, 'wt', encoding='ascii')
+    else:
+        out = open(args.output, 'w', encoding='ascii')
+    start = time.perf_counter()
+    hands = 0
+    try:
+        for done in range(0, args.shoes, BLOCK_SHOES):
+            try:
+                outcomes, dealt = deal_shoes(min(BLOCK_SHOES, args.shoes - done), args.decks, args.cut, rng)
+            except ValueError as exc:
+                parser.error(str(exc))
+            hands += int(dealt.sum())
+            out.writelines(shoe + "\n" for shoe in shoe_strings(outcomes))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"Dealt {args.shoes} shoes, {hands} hands, in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
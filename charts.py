@@ -0,0 +1,101 @@
+"""Bankroll, prediction accuracy and strategy level charts, downsampled to a fixed point budget.
+
+Series longer than POINTS are reduced on the server before plotting:
+Largest-Triangle-Three-Buckets for the bankroll and accuracy curves, which
+keeps their visual shape, and min-max buckets for the strategy level, which
+keeps every peak level however briefly it was held. Traces are WebGL, so a
+100k-hand session draws as quickly as a short live one.
+"""
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+POINTS = 2000  # Most points drawn per trace
+ACCURACY_WINDOW = 50  # Bets in the rolling prediction accuracy
+
+
+def lttb(y, points=POINTS):
+    """Indices of at most `points` values of `y` chosen by Largest-Triangle-Three-Buckets."""
+    n = len(y)
+    if n <= points or points < 3:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    # points - 2 buckets between the first and last value, which are always kept.
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    centers_x = (edges[:-1] + edges[1:] - 1) / 2
+    centers_y = np.add.reduceat(y[:n - 1], edges[:-1]) / np.diff(edges)
+    centers_x = np.append(centers_x[1:], n - 1)  # Each bucket looks ahead to the next one's center
+    centers_y = np.append(centers_y[1:], y[-1])
+    keep = np.empty(points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        x = np.arange(lo, hi)
+        area = np.abs((a - centers_x[i]) * (y[lo:hi] - y[a]) - (a - x) * (centers_y[i] - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(y, points=POINTS):
+    """Indices of the first and last value of `y` and the lowest and highest in each of its buckets, in order.
+
+    The (points - 2) / 2 buckets leave room for the endpoints, so the trace
+    spans the same bets as the LTTB ones.
+    """
+    n = len(y)
+    if n <= points:
+        return np.arange(n)
+    buckets = max(1, (points - 2) // 2)
+    size = -(-n // buckets)
+    padded = np.pad(np.asarray(y), (0, buckets * size - n), mode='edge').reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    keep = np.concatenate(([0, n - 1], offsets + padded.argmin(axis=1), offsets + padded.argmax(axis=1)))
+    return np.unique(np.minimum(keep, n - 1))
+
+
+def rolling_accuracy(wins, window=ACCURACY_WINDOW):
+    """Share of bets won over the last `window` bets, fewer at the start."""
+    totals = np.cumsum(wins, dtype=np.float64)
+    lagged = np.concatenate((np.zeros(min(window, len(totals))), totals[:-window]))
+    return (totals - lagged) / np.minimum(np.arange(1, len(totals) + 1), window)
+
+
+def series(history, points=POINTS):
+    """Downsampled (bet numbers, values) of the bankroll, rolling accuracy and strategy level of a BetHistory."""
+    bankroll = history.column('bankroll')
+    accuracy = rolling_accuracy(history.column('win'))
+    # Only the strategy in use fills its level column; a static strategy has none.
+    level = np.maximum(history.column('t3_level'), history.column('flatbet_level'))
+    level = np.where(level == 0, 1, level)
+    bets = np.arange(1, len(bankroll) + 1)
+    return {
+        name: (bets[keep], values[keep])
+        for name, values, keep in (
+            ('bankroll', bankroll, lttb(bankroll, points)),
+            ('accuracy', accuracy, lttb(accuracy, points)),
+            ('level', level, minmax(level, points)),
+        )
+    }
+
+
+def figure(history, initial_bankroll, points=POINTS):
+    """Three stacked WebGL charts sharing the bet axis: bankroll, rolling accuracy and strategy level."""
+    data = series(history, points)
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.06, row_heights=(0.5, 0.25, 0.25),
+                        subplot_titles=("Bankroll", f"Accuracy (last {ACCURACY_WINDOW} bets)", "Strategy Level"))
+    x, y = data['bankroll']
+    fig.add_trace(go.Scattergl(x=x, y=y, mode='lines', name="Bankroll", line=dict(color="#10B981")), row=1, col=1)
+    fig.add_hline(y=initial_bankroll, line=dict(color="#6B7280", dash='dot'), row=1, col=1)
+    x, y = data['accuracy']
+    fig.add_trace(go.Scattergl(x=x, y=y, mode='lines', name="Accuracy", line=dict(color="#3B82F6")), row=2, col=1)
+    fig.add_hline(y=0.5, line=dict(color="#6B7280", dash='dot'), row=2, col=1)
+    x, y = data['level']
+    fig.add_trace(go.Scattergl(x=x, y=y, mode='lines', name="Level", line=dict(color="#F59E0B", shape='hv')),
+                  row=3, col=1)
+    fig.update_yaxes(tickformat='.0%', range=(0, 1), row=2, col=1)
+    fig.update_xaxes(title_text="Bet", row=3, col=1)
+    fig.update_layout(height=600, showlegend=False, margin=dict(l=10, r=10, t=30, b=10), template='plotly_dark',
+                      paper_bgcolor="#1F2528", plot_bgcolor="#1F2528")
+    return fig
@@ -0,0 +1,96 @@
+"""Odd/Even pair dominance over several sliding windows at once."""
+
+DEFAULT_WINDOWS = (10, 20, 50)
+RULES = ("Follow", "Fade")
+SESSION = None  # Window key for the whole session, the tracker's original rule
+
+
+def window_label(size):
+    """Human-readable name for a window key."""
+    return "Session" if size is SESSION else f"Last {size}"
+
+
+class DominanceWindows:
+    """Odd/Even pair counts over the whole session and over the last N pairs.
+
+    Every pair type of the session is kept as one byte, so each window is
+    updated in O(1) on push and rolled back in O(1) on pop without storing
+    anything extra per hand.
+    """
+
+    __slots__ = ('sizes', 'rules', 'odd', 'session_odd', 'pairs')
+
+    def __init__(self, sizes=DEFAULT_WINDOWS, rules=None):
+        self.sizes = tuple(sorted(set(sizes)))
+        if any(size < 1 for size in self.sizes):
+            raise ValueError("Window sizes must be positive")
+        self.rules = dict.fromkeys((SESSION,) + self.sizes, "Follow")
+        if rules:
+            self.set_rules(rules)
+        self.odd = [0] * len(self.sizes)  # Odd pairs inside each window
+        self.session_odd = 0
+        self.pairs = bytearray()  # 1 for an Odd pair, 0 for Even
+
+    def set_rules(self, rules):
+        """Set the prediction rule of one or more windows."""
+        for size, rule in rules.items():
+            if size not in self.rules:
+                raise ValueError(f"Unknown dominance window: {size}")
+            if rule not in RULES:
+                raise ValueError(f"Unknown prediction rule: {rule}")
+            self.rules[size] = rule
+
+    def push(self, odd):
+        """Add the newest pair type."""
+        pairs = self.pairs
+        pairs.append(odd)
+        self.session_odd += odd
+        n = len(pairs)
+        counts = self.odd
+        for i, size in enumerate(self.sizes):
+            counts[i] += odd
+            if n > size:
+                counts[i] -= pairs[n - 1 - size]
+
+    def pop(self):
+        """Remove the newest pair type, restoring every window."""
+        pairs = self.pairs
+        odd = pairs.pop()
+        self.session_odd -= odd
+        n = len(pairs)
+        counts = self.odd
+        for i, size in enumerate(self.sizes):
+            counts[i] -= odd
+            if n >= size:
+                counts[i] += pairs[n - size]
+
+    def counts(self, size=SESSION):
+        """Return (odd, even) pair counts for a window."""
+        n = len(self.pairs)
+        if size is SESSION:
+            return self.session_odd, n - self.session_odd
+        odd = self.odd[self.sizes.index(size)]
+        return odd, min(n, size) - odd
+
+    def dominance(self, size=SESSION):
+        """'Odd' when Odd pairs outnumber Even ones in the window, otherwise 'Even'."""
+        odd, even = self.counts(size)
+        return "Odd" if odd > even else "Even"
+
+    def predict(self, dominance, result, rule="Follow"):
+        """Next bet for a dominance: Follow expects the dominant pair type, Fade the other one."""
+        alternate = (dominance == "Odd") == (rule == "Follow")
+        if alternate:
+            return "Player" if result == "B" else "Banker"
+        return "Player" if result == "P" else "Banker"
+
+    def summary(self, result):
+        """Rows of (window, odd, even, dominance, rule, prediction) for display."""
+        rows = []
+        for size in (SESSION,) + self.sizes:
+            odd, even = self.counts(size)
+            dominance = "Odd" if odd > even else "Even"
+            rule = self.rules[size]
+            prediction = self.predict(dominance, result, rule) if result in ('P', 'B') and self.pairs else "N/A"
+            rows.append((window_label(size), odd, even, dominance, rule, prediction))
+        return rows
@@ -0,0 +1,587 @@
+"""Headless Baccarat tracker engine: Dominant Pairs prediction and money management."""
+import random
+from operator import attrgetter
+
+import patterns
+from alerts import AlertLog
+from dominance import DEFAULT_WINDOWS, SESSION, DominanceWindows, window_label
+from history import BetHistory, Journal
+from patterns import PatternIndex
+from roads import Roads
+from stats import SessionStats
+from strategies import PROGRESSIONS, START
+
+STRATEGIES = tuple(PROGRESSIONS)
+PREDICTORS = ("Dominant Pairs", "Pattern")
+OUTCOMES = ('P', 'B', 'T')
+WEIGHTS = (0.446, 0.458, 0.096)
+
+DEFAULT_BANKROLL = 1000.0
+DEFAULT_BASE_AMOUNT = 10.0
+LOW_WATER = 0.75  # Share of its budget that fit() brings an over-budget session back down to
+PAIR_WINDOW = 100  # Most recent pairs the Deal History shows
+
+
+class SessionState:
+    """Compact per-session state, one slot per tracked value."""
+
+    __slots__ = (
+        'pair_count', 'pair_end', 'results', 'base_amount', 'result_tracker', 'peak_bankroll',
+        'session_profit', 'profit_lock', 'previous_result', 'next_prediction',
+        'current_dominance', 'bet_amount', 'max_profit', 'wins', 'losses', 'ties',
+        'stats', 'odd_pairs', 'even_pairs', 'alternating_pairs', 'bet_history',
+        'profit_lock_threshold', 'betting_strategy', 't3_level', 't3_results',
+        'flatbet_level', 'flatbet_net_loss', 'stop_loss', 'win_limit',
+        'initial_bankroll', 'game_count', 'windows', 'dominance_window', 'roads',
+        'predictor', 'patterns',
+    )
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.pair_count = 0  # Pairs formed; the pairs themselves are derived from results
+        self.pair_end = None  # Second result of the newest pair
+        self.base_amount = DEFAULT_BASE_AMOUNT
+        self.result_tracker = DEFAULT_BANKROLL  # Start with initial bankroll
+        self.peak_bankroll = DEFAULT_BANKROLL  # Track highest bankroll
+        self.session_profit = 0.0  # Track profits separately
+        self.profit_lock = 0.0
+        self.previous_result = None
+        self.next_prediction = "N/A"
+        self.current_dominance = "N/A"
+        self.bet_amount = DEFAULT_BASE_AMOUNT
+        self.max_profit = 0.0
+        self.wins = 0
+        self.losses = 0
+        self.ties = 0
+        self.stats = SessionStats(STRATEGIES)  # Streaks, bet outcomes and drawdown, updated per hand
+        self.odd_pairs = 0
+        self.even_pairs = 0
+        self.alternating_pairs = 0
+        self.bet_history = BetHistory(STRATEGIES)
+        self.profit_lock_threshold = 2 * self.base_amount
+        # Money management variables
+        self.betting_strategy = "Flatbet"
+        self.t3_level = 1
+        self.t3_results = []
+        self.flatbet_level = 1  # Flatbet Level Up level
+        self.flatbet_net_loss = 0.0  # Track net loss for Flatbet Level Up
+        self.stop_loss = 0.8  # Stop at 80% of initial bankroll
+        self.win_limit = 1.5  # Win at 150% of initial bankroll
+        self.initial_bankroll = DEFAULT_BANKROLL  # Default initial bankroll
+        self.game_count = 0  # Track number of recorded games
+        self.windows = DominanceWindows(windows)  # Odd/Even counts over sliding windows
+        self.dominance_window = SESSION  # Window whose dominance drives the next bet
+        self.roads = Roads()  # Bead Plate, Big Road and derived roads of every hand
+        self.results = self.roads.results  # Every hand, 2-bit packed; roads.push and pop maintain it
+        self.predictor = PREDICTORS[0]  # Rule that picks the next bet
+        self.patterns = PatternIndex()  # What followed each recent P/B pattern this session
+
+
+# Scalar values rolled back by undo; mirrors what the tracker has always restored.
+_JOURNAL_FIELDS = (
+    'previous_result', 'result_tracker', 'peak_bankroll', 'session_profit', 'profit_lock',
+    'wins', 'losses', 'ties', 'odd_pairs', 'even_pairs', 'alternating_pairs',
+    'next_prediction', 'current_dominance', 'bet_amount', 'max_profit', 't3_level', 'pair_count', 'pair_end',
+    'betting_strategy', 'flatbet_level', 'flatbet_net_loss', 'initial_bankroll', 'game_count',
+)
+_journal_values = attrgetter(*_JOURNAL_FIELDS)
+_GAME_COUNT = _JOURNAL_FIELDS.index('game_count')
+
+# Journal entry kinds: a recorded hand, a win-limit lock that rejected the hand, or a settings change.
+HAND, LOCK, SETTINGS = 0, 1, 2
+# Settings changes redo can apply again: logged name -> (method, what the redo alert calls it).
+_SETTINGS_ACTIONS = {
+    'configure': ('_configure', "money management"),
+    'strategy': ('_set_strategy', "strategy"),
+    'prediction': ('_set_prediction', "prediction"),
+}
+
+
+class Session:
+    """A single tracked table: records results, predicts and sizes the next bet."""
+
+    def __init__(self, quiet=False, keep_history=True, windows=DEFAULT_WINDOWS):
+        self.window_sizes = windows
+        self.state = SessionState(windows)
+        self.journal = Journal()  # One constant-size delta per hand, newest last
+        self.redo_stack = []  # Results undone since the last new action
+        self.revision = 0  # Bumped on every change so views can cache what they render
+        self.on_event = None  # Called with each state-changing action, e.g. to persist it
+        self.alerts = AlertLog()
+        if quiet:
+            self.alerts.mute()  # Skip alert bookkeeping for headless replays
+        self.keep_history = keep_history  # Disable to replay without an undo journal
+
+    def alert(self, alert_type, message, key=None):
+        """Queue a message for the view; alerts sharing a key replace each other."""
+        self.alerts.add(alert_type, message, key)
+
+    def clear_alerts(self):
+        """Clear all alerts."""
+        self.alerts.clear()
+
+    def _changed(self, event):
+        """Note a state-changing action: bump the revision and hand it to the listener."""
+        self.revision += 1
+        if self.on_event is not None:
+            self.on_event(event)
+
+    @property
+    def nbytes(self):
+        """Approximate memory of everything that grows with the session: undo journal, bets, hands, roads and stats."""
+        s = self.state
+        return (self.journal.nbytes + s.bet_history.nbytes + s.roads.nbytes + s.patterns.nbytes + s.stats.nbytes
+                + len(s.windows.pairs) + len(self.redo_stack) * 8)
+
+    def fit(self, budget):
+        """Bring a session over `budget` bytes down to LOW_WATER of it; return True if anything was freed.
+
+        The undo journal is compacted first; if that is not enough, its
+        oldest hands are dropped until it is, or until none are left to drop.
+        Nothing is changed while the session is within budget.
+        """
+        if self.nbytes <= budget:
+            return False
+        target = budget * LOW_WATER
+        journal = self.journal
+        journal.compact()
+        while self.nbytes > target and journal.trim():
+            pass
+        return True
+
+    def configure(self, base_amount, initial_bankroll):
+        """Set the base amount and initial bankroll; return True if they were accepted."""
+        if not 1 <= base_amount <= 100:
+            self.alert("error", "Base amount must be between $1 and $100.")
+            return False
+        if initial_bankroll < 10:
+            self.alert("error", "Initial bankroll must be at least $10.")
+            return False
+        if base_amount > initial_bankroll * 0.05:
+            self.alert("warning", "Base amount exceeds 5% of initial bankroll, which may be risky.")
+        self._changed(('configure', base_amount, initial_bankroll))
+        self.redo_stack.clear()
+        self._configure(base_amount, initial_bankroll)
+        self.alert("success", f"Base amount (${base_amount:.2f}) and initial bankroll (${initial_bankroll:.2f}) updated successfully.")
+        return True
+
+    def _configure(self, base_amount, initial_bankroll):
+        s = self.state
+        self._journal_settings(s, ('configure', base_amount, initial_bankroll))
+        s.base_amount = base_amount
+        s.initial_bankroll = initial_bankroll
+        s.result_tracker = initial_bankroll
+        s.peak_bankroll = initial_bankroll
+        s.session_profit = 0.0
+        s.profit_lock_threshold = 2 * base_amount
+        s.bet_amount = base_amount
+        s.game_count = 0
+
+    def set_strategy(self, strategy):
+        """Set the betting strategy and reset strategy-specific parameters."""
+        if strategy not in PROGRESSIONS:
+            raise ValueError(f"Unknown betting strategy: {strategy}")
+        self._changed(('strategy', strategy))
+        self.redo_stack.clear()
+        self._set_strategy(strategy)
+        self.alert("success", f"Betting strategy set to {strategy}.")
+
+    def _set_strategy(self, strategy):
+        progression = PROGRESSIONS[strategy]
+        s = self.state
+        self._journal_settings(s, ('strategy', strategy))
+        s.betting_strategy = strategy
+        if progression.level_field:
+            setattr(s, progression.level_field, 1)
+        if progression.state_field:
+            setattr(s, progression.state_field, [])
+        if progression.net_loss_field:
+            setattr(s, progression.net_loss_field, 0.0)
+        s.bet_amount = s.base_amount
+
+    def set_prediction(self, window=SESSION, rules=None, predictor=None):
+        """Choose the predictor, the dominance window that drives the next bet and per-window rules."""
+        s = self.state
+        windows = s.windows
+        if window is not SESSION and window not in windows.sizes:
+            raise ValueError(f"Unknown dominance window: {window}")
+        if predictor is not None and predictor not in PREDICTORS:
+            raise ValueError(f"Unknown predictor: {predictor}")
+        previous = dict(windows.rules)
+        try:
+            if rules:
+                windows.set_rules(rules)  # Validates; _set_prediction journals the rules it replaces
+            rules = tuple(windows.rules.items())
+        finally:
+            windows.rules = previous
+        predictor = predictor or s.predictor
+        self._changed(('prediction', window, rules, predictor))
+        self.redo_stack.clear()
+        self._set_prediction(window, rules, predictor)
+        if predictor == "Pattern":
+            corpus = patterns.CORPUS
+            source = f" and {corpus.hands} corpus hands" if corpus is not None else ""
+            self.alert("success", f"Predicting from patterns of up to {s.patterns.order} results in this session{source}.")
+        else:
+            self.alert("success", f"Predicting from the {window_label(window)} window ({windows.rules[window]}).")
+
+    def _set_prediction(self, window, rules, predictor):
+        s = self.state
+        self._journal_settings(s, ('prediction', window, rules, predictor))
+        s.windows.set_rules(dict(rules))
+        s.dominance_window = window
+        s.predictor = predictor
+        if s.pair_count >= 5 and s.next_prediction != "N/A" and s.previous_result in ('P', 'B'):
+            self._predict(s, s.previous_result)
+
+    def _predict(self, s, result):
+        """Set dominance, and the next prediction from the selected window or the pattern index."""
+        windows = s.windows
+        window = s.dominance_window
+        odd, even = windows.counts(window)
+        s.current_dominance = dominance = "Odd" if odd > even else "Even"
+        if s.predictor == "Pattern":
+            s.next_prediction = patterns.predict(s.patterns, patterns.CORPUS)[0] or "N/A"
+        else:
+            s.next_prediction = windows.predict(dominance, result, windows.rules[window])
+
+    def reset_betting(self):
+        """Reset betting parameters."""
+        self._changed(('reset_betting',))
+        self.redo_stack.clear()
+        s = self.state
+        s.result_tracker = s.initial_bankroll
+        s.peak_bankroll = s.initial_bankroll
+        s.session_profit = 0.0
+        s.bet_amount = s.base_amount
+        s.max_profit = 0.0
+        s.next_prediction = "N/A"
+        s.current_dominance = "N/A"
+        s.t3_level = 1
+        s.t3_results = []
+        s.flatbet_level = 1
+        s.flatbet_net_loss = 0.0
+        s.game_count = 0
+        self.alert("success", "Betting parameters reset.")
+
+    def reset_all(self):
+        """Reset all session data."""
+        self._changed(('reset_all',))
+        self.state = SessionState(self.window_sizes)
+        self.journal = Journal()
+        self.redo_stack = []
+        self.alert("success", "All session data reset, profit lock reset.")
+
+    def _reset_progression(self, s):
+        """Return bankroll and progression to their starting point after a lock."""
+        s.session_profit = 0.0
+        s.result_tracker = s.initial_bankroll
+        s.peak_bankroll = s.initial_bankroll
+        s.bet_amount = s.base_amount
+        s.t3_level = 1
+        s.t3_results = []
+        s.flatbet_level = 1
+        s.flatbet_net_loss = 0.0
+
+    def lock_win_limit(self):
+        """Lock the session profit now, as reaching the win limit does; return the amount locked."""
+        self._changed(('lock',))
+        return self._lock_win_limit(self.state, None)
+
+    def _lock_win_limit(self, s, result):
+        """Lock the session profit once the win limit is reached; return the amount locked."""
+        if self.keep_history:
+            self.journal.append(self._journal_entry(s, LOCK, result))
+        lock_amount = s.session_profit
+        s.profit_lock += lock_amount
+        self._reset_progression(s)
+        return lock_amount
+
+    def _bet(self, s, outcome, bet_selection):
+        """Stake for this hand under the selected progression; given an outcome, also advance it."""
+        p = PROGRESSIONS[s.betting_strategy]
+        base = s.base_amount
+        level_field = p.level_field
+        level = getattr(s, level_field) if level_field else 1
+        proposed_bet = base * level
+        bet_amount = min(proposed_bet, s.result_tracker)
+        if p.cap_level and bet_amount < proposed_bet:
+            level = max(1, int(bet_amount / base))
+            self.alert("warning", f"{p.name} bet reduced to ${bet_amount:.2f} due to bankroll limit.", key="cap")
+
+        if outcome:
+            state_field = p.state_field
+            if state_field:
+                state, level = p.move(''.join(getattr(s, state_field)), level, outcome)
+                setattr(s, state_field, list(state))
+            elif not p.static:
+                _, level = p.move(START, level, outcome)
+            if p.loss_limit is not None:
+                net_loss = getattr(s, p.net_loss_field)
+                if outcome == 'win':
+                    new_bankroll = s.result_tracker + (bet_amount * 0.95 if bet_selection == "Banker" else bet_amount)
+                    net_loss += bet_amount  # Net loss decreases with a win
+                    at_peak = new_bankroll >= s.peak_bankroll and s.session_profit >= 0
+                    if net_loss >= 0 or at_peak:
+                        level = 1
+                        net_loss = 0.0
+                        if at_peak:
+                            self.alert("success", f"Bankroll reached peak (${new_bankroll:.2f}) with profit. {p.label} reset to 1.", key="peak")
+                else:
+                    net_loss -= bet_amount  # Net loss increases with a loss
+                    if net_loss <= -p.loss_limit * level * base:
+                        level += 1
+                        net_loss = 0.0  # Reset net loss after leveling up
+                setattr(s, p.net_loss_field, net_loss)
+
+        if p.cap_level:
+            # Cap the level to prevent excessive bets
+            level = min(level, max(1, int(s.result_tracker / base)))
+        if level_field:
+            setattr(s, level_field, level)
+        s.bet_amount = min(base * level, s.result_tracker)
+        return bet_amount
+
+    def apply_betting_strategy(self, outcome, bet_selection):
+        """Apply the selected betting strategy and return the amount staked on this hand."""
+        return self._bet(self.state, outcome, bet_selection)
+
+    def _journal_entry(self, s, kind, result):
+        """Capture what this hand can change: scalars, T3 window and bet count."""
+        return (kind, result, _journal_values(s), tuple(s.t3_results), len(s.bet_history))
+
+    def _journal_settings(self, s, event):
+        """Journal a settings change, so undo restores the settings it replaced and redo applies `event` again."""
+        if self.keep_history:
+            self.journal.append((SETTINGS, event, _journal_values(s), tuple(s.t3_results),
+                                 (s.dominance_window, tuple(s.windows.rules.items()), s.predictor, s.base_amount,
+                                  s.profit_lock_threshold)))
+
+    def record(self, result):
+        """Record a game result and update state with Dominant Pairs betting logic."""
+        self._changed(('record', result))
+        if self.redo_stack:
+            self.redo_stack.clear()
+        self._record(result)
+
+    def _record(self, result):
+        s = self.state
+        if s.initial_bankroll > 0:
+            if s.result_tracker <= s.initial_bankroll * s.stop_loss:
+                self.alert("warning", f"Stop-loss reached ({s.stop_loss*100:.0f}% of initial bankroll). Please reset betting to continue.")
+                return
+            if s.session_profit >= s.initial_bankroll * (s.win_limit - 1):
+                lock_amount = self._lock_win_limit(s, result)
+                self.alert("success", f"Win limit reached! Locked ${lock_amount:.2f}. Total locked: ${s.profit_lock:.2f}. Please reset betting.")
+                return
+
+        if self.keep_history:
+            self.journal.append(self._journal_entry(s, HAND, result))
+        s.game_count += 1
+        s.roads.push(result)
+        previous_prediction = s.next_prediction
+
+        if result == 'T':
+            s.ties += 1
+            s.previous_result = result
+            self.alert("info", "Tie recorded.", key="result")
+            return
+
+        s.patterns.push(result)
+        s.stats.push(result)
+
+        if s.previous_result is None or s.previous_result == 'T':
+            s.previous_result = result
+            s.next_prediction = "N/A"
+            self.alert("info", f"Result {result} recorded.", key="result")
+            return
+
+        if s.previous_result == result:
+            s.even_pairs += 1
+            s.windows.push(0)
+        else:
+            s.odd_pairs += 1
+            s.windows.push(1)
+
+        s.pair_count = pair_count = s.pair_count + 1
+        if pair_count >= 2 and s.pair_end != result:
+            s.alternating_pairs += 1
+        s.pair_end = result
+        # Before the bet is settled: a depleted bankroll returns early, and the next pair must still start here.
+        s.previous_result = result
+
+        if pair_count >= 5:
+            self._predict(s, result)
+
+            if s.bet_amount == 0.0:
+                s.bet_amount = min(s.base_amount, s.result_tracker)
+
+            if pair_count >= 6 and previous_prediction != "N/A":
+                if not self._settle(s, result, previous_prediction):
+                    return
+
+        self.alert("info", f"Result {result} recorded. Next bet: {s.next_prediction} (${s.bet_amount:.2f})", key="result")
+
+    def _settle(self, s, result, bet_selection):
+        """Settle the bet placed on this hand; return False if the bankroll is depleted."""
+        bet_amount = self._bet(s, None, bet_selection)
+        if bet_amount <= 0:
+            return True
+        if bet_selection[0] == result:
+            win_amount = bet_amount * 0.95 if bet_selection == "Banker" else bet_amount
+            s.result_tracker += win_amount
+            s.session_profit += win_amount
+            s.wins += 1
+            outcome = 'win'
+            s.stats.bet(s.betting_strategy, True, win_amount, s.result_tracker, s.peak_bankroll)
+            if s.session_profit >= s.profit_lock_threshold:
+                lock_amount = s.session_profit
+                s.profit_lock += lock_amount
+                self._reset_progression(s)
+                self.alert("success", f"Profit locked at ${lock_amount:.2f}. Total locked: ${s.profit_lock:.2f}.", key="profit_lock")
+            elif s.session_profit > s.max_profit:
+                s.max_profit = s.session_profit
+                self.alert("success", f"New max profit: ${s.max_profit:.2f}", key="max_profit")
+        else:
+            bet_amount = min(bet_amount, s.result_tracker)
+            s.result_tracker -= bet_amount
+            s.session_profit -= bet_amount
+            s.losses += 1
+            outcome = 'loss'
+            s.stats.bet(s.betting_strategy, False, -bet_amount, s.result_tracker, s.peak_bankroll)
+            self.alert("error", f"Loss! -${bet_amount:.2f}", key="loss")
+            if s.result_tracker <= 0:
+                self.alert("error", "Bankroll depleted! Please reset betting to continue.")
+                return False
+
+        self._bet(s, outcome, bet_selection)
+
+        # Update peak bankroll after the bet
+        if s.result_tracker > s.peak_bankroll:
+            s.peak_bankroll = s.result_tracker
+
+        strategy_name = s.betting_strategy
+        s.bet_history.append(
+            bet_selection, result, bet_amount, outcome == 'win', s.result_tracker, s.session_profit, strategy_name,
+            s.t3_level if strategy_name == "T3" else None,
+            s.flatbet_level if strategy_name == "Flatbet Level Up" else None)
+        return True
+
+    def _rollback(self):
+        """Revert the newest journal entry; return what redo needs: its result, or the action as logged."""
+        kind, result, values, t3_results, extra = self.journal.pop()
+        s = self.state
+        settled = s.wins + s.losses
+        for name, value in zip(_JOURNAL_FIELDS, values):
+            setattr(s, name, value)
+        if s.wins + s.losses != settled:
+            s.stats.pop_bet()
+        s.t3_results = list(t3_results)
+        if kind == SETTINGS:
+            s.dominance_window, rules, s.predictor, s.base_amount, s.profit_lock_threshold = extra
+            s.windows.set_rules(dict(rules))
+            return result
+        s.bet_history.truncate(extra)
+        if kind == LOCK:
+            # A lock from lock_win_limit() has no hand behind it, so redo locks again directly.
+            return result if result is not None else ('lock',)
+        s.roads.pop()
+        if result != 'T':
+            # previous_result is restored, so it tells us whether this hand also formed a pair.
+            s.patterns.pop()
+            s.stats.pop()
+            if s.previous_result is not None and s.previous_result != 'T':
+                s.windows.pop()
+        return result
+
+    def undo(self):
+        """Undo the last recorded hand or settings change."""
+        if not self.journal:
+            self.alert("error", "No actions to undo.")
+            return False
+        self._changed(('undo',))
+        self.redo_stack.append(self._rollback())
+        self.alert("success", "Last action undone.")
+        return True
+
+    def undo_to(self, position):
+        """Undo until only the first `position` journal entries remain, or as many as fit() has kept."""
+        journal = self.journal
+        position = max(journal.dropped, position)
+        if position >= journal.dropped + len(journal):
+            self.alert("error", f"Nothing to undo after journal entry {position}.")
+            return False
+        undone = journal.dropped + len(journal) - position
+        self._changed(('undo_to', position))
+        while journal.dropped + len(journal) > position:
+            self.redo_stack.append(self._rollback())
+        self.alert("success", f"Undid {undone} actions back to hand {self.state.game_count}.")
+        return True
+
+    def undo_to_hand(self, hand):
+        """Undo every hand after hand `hand`, numbered as game_count counts them.
+
+        Locks and settings changes are journal entries too, so the hand is
+        mapped to the newest journal position that leaves game_count at
+        `hand`; settings changed after that hand and before the next stay.
+        """
+        position = self.journal.dropped + len(self.journal)
+        if self.state.game_count == hand:
+            self.alert("error", f"Nothing to undo after hand {hand}.")
+            return False
+        for entry in reversed(self.journal):
+            position -= 1
+            if entry[2][_GAME_COUNT] == hand:
+                return self.undo_to(position)
+        self.alert("error", f"Hand {hand} is no longer in the undo history.")
+        return False
+
+    def redo(self):
+        """Apply again the most recently undone hand, lock or settings change."""
+        if not self.redo_stack:
+            self.alert("error", "No actions to redo.")
+            return False
+        self._changed(('redo',))
+        item = self.redo_stack.pop()
+        if isinstance(item, tuple):
+            kind, *args = item
+            if kind == 'lock':
+                self._lock_win_limit(self.state, None)
+                self.alert("success", "Redid win-limit lock.")
+            else:
+                method, label = _SETTINGS_ACTIONS[kind]
+                getattr(self, method)(*args)
+                self.alert("success", f"Redid {label} change.")
+        else:
+            self._record(item)
+            self.alert("success", f"Redid result {item}.")
+        return True
+
+    def replay(self, results):
+        """Record every result in an iterable of 'P'/'B'/'T' codes without raising alerts."""
+        record = self.record
+        with self.alerts.suppressed():
+            for result in results:
+                record(result)
+
+    def simulate(self, games=100, rng=random):
+        """Simulate up to `games` hands drawn with the standard P/B/T weights."""
+        stopped = None
+        played = 0
+        with self.alerts.suppressed():
+            for _ in range(games):
+                s = self.state
+                if s.result_tracker <= 0:
+                    stopped = ("error", "Bankroll depleted during simulation!")
+                    break
+                if s.result_tracker <= s.initial_bankroll * s.stop_loss:
+                    stopped = ("warning", "Stop-loss reached during simulation.")
+                    break
+                if s.session_profit >= s.initial_bankroll * (s.win_limit - 1):
+                    lock_amount = self.lock_win_limit()
+                    stopped = ("success", f"Win limit reached during simulation! Locked ${lock_amount:.2f}.")
+                    break
+                self.record(rng.choices(OUTCOMES, WEIGHTS)[0])
+                played += 1
+        if stopped:
+            self.alert(*stopped)
+        self.alert("success", f"Simulated {played} of {games} games. Check stats and history for results.")
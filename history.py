@@ -0,0 +1,371 @@
+"""Columnar, array-backed bet history, the 2-bit packed log of every hand and the compactable undo journal."""
+import pickle
+import zlib
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+BETS = ("Player", "Banker")
+RESULTS = ("P", "B")
+BET_OUTCOMES = ("Loss", "Win")
+HOT_HANDS = 64  # Newest hands a ResultLog keeps decoded for the view
+JOURNAL_BLOCK = 1024  # Undo entries compressed together when a Journal is compacted
+ENTRY_BYTES = 520  # Memory of one uncompacted undo entry, as measured with metrics.deep_size
+COLUMNS = ('Bet', 'Result', 'Amount', 'Outcome', 'Bankroll', 'Profit', 'Strategy', 'T3_Level', 'Flatbet_Level')
+
+_BET_CODES = {name: code for code, name in enumerate(BETS)}
+_RESULT_CODES = {name: code for code, name in enumerate(RESULTS)}
+_DTYPES = (
+    ('bet', np.int8), ('result', np.int8), ('amount', np.float64), ('win', np.int8),
+    ('bankroll', np.float64), ('profit', np.float64), ('strategy', np.int8),
+    ('t3_level', np.int32), ('flatbet_level', np.int32),
+)
+
+
+class BetHistory:
+    """Settled bets stored as preallocated typed columns that double when full.
+
+    Bet, Result, Outcome and Strategy are stored as small integer codes and
+    levels as int32 with 0 meaning "not used by this strategy". New rows are
+    buffered and written into the columns in blocks, so appending a bet costs
+    about as much as appending a tuple. frame() and page() wrap column slices
+    without copying the numeric data.
+    """
+
+    __slots__ = ('strategies', '_strategy_codes', '_columns', '_size', '_pending', '_version', '_cache')
+
+    def __init__(self, strategies, capacity=64):
+        self.strategies = tuple(strategies)
+        self._strategy_codes = {name: code for code, name in enumerate(self.strategies)}
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in _DTYPES}
+        self._size = 0  # Rows written into the columns
+        self._pending = []  # Rows appended since the last flush
+        self._version = 0  # Bumped on truncate so cached frames are never stale
+        self._cache = None
+
+    def __len__(self):
+        return self._size + len(self._pending)
+
+    def __getstate__(self):
+        """Pickle only the written rows; the cached page is rebuilt on demand."""
+        self._flush()
+        columns = {name: column[:self._size].copy() for name, column in self._columns.items()}
+        return self.strategies, columns, self._size
+
+    def __setstate__(self, state):
+        strategies, columns, size = state
+        self.strategies = strategies
+        self._strategy_codes = {name: code for code, name in enumerate(strategies)}
+        self._columns = {name: np.concatenate((column, np.zeros(max(64, size) - size, dtype=column.dtype)))
+                         for name, column in columns.items()}
+        self._size = size
+        self._pending = []
+        self._version = 0
+        self._cache = None
+
+    @property
+    def capacity(self):
+        return len(self._columns['amount'])
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self._columns.values())
+
+    def _flush(self):
+        """Write buffered rows into the columns, doubling them as needed."""
+        pending = self._pending
+        if not pending:
+            return
+        start = self._size
+        stop = start + len(pending)
+        capacity = self.capacity
+        if stop > capacity:
+            while capacity < stop:
+                capacity *= 2
+            for name, column in self._columns.items():
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:start] = column[:start]
+                self._columns[name] = grown
+        for (name, _), values in zip(_DTYPES, zip(*pending)):
+            self._columns[name][start:stop] = values
+        self._size = stop
+        pending.clear()
+
+    def append(self, bet, result, amount, win, bankroll, profit, strategy, t3_level=None, flatbet_level=None):
+        """Add one settled bet."""
+        pending = self._pending
+        pending.append((_BET_CODES[bet], _RESULT_CODES[result], amount, win, bankroll, profit,
+                        self._strategy_codes[strategy], t3_level or 0, flatbet_level or 0))
+        if len(pending) >= 256:
+            self._flush()
+
+    def truncate(self, size):
+        """Drop every bet after the first `size`, as undo does."""
+        size = max(0, size)
+        if size >= len(self):
+            return
+        if size >= self._size:
+            del self._pending[size - self._size:]
+        else:
+            self._pending.clear()
+            self._size = size
+        self._version += 1
+
+    def clear(self):
+        self.truncate(0)
+
+    def column(self, name):
+        """A read-only view of one raw column."""
+        self._flush()
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def net(self, start=0, stop=None):
+        """Net amount of bets [start, stop): the stake lost, or won at even money (Banker pays 0.95)."""
+        self._flush()
+        start, stop, _ = slice(start, stop).indices(self._size)
+        c = self._columns
+        amount = c['amount'][start:stop]
+        won = amount * np.where(c['bet'][start:stop] == _BET_CODES["Banker"], 0.95, 1.0)
+        return np.where(c['win'][start:stop] == 1, won, -amount)
+
+    def row(self, i):
+        """One bet as the dict the tracker has always displayed."""
+        self._flush()
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("bet history index out of range")
+        c = self._columns
+        strategy = self.strategies[c['strategy'][i]]
+        t3_level = int(c['t3_level'][i])
+        flatbet_level = int(c['flatbet_level'][i])
+        return {
+            'Bet': BETS[c['bet'][i]],
+            'Result': RESULTS[c['result'][i]],
+            'Amount': float(c['amount'][i]),
+            'Outcome': BET_OUTCOMES[c['win'][i]],
+            'Bankroll': float(c['bankroll'][i]),
+            'Profit': float(c['profit'][i]),
+            'Strategy': strategy,
+            'T3_Level': t3_level or None,
+            'Flatbet_Level': flatbet_level or None,
+        }
+
+    def __getitem__(self, i):
+        return self.row(i)
+
+    def __iter__(self):
+        return (self.row(i) for i in range(len(self)))
+
+    def frame(self, start=0, stop=None):
+        """DataFrame over bets [start, stop), sharing memory with the columns."""
+        self._flush()
+        start, stop, _ = slice(start, stop).indices(self._size)
+        c = {name: column[start:stop] for name, column in self._columns.items()}
+        return pd.DataFrame({
+            'Bet': pd.Categorical.from_codes(c['bet'], BETS),
+            'Result': pd.Categorical.from_codes(c['result'], RESULTS),
+            'Amount': c['amount'],
+            'Outcome': pd.Categorical.from_codes(c['win'], BET_OUTCOMES),
+            'Bankroll': c['bankroll'],
+            'Profit': c['profit'],
+            'Strategy': pd.Categorical.from_codes(c['strategy'], self.strategies),
+            'T3_Level': pd.arrays.IntegerArray(c['t3_level'], c['t3_level'] == 0),
+            'Flatbet_Level': pd.arrays.IntegerArray(c['flatbet_level'], c['flatbet_level'] == 0),
+        }, index=pd.RangeIndex(start, stop), copy=False)
+
+    def page(self, page=0, page_size=200):
+        """Newest-first page of bets: page 0 holds the latest `page_size` bets.
+
+        The frame is cached until the history changes, so reruns that do not
+        record a bet reuse it.
+        """
+        self._flush()
+        key = (self._size, self._version, page, page_size)
+        if self._cache is not None and self._cache[0] == key:
+            return self._cache[1]
+        stop = max(0, self._size - page * page_size)
+        frame = self.frame(max(0, stop - page_size), stop)
+        self._cache = (key, frame)
+        return frame
+
+    def pages(self, page_size=200):
+        """Number of pages of `page_size` bets."""
+        return max(1, -(-len(self) // page_size))
+
+
+# ResultLog codes, the same as roads': 0 is never stored, so a zero bit pair is unused space.
+_LETTERS = ' PBT'
+_HAND_CODES = {letter: code for code, letter in enumerate(_LETTERS) if code}
+_TIE = _HAND_CODES['T']
+_SHIFTS = np.array([0, 2, 4, 6], dtype=np.uint8)
+
+
+class ResultLog:
+    """Every hand of a session as 2-bit codes, four to a byte, in a bytearray that grows as needed.
+
+    Nothing is ever dropped: a full day of hands costs a quarter byte each.
+    The newest HOT_HANDS hands are also kept decoded, so the view never has
+    to unpack; pairs are derived from the codes when asked for. Pickling
+    stores the packed bytes as they are.
+    """
+
+    __slots__ = ('_data', '_size', '_hot')
+
+    def __init__(self, results=()):
+        self._data = bytearray()
+        self._size = 0
+        self._hot = deque(maxlen=HOT_HANDS)
+        for result in results:
+            self.append(result)
+
+    def __len__(self):
+        return self._size
+
+    def __getstate__(self):
+        return self._size, bytes(self._data)
+
+    def __setstate__(self, state):
+        self._size, data = state
+        self._data = bytearray(data)
+        self._hot = deque((_LETTERS[code] for code in self.codes(max(0, self._size - HOT_HANDS))),
+                          maxlen=HOT_HANDS)
+
+    @property
+    def nbytes(self):
+        return len(self._data)
+
+    def append(self, result):
+        """Add one 'P', 'B' or 'T' hand."""
+        size = self._size
+        if not size & 3:
+            self._data.append(0)
+        self._data[size >> 2] |= _HAND_CODES[result] << ((size & 3) << 1)
+        self._size = size + 1
+        self._hot.append(result)
+
+    def pop(self):
+        """Remove and return the newest hand."""
+        if not self._size:
+            raise IndexError("pop from an empty result log")
+        size = self._size - 1
+        shift = (size & 3) << 1
+        result = _LETTERS[self._data[size >> 2] >> shift & 3]
+        if shift:
+            self._data[size >> 2] &= ~(3 << shift) & 0xFF
+        else:
+            self._data.pop()
+        self._size = size
+        self._hot.pop()
+        if size >= HOT_HANDS:
+            self._hot.appendleft(self[size - HOT_HANDS])
+        return result
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("result log index out of range")
+        return _LETTERS[self._data[i >> 2] >> ((i & 3) << 1) & 3]
+
+    def __iter__(self):
+        return (_LETTERS[code] for code in self.codes())
+
+    def codes(self, start=0, stop=None):
+        """Codes of hands [start, stop) as a uint8 array: 1 Player, 2 Banker, 3 Tie."""
+        start, stop, _ = slice(start, stop).indices(self._size)
+        if start >= stop:
+            return np.zeros(0, dtype=np.uint8)
+        first = start >> 2
+        packed = np.frombuffer(bytes(self._data[first:(stop + 3) >> 2]), dtype=np.uint8)
+        return ((packed[:, None] >> _SHIFTS) & 3).ravel()[start - 4 * first:stop - 4 * first]
+
+    def recent(self, count=HOT_HANDS):
+        """The newest `count` hands, oldest first; up to HOT_HANDS come straight from the decoded window."""
+        if count <= HOT_HANDS:
+            return list(self._hot)[-count:] if count else []
+        return [_LETTERS[code] for code in self.codes(max(0, self._size - count))]
+
+    def pairs(self, count):
+        """The newest `count` pairs as (first, second) results, oldest first.
+
+        A pair is two Player/Banker hands in a row; a tie breaks the chain,
+        so the hand after it starts a new one, as the tracker counts them.
+        """
+        span = 2 * count + 2
+        while True:
+            start = max(0, self._size - span)
+            codes = self.codes(start)
+            ends = np.flatnonzero((codes[1:] != _TIE) & (codes[:-1] != _TIE)) + 1
+            if len(ends) >= count or not start:
+                break
+            span *= 2
+        ends = ends[max(0, len(ends) - count):] if count else ends[:0]
+        return [(_LETTERS[first], _LETTERS[second]) for first, second in zip(codes[ends - 1], codes[ends])]
+
+
+class Journal:
+    """Undo entries, newest last, that can be compacted to a few dozen bytes each.
+
+    Entries are appended and popped as plain tuples. compact() pickles and
+    zlib-compresses the older ones into blocks of JOURNAL_BLOCK entries,
+    about twenty times smaller; pop() unpacks a block again only when undo
+    reaches it. trim() drops the oldest blocks for good, counting their
+    entries in `dropped`, for when even compacted history is too much.
+    """
+
+    __slots__ = ('_hot', '_blocks', '_cold_bytes', 'dropped')
+
+    def __init__(self):
+        self._hot = []  # Newest entries, uncompressed
+        self._blocks = []  # Compressed blocks of older entries, oldest first
+        self._cold_bytes = 0
+        self.dropped = 0  # Oldest entries trimmed away; they can no longer be undone
+
+    def __len__(self):
+        return len(self._hot) + JOURNAL_BLOCK * len(self._blocks)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held: ENTRY_BYTES per uncompacted entry plus the compressed blocks."""
+        return len(self._hot) * ENTRY_BYTES + self._cold_bytes
+
+    def append(self, entry):
+        self._hot.append(entry)
+
+    def __reversed__(self):
+        """Entries newest first, unpacking compressed blocks only as they are reached."""
+        yield from reversed(self._hot)
+        for block in reversed(self._blocks):
+            yield from reversed(pickle.loads(zlib.decompress(block)))
+
+    def pop(self):
+        """Remove and return the newest entry."""
+        hot = self._hot
+        if not hot and self._blocks:
+            block = self._blocks.pop()
+            self._cold_bytes -= len(block)
+            hot.extend(pickle.loads(zlib.decompress(block)))
+        return hot.pop()
+
+    def compact(self, keep=0):
+        """Compress every whole block of entries older than the newest `keep`; return how many were compressed."""
+        hot = self._hot
+        count = (len(hot) - keep) // JOURNAL_BLOCK * JOURNAL_BLOCK
+        for start in range(0, count, JOURNAL_BLOCK):
+            block = zlib.compress(pickle.dumps(hot[start:start + JOURNAL_BLOCK], pickle.HIGHEST_PROTOCOL), 1)
+            self._blocks.append(block)
+            self._cold_bytes += len(block)
+        del hot[:max(0, count)]
+        return max(0, count)
+
+    def trim(self, blocks=1):
+        """Drop up to `blocks` of the oldest compressed blocks; return how many entries were dropped."""
+        dropped = self._blocks[:blocks]
+        del self._blocks[:blocks]
+        self._cold_bytes -= sum(len(block) for block in dropped)
+        self.dropped += len(dropped) * JOURNAL_BLOCK
+        return len(dropped) * JOURNAL_BLOCK
@@ -0,0 +1,186 @@
+"""Load-test service.py with thousands of tables played at once.
+
+Example:
+    python loadtest.py --tables 2000 --hands 50 --connections 100 --watchers 100
+
+Unless --url is given, a service is started on a free port with an
+in-memory store and metrics on, so the report includes the service's own
+handling time next to the client-side latency. Every connection plays its
+share of the tables round-robin, one hand each in turn, so all tables are
+live at the same time; each table then undoes one hand and is read back.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+from tornado.websocket import websocket_connect
+
+from engine import OUTCOMES, WEIGHTS
+
+SERVICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "service.py")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection, one request at a time."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while (line := await self.reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'content-length':
+                length = int(value)
+        return status, await self.reader.readexactly(length)
+
+    def close(self):
+        self.writer.close()
+
+
+async def _play(host, port, tables, hands, seed, latencies, errors):
+    connection = Connection(host, port)
+    await connection.open()
+    rng = random.Random(seed)
+    clock = time.perf_counter
+    try:
+        calls = [('POST', f"/tables/{table}/hands", None) for table in tables] * hands
+        calls += [('POST', f"/tables/{table}/undo", None) for table in tables]
+        calls += [('GET', f"/tables/{table}", None) for table in tables]
+        for method, path, _ in calls:
+            body = {'result': rng.choices(OUTCOMES, WEIGHTS)[0]} if path.endswith('/hands') else None
+            start = clock()
+            status, _ = await connection.request(method, path, body)
+            latencies.append(clock() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        connection.close()
+
+
+async def _watch(url, messages, stop):
+    socket = await websocket_connect(url)
+    while not stop.is_set():
+        message = await socket.read_message()
+        if message is None:
+            break
+        messages.append(message)
+    socket.close()
+
+
+async def _server_time(metrics_url):
+    """Mean and count of the service's own request handling time, from its metrics endpoint."""
+    parts = urlsplit(metrics_url)
+    connection = Connection(parts.hostname, parts.port)
+    await connection.open()
+    try:
+        status, body = await connection.request('GET', parts.path)
+    finally:
+        connection.close()
+    report = {}
+    for histogram in json.loads(body)['histograms']:
+        if histogram['name'] == 'tracker_request_seconds' and histogram['count']:
+            route = histogram['labels'].get('route')
+            report[route] = {'requests': histogram['count'], 'mean_us': histogram['sum'] / histogram['count'] * 1e6}
+    return report
+
+
+async def run(url, tables, hands, connections, watchers, metrics_url=None, seed=0):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port
+    run_id = f"load{seed}"
+    ids = [f"{run_id}-{i}" for i in range(tables)]
+    stop = asyncio.Event()
+    messages = []
+    streams = [asyncio.create_task(_watch(f"ws://{host}:{port}/tables/{table}/stream", messages, stop))
+               for table in ids[:watchers]]
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(_play(host, port, ids[i::connections], hands, seed + i, latencies, errors)
+                           for i in range(min(connections, tables))))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.sleep(0.1)
+    for stream in streams:
+        stream.cancel()
+    samples = np.array(latencies) * 1e6
+    report = {
+        'tables': tables,
+        'hands_per_table': hands,
+        'connections': min(connections, tables),
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': elapsed,
+        'requests_per_s': len(latencies) / elapsed,
+        'latency_mean_us': float(samples.mean()),
+        'latency_p50_us': float(np.percentile(samples, 50)),
+        'latency_p99_us': float(np.percentile(samples, 99)),
+        'stream_watchers': watchers,
+        'stream_messages': len(messages),
+    }
+    if metrics_url:
+        report['service'] = await _server_time(metrics_url)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the table service.")
+    parser.add_argument('--url', help="Running service to test, e.g. http://127.0.0.1:8502 (default: start one)")
+    parser.add_argument('--tables', type=int, default=2000)
+    parser.add_argument('--hands', type=int, default=50, help="Hands recorded per table")
+    parser.add_argument('--connections', type=int, default=100, help="Concurrent client connections")
+    parser.add_argument('--watchers', type=int, default=100, help="Tables followed over the stream")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = None
+    url, metrics_url = args.url, None
+    if url is None:
+        port, metrics_port = _free_port(), _free_port()
+        env = dict(os.environ, TRACKER_METRICS_PORT=str(metrics_port))
+        env.pop("TRACKER_METRICS_FILE", None)
+        server = subprocess.Popen([sys.executable, SERVICE, '--port', str(port), '--db', ':memory:'], env=env,
+                                  stdout=subprocess.DEVNULL)
+        url, metrics_url = f"http://127.0.0.1:{port}", f"http://127.0.0.1:{metrics_port}/metrics.json"
+        for _ in range(100):
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+    try:
+        report = asyncio.run(run(url, args.tables, args.hands, args.connections, args.watchers, metrics_url,
+                                 args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""Session outcome probabilities by dynamic programming over a Markov model of the tracker.
+
+Example:
+    python markov.py --strategy T3 --hands 500 --stop-loss 0.8 --win-limit 1.5
+
+Where montecarlo.py samples sessions, this module computes the whole
+probability distribution. A session is a pair of a betting phase (warm-up,
+after a tie, prediction live) and a money state (bankroll, peak, level,
+loss_limit running total, progression state). Which hands settle a bet
+depends only on the phase, so the two chains are solved apart: the number
+of bets settled in N hands is a small dense chain, and the money states
+are enumerated once from the reachable set with their per-bet moves stored
+as a sparse matrix, so each bet costs one sparse product however many
+sessions it stands for. The chance of at least one profit lock follows
+from the lock rates by renewal, since a lock starts the progression over.
+
+The one modelling choice: a bet is on the Banker with probability
+`banker_share`, independently of the bankroll and of earlier bets. That is
+an assumption about the predictor, not something the chain derives, so the
+results are model probabilities rather than the simulator's. Under i.i.d.
+hands the Dominant Pairs bet is Player or Banker with near-equal odds, and
+the default 0.5 matches the Monte Carlo simulator to within its sampling
+error; `--compare` checks that for a configuration.
+
+Cost grows with the horizon. The money states level off within about a
+hundred hands, and every further bet is one sparse product over all their
+transitions. Flatbet Level Up at the default settings has about 130,000
+states: 200 hands take about half a second, and past roughly 400 hands an
+evaluation takes more than a second. For longer sessions, sample them with
+montecarlo.py instead.
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+import montecarlo
+from engine import WEIGHTS
+from strategies import PROGRESSIONS
+
+MAX_STATES = 2_000_000  # Money states explored before giving up on a configuration
+# Betting phases: (previous hand, pairs seen so far capped at 6, prediction live).
+NONE, TIE, PLAYED = 0, 1, 2
+DECIMALS = 6  # Money values are rounded to this many places in state keys, so float noise merges
+
+
+class SparseMatrix:
+    """A transition matrix in coordinate form, rows sorted: a vector-matrix product is one bincount."""
+
+    __slots__ = ('columns', 'src', 'dst', 'prob', 'indptr')
+
+    def __init__(self, rows, src, dst, prob, columns=None):
+        order = np.argsort(src, kind='stable')
+        self.columns = rows if columns is None else columns
+        self.src = np.asarray(src, dtype=np.int64)[order]
+        self.dst = np.asarray(dst, dtype=np.int64)[order]
+        self.prob = np.asarray(prob, dtype=np.float64)[order]
+        self.indptr = np.searchsorted(self.src, np.arange(rows + 1))
+
+    def left_multiply(self, vector, size=None):
+        """vector @ matrix, where a short vector stands for its leading rows and zeros after them.
+
+        With `size`, only the first `size` columns are returned; none of the
+        vector's rows may lead past them.
+        """
+        stop = self.indptr[len(vector)]
+        return np.bincount(self.dst[:stop], weights=vector[self.src[:stop]] * self.prob[:stop],
+                           minlength=self.columns if size is None else size)
+
+
+class MoneyModel:
+    """Reachable money states of one strategy and configuration, with their per-bet transitions.
+
+    A money state is (bankroll, peak, level, net_loss, progression state),
+    one row of `states`. Bets are settled by BatchSession's own kernel, so
+    the chain follows the simulator's money rules exactly; the session
+    profit is always bankroll minus the initial bankroll, so it needs no
+    column of its own. States are numbered in breadth-first order and
+    reach[k] counts those reachable within k bets, so the distribution after
+    k bets lives in the first reach[k] entries. `locks` holds the bets that
+    lock a profit, and `resets` the states those locks land in.
+    """
+
+    def __init__(self, strategy="Flatbet", base_amount=10.0, initial_bankroll=1000.0, stop_loss=0.8,
+                 win_limit=1.5, profit_lock_threshold=None, weights=WEIGHTS, banker_share=0.5, max_bets=None):
+        if strategy not in PROGRESSIONS:
+            raise ValueError(f"Unknown betting strategy: {strategy}")
+        if not 0 <= banker_share <= 1:
+            raise ValueError("banker_share must be between 0 and 1")
+        self.strategy = strategy
+        self.base = base_amount
+        self.initial = initial_bankroll
+        self.stop_level = initial_bankroll * stop_loss
+        self.win_profit = initial_bankroll * (win_limit - 1)
+        self.threshold = 2 * base_amount if profit_lock_threshold is None else profit_lock_threshold
+        if self.threshold <= 0:
+            raise ValueError("The profit lock threshold must be positive")
+        total = sum(weights)
+        player, banker, tie = (weight / total for weight in weights)
+        # (won, banker bet, probability given that a bet settles) of every way a bet can go.
+        branches = [(True, True, banker_share * banker), (False, True, banker_share * player),
+                    (True, False, (1 - banker_share) * player), (False, False, (1 - banker_share) * banker)]
+        self.branches = [(won, bet, p / (1 - tie)) for won, bet, p in branches if p]
+        self._explore(max_bets)
+
+    def exit_codes(self, bankroll):
+        """Why sessions with these bankrolls stop before their next hand, or EXIT_NONE."""
+        codes = np.full(len(bankroll), montecarlo.EXIT_NONE, dtype=np.int8)
+        codes[bankroll - self.initial >= self.win_profit] = montecarlo.EXIT_WIN_LIMIT
+        codes[bankroll <= self.stop_level] = montecarlo.EXIT_STOP_LOSS
+        codes[bankroll <= 0] = montecarlo.EXIT_DEPLETED
+        return codes
+
+    def settle(self, states, won, banker):
+        """Money states after one settled bet each, and the profit each locked."""
+        batch = montecarlo.BatchSession(len(states), self.strategy, self.base, self.initial,
+                                        profit_lock_threshold=self.threshold)
+        batch.bankroll = states[:, 0].copy()
+        batch.peak = states[:, 1].copy()
+        batch.profit = batch.bankroll - self.initial
+        batch.level = states[:, 2].astype(np.int64)
+        batch.net_loss = states[:, 3].copy()
+        batch.state = states[:, 4].astype(np.int8)
+        bet = np.where(banker, montecarlo.BANKER, montecarlo.PLAYER).astype(np.int8)
+        result = np.where(won, bet, montecarlo.BANKER + montecarlo.PLAYER - bet).astype(np.int8)
+        batch._settle(np.ones(len(states), dtype=bool), result, bet)
+        if batch.progression.loss_limit is None:
+            batch.peak[:] = self.initial  # Only the loss_limit rule reads the peak; dropping it merges states
+        after = np.column_stack((batch.bankroll, batch.peak, batch.level, batch.net_loss, batch.state))
+        return np.round(after, DECIMALS) + 0.0, batch.locked  # + 0.0 turns -0.0 into 0.0 for the keys
+
+    def _explore(self, max_bets):
+        """Enumerate the money states reachable within `max_bets` bets, layer by layer, and the per-bet matrix."""
+        layer = np.array([[self.initial, self.initial, 1, 0.0, 0]])
+        index = {layer[0].tobytes(): 0}
+        layers = [layer]
+        reach = [1]
+        src, dst, prob, reward = [], [], [], []
+        first = 0
+        while len(layer) and (max_bets is None or len(reach) <= max_bets):
+            ids = np.arange(first, first + len(layer))
+            first += len(layer)
+            stopped = self.exit_codes(layer[:, 0]) != montecarlo.EXIT_NONE
+            # A session that has stopped stays where it is.
+            src.append(ids[stopped])
+            dst.append(ids[stopped])
+            prob.append(np.ones(stopped.sum()))
+            reward.append(np.zeros(stopped.sum()))
+
+            live, live_ids = layer[~stopped], ids[~stopped]
+            count = len(self.branches)
+            won, banker, p = (np.tile(column, len(live)) for column in map(np.array, zip(*self.branches)))
+            targets, locked = self.settle(np.repeat(live, count, axis=0), won, banker)
+            # A stopped session never moves again and only its bankroll is read, so the rest is dropped to merge them.
+            targets[self.exit_codes(targets[:, 0]) != montecarlo.EXIT_NONE, 1:] = (self.initial, 1, 0.0, 0)
+            # States are keyed by the bytes of their row; new ones are numbered in order of first appearance.
+            keys = np.ascontiguousarray(targets).view(np.dtype((np.void, targets.itemsize * targets.shape[1])))
+            keys = keys.ravel().tolist()
+            fresh = [key for key in dict.fromkeys(keys) if key not in index]
+            index.update(zip(fresh, range(len(index), len(index) + len(fresh))))
+            if len(index) > MAX_STATES:
+                raise ValueError(f"More than {MAX_STATES} money states; the chain is too large to solve")
+            found = np.fromiter(map(index.__getitem__, keys), dtype=np.int64, count=len(keys))
+            src.append(np.repeat(live_ids, count))
+            dst.append(found)
+            prob.append(p)
+            reward.append(locked)
+            layer = np.frombuffer(b''.join(fresh), dtype=np.float64).reshape(-1, targets.shape[1])
+            layers.append(layer)
+            reach.append(len(index))
+
+        if max_bets is not None:
+            reach += [len(index)] * (max_bets + 1 - len(reach))  # Every state was found in fewer bets
+        states = np.concatenate(layers)
+        n = len(states)
+        src, dst, prob, reward = map(np.concatenate, (src, dst, prob, reward))
+        lock = reward > 0  # Locks are positive: the threshold is
+        self.states = states
+        self.reach = np.array(reach)
+        self.bet = SparseMatrix(n, src, dst, prob)
+        self.resets, landing = np.unique(dst[lock], return_inverse=True)
+        self.locks = SparseMatrix(n, src[lock], landing, prob[lock], columns=len(self.resets))
+        self.lock_reward = np.bincount(src, weights=prob * reward, minlength=n)
+        self.bankroll = states[:, 0]
+        self.exits = self.exit_codes(self.bankroll)
+
+    def depth(self, state):
+        """Fewest bets that reach `state` from the start."""
+        return int(np.searchsorted(self.reach, state, side='right'))
+
+    def walk(self, state, bets):
+        """Yield the distribution after 0, 1, ... `bets` bets from `state`, each cut to the states it can reach."""
+        depth = self.depth(state)
+        vector = np.zeros(self.reach[depth])
+        vector[state] = 1.0
+        yield vector
+        for k in range(depth + 1, depth + bets + 1):
+            vector = self.bet.left_multiply(vector, self.reach[k])
+            yield vector
+
+    def lock_hits(self, vector):
+        """Probability, per reset state, that the next bet from `vector` locks a profit and lands there."""
+        return self.locks.left_multiply(vector)
+
+
+def _phases():
+    """Every betting phase with where a tie and a Player/Banker hand take it, and whether that hand settles a bet."""
+    phases = [(kind, pairs, live) for kind in (NONE, TIE, PLAYED) for pairs in range(7) for live in (False, True)]
+    index = {phase: i for i, phase in enumerate(phases)}
+    moves = []
+    for kind, pairs, live in phases:
+        after_tie = index[TIE, pairs, False]  # The next hand starts over, so a live prediction is moot
+        if kind != PLAYED:
+            moves.append((after_tie, index[PLAYED, pairs, False], False))
+            continue
+        pairs = min(pairs + 1, 6)
+        moves.append((after_tie, index[PLAYED, pairs, pairs >= 5], live and pairs >= 6))
+    return index, moves
+
+
+def bet_counts(hands, weights=WEIGHTS, every=False):
+    """Probability that `hands` hands settle exactly k bets, for k = 0..hands.
+
+    Whether a hand settles a bet depends only on the betting phase, never on
+    the money, so the number of bets is a chain of its own. With every=True,
+    row t of the returned matrix is the same for the first t hands.
+    """
+    index, moves = _phases()
+    tie = weights[2] / sum(weights)
+    stay = np.zeros((len(moves), len(moves)))
+    settle = np.zeros_like(stay)
+    for phase, (after_tie, after_played, settles) in enumerate(moves):
+        stay[after_tie, phase] += tie
+        (settle if settles else stay)[after_played, phase] += 1 - tie
+    dist = np.zeros((len(moves), hands + 1))
+    dist[index[NONE, 0, False], 0] = 1.0
+    rows = [dist.sum(axis=0)]
+    for t in range(1, hands + 1):
+        settled = settle @ dist[:, :t]
+        dist[:, :t + 1] = stay @ dist[:, :t + 1]
+        dist[:, 1:t + 1] += settled
+        if every:
+            rows.append(dist.sum(axis=0))
+    return np.array(rows) if every else dist.sum(axis=0)
+
+
+def evaluate(hands, strategy="Flatbet", base_amount=10.0, initial_bankroll=1000.0, stop_loss=0.8, win_limit=1.5,
+             profit_lock_threshold=None, weights=WEIGHTS, banker_share=0.5, curves=False):
+    """Model probabilities and expectations for a session of up to `hands` hands.
+
+    Returns a dict with the probability of stopping for each exit within
+    `hands` hands, of at least one profit lock, the expected locked profit
+    (win-limit locks included), final bankroll and net result, and the
+    number of money states. With curves=True, per-hand cumulative exit and
+    lock probabilities are included as lists.
+
+    The money chain is pushed forward one bet at a time, and its statistics
+    after k bets are weighted by the probability that `hands` hands settle k
+    bets, which is sound because which hands bet does not depend on the
+    money. Predicted sides follow `banker_share` as in the module docstring.
+    """
+    counts = bet_counts(hands, weights, every=curves)
+    most = int(np.flatnonzero(counts if counts.ndim == 1 else counts[-1])[-1])
+    model = MoneyModel(strategy, base_amount, initial_bankroll, stop_loss, win_limit, profit_lock_threshold,
+                       weights, banker_share, max_bets=most)
+    exits = model.exits
+    win = exits == montecarlo.EXIT_WIN_LIMIT
+    # A win-limit exit locks its profit and returns the bankroll to the initial amount.
+    columns = np.column_stack((
+        exits == montecarlo.EXIT_STOP_LOSS, win, exits == montecarlo.EXIT_DEPLETED,
+        np.where(win, model.bankroll - initial_bankroll, 0.0), np.where(win, initial_bankroll, model.bankroll),
+    ))
+    stats = np.empty((most + 1, columns.shape[1]))
+    rates = np.empty(most + 1)  # Expected profit locked by each bet
+    hits = np.empty((most + 1, len(model.resets)))
+    for k, vector in enumerate(model.walk(0, most)):
+        size = len(vector)
+        stats[k] = vector @ columns[:size]
+        rates[k] = vector @ model.lock_reward[:size]
+        hits[k] = model.lock_hits(vector)
+
+    # The chance of at least one lock needs the first lock, not every lock. After a lock the
+    # session starts over from a reset state, so first[k] follows from hits by renewal:
+    # hits[k] = first[k] + sum over j < k of first[j] times the hits k-1-j bets after that reset.
+    later = np.zeros((most + 1, len(model.resets), len(model.resets)))
+    for r, state in enumerate(model.resets):
+        if state == 0:
+            later[:, r] = hits
+            continue
+        for m, vector in enumerate(model.walk(state, most - model.depth(state))):
+            later[m, r] = model.lock_hits(vector)
+    first = hits.copy()
+    for k in range(1, most + 1):
+        first[k] -= np.einsum('jr,jrs->s', first[:k], later[k - 1::-1])
+    before = np.concatenate(([0.0], np.cumsum(first.sum(axis=1))[:-1]))  # A lock within k bets
+    locked = np.concatenate(([0.0], np.cumsum(rates)[:-1])) + stats[:, 3]  # Win-limit locks count too
+    table = np.column_stack((stats[:, :3], before, stats[:, 4], locked))
+
+    stop, limit, depleted, lock, bankroll, locked = (counts if counts.ndim == 1 else counts[-1])[:most + 1] @ table
+    result = {
+        'states': len(model.states),
+        'stop_loss_probability': float(stop),
+        'win_limit_probability': float(limit),
+        'depleted_probability': float(depleted),
+        'profit_lock_probability': float(lock),
+        'expected_locked_profit': float(locked),
+        'expected_final_bankroll': float(bankroll),
+        'expected_net': float(bankroll + locked - initial_bankroll),
+    }
+    if curves:
+        per_hand = counts[1:, :most + 1] @ table
+        names = montecarlo.EXIT_NAMES[1:] + ("Profit lock",)
+        result['curves'] = {name: per_hand[:, column].tolist() for column, name in enumerate(names)}
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Model session outcome probabilities for a money-management setting.")
+    parser.add_argument('--strategy', choices=tuple(PROGRESSIONS), default="Flatbet")
+    parser.add_argument('--hands', type=int, default=200)
+    parser.add_argument('--base-amount', type=float, default=10.0)
+    parser.add_argument('--initial-bankroll', type=float, default=1000.0)
+    parser.add_argument('--stop-loss', type=float, default=0.8)
+    parser.add_argument('--win-limit', type=float, default=1.5)
+    parser.add_argument('--profit-lock-multiple', type=float, default=2.0,
+                        help="Profit lock threshold as a multiple of the base amount")
+    parser.add_argument('--banker-share', type=float, default=0.5, help="Share of bets placed on the Banker")
+    parser.add_argument('--compare', type=int, default=0, metavar='SESSIONS',
+                        help="Also run this many Monte Carlo sessions and print their estimates")
+    args = parser.parse_args(argv)
+
+    params = dict(base_amount=args.base_amount, initial_bankroll=args.initial_bankroll, stop_loss=args.stop_loss,
+                  win_limit=args.win_limit, profit_lock_threshold=args.profit_lock_multiple * args.base_amount)
+    try:
+        result = evaluate(args.hands, args.strategy, banker_share=args.banker_share, **params)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.compare:
+        # Over the same hands; finish=True counts exits reached on the last hand, as the chain does.
+        sampled = montecarlo.simulate(args.compare, args.hands, args.strategy, seed=0, finish=True, **params)
+        exits = np.bincount(sampled['exit'], minlength=len(montecarlo.EXIT_NAMES)) / args.compare
+        result['monte_carlo'] = {
+            'sessions': args.compare,
+            'stop_loss_rate': exits[montecarlo.EXIT_STOP_LOSS],
+            'win_limit_rate': exits[montecarlo.EXIT_WIN_LIMIT],
+            'depleted_rate': exits[montecarlo.EXIT_DEPLETED],
+            'mean_profit_lock': float(sampled['profit_lock'].mean()),
+        }
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Opt-in latency histograms and counters for the tracker, as Prometheus text or JSON.
+
+Instrumentation is off unless the server starts with either of:
+    TRACKER_METRICS_PORT=9108     serve http://127.0.0.1:9108/metrics (Prometheus
+                                  text) and /metrics.json
+    TRACKER_METRICS_FILE=m.prom   rewrite the file, Prometheus text or JSON by its
+                                  .json extension, whenever a session is sampled
+When it is off, timed() returns functions unwrapped and instrument() patches
+nothing, so the only cost left is the flag check in sample().
+"""
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+import types
+from array import array
+from collections import deque
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = int(os.environ.get("TRACKER_METRICS_PORT") or 0)
+FILE = os.environ.get("TRACKER_METRICS_FILE")
+ENABLED = bool(PORT or FILE)
+
+# Upper bounds of the histogram buckets: latencies in seconds, sizes in bytes.
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(10 ** exponent for exponent in range(3, 10))
+SAMPLE_SECONDS = 30.0  # Least time between two size samples of one browser session
+
+COUNTERS = {
+    'tracker_hands_recorded_total': "Hands recorded.",
+    'tracker_bets_won_total': "Bets won.",
+    'tracker_bets_lost_total': "Bets lost.",
+    'tracker_locks_total': "Profit locks, at the lock threshold or the win limit.",
+    'tracker_stop_losses_total': "Hands rejected because the stop-loss was reached.",
+}
+HISTOGRAMS = {
+    'tracker_record_result_seconds': "Time to record one result.",
+    'tracker_apply_betting_strategy_seconds': "Time to size, or size and advance, one bet.",
+    'tracker_undo_seconds': "Time to undo one hand.",
+    'tracker_render_seconds': "Time to render one section of the page.",
+    'tracker_session_state_bytes': "Sampled size of one browser session's state.",
+    'tracker_request_seconds': "Time to handle one request to service.py.",
+}
+
+
+class Histogram:
+    """Cumulative-on-export bucket counts, sum and count of observations."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Every counter and histogram of the process, shared by all browser sessions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.histograms = {}  # (name, labels) -> Histogram, labels a tuple of (key, value)
+
+    def inc(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def observe(self, name, value, labels=(), buckets=LATENCY_BUCKETS):
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[name, labels] = Histogram(buckets)
+            histogram.observe(value)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': [
+                    {'name': name, 'labels': dict(labels), 'buckets': list(h.buckets), 'counts': list(h.counts),
+                     'sum': h.sum, 'count': h.count}
+                    for (name, labels), h in sorted(self.histograms.items())
+                ],
+            }
+
+    def prometheus(self):
+        """The registry in the Prometheus text exposition format."""
+        data = self.as_dict()
+        lines = []
+        for name, value in data['counters'].items():
+            lines += [f"# HELP {name} {COUNTERS[name]}", f"# TYPE {name} counter", f"{name} {value}"]
+        described = set()
+        for h in data['histograms']:
+            name = h['name']
+            if name not in described:
+                described.add(name)
+                lines += [f"# HELP {name} {HISTOGRAMS[name]}", f"# TYPE {name} histogram"]
+            labels = ''.join(f'{key}="{value}",' for key, value in h['labels'].items())
+            total = 0
+            for bound, count in zip(h['buckets'] + ['+Inf'], h['counts']):
+                total += count
+                lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {total}')
+            labels = '{' + labels.rstrip(',') + '}' if labels else ''
+            lines += [f"{name}_sum{labels} {h['sum']}", f"{name}_count{labels} {h['count']}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def timed(name, **labels):
+    """Decorator: observe each call's duration in histogram `name`; a no-op when metrics are off."""
+    def decorate(func):
+        if not ENABLED:
+            return func
+        key = tuple(labels.items())
+        clock = time.perf_counter
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                REGISTRY.observe(name, clock() - start, key)
+        return wrapper
+    return decorate
+
+
+def instrument(session_class):
+    """Time the betting strategy and count hands, bets, locks and stop-losses on every Session.
+
+    Patches the class once, and only when metrics are on, so sessions of an
+    uninstrumented server run the original methods.
+    """
+    if not ENABLED or getattr(session_class, '_instrumented', False):
+        return
+    session_class._instrumented = True
+    session_class._bet = timed('tracker_apply_betting_strategy_seconds')(session_class._bet)
+    record = session_class._record
+
+    @wraps(record)
+    def _record(self, result):
+        s = self.state
+        games, wins, losses, locked = s.game_count, s.wins, s.losses, s.profit_lock
+        record(self, result)
+        s = self.state
+        if s.game_count != games:
+            REGISTRY.inc('tracker_hands_recorded_total')
+        elif s.profit_lock == locked:
+            REGISTRY.inc('tracker_stop_losses_total')
+        if s.wins != wins:
+            REGISTRY.inc('tracker_bets_won_total', s.wins - wins)
+        if s.losses != losses:
+            REGISTRY.inc('tracker_bets_lost_total', s.losses - losses)
+        if s.profit_lock != locked:
+            REGISTRY.inc('tracker_locks_total')
+    session_class._record = _record
+
+
+def deep_size(obj, seen=None):
+    """Bytes held by `obj` and everything it references, counting shared objects once.
+
+    Functions, classes and modules count only themselves, so a listener
+    closure does not pull in whatever it refers to; objects with their own
+    __sizeof__, such as arrays and DataFrames, are trusted to report it.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, array, int, float, types.FunctionType, types.MethodType,
+                        types.ModuleType, type)):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, deque, set, frozenset)):
+        return size + sum(deep_size(item, seen) for item in obj)
+    if type(obj).__sizeof__ is not object.__sizeof__:
+        return size
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if hasattr(obj, name):
+                size += deep_size(getattr(obj, name), seen)
+    if hasattr(obj, '__dict__'):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def sample(session_state):
+    """Record the size of a browser session's state, at most every SAMPLE_SECONDS, and refresh FILE."""
+    if not ENABLED:
+        return
+    now = time.monotonic()
+    if now - session_state.get('metrics_sampled', -SAMPLE_SECONDS) < SAMPLE_SECONDS:
+        return
+    session_state['metrics_sampled'] = now
+    size = deep_size({key: session_state[key] for key in session_state.keys()})
+    REGISTRY.observe('tracker_session_state_bytes', size, buckets=SIZE_BUCKETS)
+    if FILE:
+        write(FILE)
+
+
+def write(path):
+    """Write the registry to `path` atomically, as JSON if it ends in .json, else Prometheus text."""
+    text = json.dumps(REGISTRY.as_dict()) if path.endswith('.json') else REGISTRY.prometheus()
+    partial = f"{path}.tmp"
+    with open(partial, 'w') as f:
+        f.write(text)
+    os.replace(partial, path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/metrics':
+            body, content_type = REGISTRY.prometheus(), "text/plain; version=0.0.4"
+        elif self.path == '/metrics.json':
+            body, content_type = json.dumps(REGISTRY.as_dict()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes are too frequent to log
+
+
+def serve(port=PORT):
+    """Serve the registry on 127.0.0.1:`port` from a daemon thread; return the server."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,347 @@
+"""Vectorized Monte Carlo simulation of many tracker sessions at once."""
+import numpy as np
+import patterns
+from dominance import RULES, SESSION
+from engine import PREDICTORS, WEIGHTS, PAIR_WINDOW
+from strategies import PROGRESSIONS, Progression
+
+# Outcome codes used by every array-based module: index into engine.OUTCOMES.
+PLAYER, BANKER, TIE = 0, 1, 2
+CODES = {'P': PLAYER, 'B': BANKER, 'T': TIE}
+
+# Why a session stopped playing.
+EXIT_NONE, EXIT_STOP_LOSS, EXIT_WIN_LIMIT, EXIT_DEPLETED = 0, 1, 2, 3
+EXIT_NAMES = ("Played out", "Stop-loss", "Win limit", "Depleted")
+PATTERN_SESSIONS = 4096  # Sessions simulate() runs per batch with the Pattern predictor, each holding a count table
+
+
+def encode(results):
+    """Encode a 'P'/'B'/'T' string or sequence as an int8 outcome array."""
+    return np.array([CODES[r] for r in results], dtype=np.int8)
+
+
+def deal(sessions, hands, weights=WEIGHTS, rng=None):
+    """Draw an i.i.d. (sessions x hands) block of outcome codes."""
+    rng = np.random.default_rng(rng)
+    cumulative = np.cumsum(weights, dtype=np.float64)
+    cumulative /= cumulative[-1]
+    draws = np.searchsorted(cumulative, rng.random((sessions, hands)), side='right')
+    return np.minimum(draws, TIE).astype(np.int8)
+
+
+def _column(value, sessions, dtype=np.float64):
+    """Broadcast a scalar or per-session parameter to a writable column."""
+    return np.array(np.broadcast_to(np.asarray(value, dtype=dtype), (sessions,)))
+
+
+class BatchSession:
+    """Array state for many independent sessions that share one betting strategy.
+
+    Every money-management parameter may be a scalar or a per-session array,
+    so a single batch can cover a whole grid of settings. `window` limits the
+    Odd/Even dominance count to the last N pairs and `rule` picks Follow or
+    Fade, as in DominanceWindows. The strategy runs from its compiled
+    Progression tables, so every strategy shares one kernel; it may be named,
+    or given as a Progression with parameters of its own (strategies.t3).
+
+    With predictor="Pattern" each session keeps a PatternIndex-style count
+    table of its own, combined with patterns.CORPUS as patterns.predict()
+    does; the table costs 4 << DEFAULT_ORDER int32s per session.
+    """
+
+    def __init__(self, sessions, strategy="Flatbet", base_amount=10.0, initial_bankroll=1000.0,
+                 stop_loss=0.8, win_limit=1.5, profit_lock_threshold=None, window=SESSION, rule="Follow",
+                 predictor=PREDICTORS[0]):
+        if isinstance(strategy, Progression):
+            progression, strategy = strategy, strategy.name
+        elif strategy in PROGRESSIONS:
+            progression = PROGRESSIONS[strategy]
+        else:
+            raise ValueError(f"Unknown betting strategy: {strategy}")
+        if rule not in RULES:
+            raise ValueError(f"Unknown prediction rule: {rule}")
+        if predictor not in PREDICTORS:
+            raise ValueError(f"Unknown predictor: {predictor}")
+        if window is not SESSION and window < 1:
+            raise ValueError("Window sizes must be positive")
+        n = sessions
+        self.strategy = strategy
+        self.progression = progression
+        self.base = _column(base_amount, n)
+        self.initial = _column(initial_bankroll, n)
+        self.stop_level = self.initial * _column(stop_loss, n)
+        self.win_profit = self.initial * (_column(win_limit, n) - 1)
+        if profit_lock_threshold is None:
+            self.threshold = 2 * self.base
+        else:
+            self.threshold = _column(profit_lock_threshold, n)
+
+        self.bankroll = self.initial.copy()
+        self.peak = self.initial.copy()
+        self.profit = np.zeros(n)
+        self.locked = np.zeros(n)
+        self.max_drawdown = np.zeros(n)
+        self.hands = np.zeros(n, dtype=np.int64)
+        self.exit = np.zeros(n, dtype=np.int8)
+        self.active = np.ones(n, dtype=bool)
+
+        self.previous = np.full(n, -1, dtype=np.int8)
+        self.prediction = np.full(n, -1, dtype=np.int8)
+        self.pairs = np.zeros(n, dtype=np.int16)
+        self.odd = np.zeros(n, dtype=np.int64)
+        self.even = np.zeros(n, dtype=np.int64)
+        self.window = window
+        self.fade = rule == "Fade"
+        if window is not SESSION:
+            # Ring of the last `window` pair types per session, 1 for Odd.
+            self.ring = np.zeros((n, window), dtype=np.int8)
+            self.window_odd = np.zeros(n, dtype=np.int64)
+            self.total_pairs = np.zeros(n, dtype=np.int64)
+        self.pattern = predictor == "Pattern"
+        if self.pattern:
+            corpus = patterns.CORPUS
+            self.order = patterns.DEFAULT_ORDER
+            self.corpus_order = corpus.order if corpus is not None else 0
+            self.corpus = np.frombuffer(corpus.counts, dtype=np.uint32).astype(np.int64) if corpus is not None else None
+            # Row 2 * key + outcome, keyed as in PatternIndex; `recent` holds the last P/B results, newest on top.
+            self.pattern_counts = np.zeros((n, 4 << self.order), dtype=np.int32)
+            self.recent = np.zeros(n, dtype=np.int64)
+            self.seen = np.zeros(n, dtype=np.int64)
+
+        # Progression state: the stake multiplier, the loss_limit running total and the table state.
+        self.level = np.ones(n, dtype=np.int64)
+        self.net_loss = np.zeros(n)
+        self.state = np.zeros(n, dtype=np.int8)
+
+    def _reset_progression(self, mask):
+        self.profit[mask] = 0.0
+        self.bankroll[mask] = self.initial[mask]
+        self.peak[mask] = self.initial[mask]
+        self.level[mask] = 1
+        self.net_loss[mask] = 0.0
+        self.state[mask] = 0
+
+    def _cap_level(self, mask, stake, proposed):
+        reduced = mask & (stake < proposed)
+        if reduced.any():
+            floor_level = np.floor(stake / self.base).astype(np.int64)
+            self.level = np.where(reduced, np.maximum(1, floor_level), self.level)
+
+    def _stake(self, mask):
+        """Amount staked this hand (the strategy's call with no outcome yet)."""
+        proposed = self.base * self.level
+        stake = np.minimum(proposed, self.bankroll)
+        if self.progression.cap_level:
+            self._cap_level(mask, stake, proposed)
+            self._cap_level_bankroll(mask)
+        return stake
+
+    def _cap_level_bankroll(self, mask):
+        cap = np.maximum(1, np.floor(self.bankroll / self.base).astype(np.int64))
+        self.level = np.where(mask, np.minimum(self.level, cap), self.level)
+
+    def _progress(self, mask, win, banker):
+        """Advance the progression after a settled bet, as Session._bet does given an outcome."""
+        p = self.progression
+        proposed = self.base * self.level
+        stake = np.minimum(proposed, self.bankroll)
+        won = mask & win
+        if p.cap_level:
+            self._cap_level(mask, stake, proposed)
+        if not p.static:
+            state, column = self.state, won.astype(np.intp)
+            level = np.maximum(1, self.level + p.step[state, column])
+            level[p.reset[state, column]] = 1
+            self.level = np.where(mask, level, self.level)
+            self.state = np.where(mask, p.next_state[state, column], state)
+        if p.loss_limit is not None:
+            lost = mask & ~win
+            new_bankroll = self.bankroll + np.where(banker, stake * 0.95, stake)
+            self.net_loss = np.where(won, self.net_loss + stake, self.net_loss)
+            at_peak = (new_bankroll >= self.peak) & (self.profit >= 0)
+            back = won & ((self.net_loss >= 0) | at_peak)
+            self.net_loss = np.where(lost, self.net_loss - stake, self.net_loss)
+            up = lost & (self.net_loss <= -p.loss_limit * self.level * self.base)
+            self.level = np.where(back, 1, np.where(up, self.level + 1, self.level))
+            self.net_loss[back | up] = 0.0
+        if p.cap_level:
+            self._cap_level_bankroll(mask)
+
+    def _settle(self, mask, result, bet):
+        """Settle bets for the masked sessions; return the sessions depleted by a loss."""
+        stake = self._stake(mask)
+        placed = mask & (stake > 0)
+        banker = bet == BANKER
+        win = placed & (bet == result)
+        lost = placed & ~win
+
+        payout = np.where(banker, stake * 0.95, stake)
+        self.bankroll = np.where(win, self.bankroll + payout, self.bankroll)
+        self.profit = np.where(win, self.profit + payout, self.profit)
+        lock = win & (self.profit >= self.threshold)
+        if lock.any():
+            self.locked = np.where(lock, self.locked + self.profit, self.locked)
+            self._reset_progression(lock)
+
+        self.bankroll = np.where(lost, self.bankroll - stake, self.bankroll)
+        self.profit = np.where(lost, self.profit - stake, self.profit)
+        depleted = lost & (self.bankroll <= 0)
+        settled = placed & ~depleted
+
+        self._progress(settled, win, banker)
+        self.peak = np.where(settled, np.maximum(self.peak, self.bankroll), self.peak)
+        self.max_drawdown = np.where(placed, np.maximum(self.max_drawdown, self.peak - self.bankroll),
+                                     self.max_drawdown)
+        return depleted
+
+    def _check_exits(self):
+        """Apply the per-hand exit checks of Session.simulate to active sessions."""
+        active = self.active
+        depleted = active & (self.bankroll <= 0)
+        stopped = active & ~depleted & (self.bankroll <= self.stop_level)
+        won = active & ~depleted & ~stopped & (self.profit >= self.win_profit)
+        if won.any():
+            self.locked = np.where(won, self.locked + self.profit, self.locked)
+            self._reset_progression(won)
+        self.exit[depleted] = EXIT_DEPLETED
+        self.exit[stopped] = EXIT_STOP_LOSS
+        self.exit[won] = EXIT_WIN_LIMIT
+        self.active = active & ~(depleted | stopped | won)
+
+    def _slide(self, paired, even):
+        """Push this hand's pair types into the window rings; return where Odd dominates."""
+        rows = np.flatnonzero(paired)
+        slot = self.total_pairs[rows] % self.window
+        odd = (~even[rows]).astype(np.int8)
+        self.window_odd[rows] += odd - self.ring[rows, slot]
+        self.ring[rows, slot] = odd
+        self.total_pairs[rows] += 1
+        return 2 * self.window_odd > np.minimum(self.total_pairs, self.window)
+
+    def _pattern_key(self, rows, length):
+        """PatternIndex row key of the last `length` P/B results of these sessions."""
+        bits = max(self.order, self.corpus_order)
+        return (1 << length) | (self.recent[rows] >> (bits - length))
+
+    def _push_patterns(self, counted, result):
+        """Count this hand's result after every pattern it follows, then make it the newest result."""
+        for length in range(1, self.order + 1):
+            rows = np.flatnonzero(counted & (self.seen >= length))
+            self.pattern_counts[rows, 2 * self._pattern_key(rows, length) + result[rows]] += 1
+        bits = max(self.order, self.corpus_order)
+        self.recent = np.where(counted, result.astype(np.int64) << (bits - 1) | self.recent >> 1, self.recent)
+        self.seen += counted
+
+    def _predict_patterns(self, predicting):
+        """patterns.predict() for every predicting session: -1 where no pattern has been seen often enough."""
+        prediction = np.full(len(predicting), -1, dtype=np.int8)
+        undecided = predicting.copy()
+        for length in range(max(self.order, self.corpus_order), 0, -1):
+            rows = np.flatnonzero(undecided & (self.seen >= length))
+            key = 2 * self._pattern_key(rows, length)
+            player = np.zeros(len(rows), dtype=np.int64)
+            banker = np.zeros(len(rows), dtype=np.int64)
+            if length <= self.order:
+                player += self.pattern_counts[rows, key]
+                banker += self.pattern_counts[rows, key + 1]
+            if length <= self.corpus_order:
+                player += self.corpus[key]
+                banker += self.corpus[key + 1]
+            decided = player + banker >= patterns.MIN_COUNT
+            rows = rows[decided]
+            prediction[rows] = np.where(player[decided] > banker[decided], PLAYER, BANKER)
+            undecided[rows] = False
+        return prediction
+
+    def step(self, result):
+        """Record one hand (an int8 outcome per session); return False once every session has exited."""
+        self._check_exits()
+        active = self.active
+        if not active.any():
+            return False
+        self.hands += active
+        previous_prediction = self.prediction
+
+        counted = active & (result != TIE)
+        first = counted & ((self.previous < 0) | (self.previous == TIE))
+        paired = counted & ~first
+        even = paired & (self.previous == result)
+        self.even += even
+        self.odd += paired & ~even
+        self.pairs = np.where(paired, np.minimum(self.pairs + 1, PAIR_WINDOW), self.pairs)
+
+        if self.window is SESSION:
+            odd_dominant = self.odd > self.even
+        else:
+            odd_dominant = self._slide(paired, even)
+        predicting = paired & (self.pairs >= 5)
+        if self.pattern:
+            self._push_patterns(counted, result)
+            dominant = self._predict_patterns(predicting)
+        else:
+            dominant = np.where(odd_dominant != self.fade, 1 - result, result).astype(np.int8)
+        self.prediction = np.where(predicting, dominant, np.where(first, -1, previous_prediction))
+
+        betting = predicting & (self.pairs >= 6) & (previous_prediction >= 0)
+        if betting.any():
+            active = active & ~self._settle(betting, result, previous_prediction)
+        self.previous = np.where(active, result, self.previous)
+        return True
+
+    def run(self, outcomes):
+        """Feed a (sessions x hands) block of outcome codes; return False once every session has exited."""
+        for column in np.asarray(outcomes, dtype=np.int8).T:
+            if not self.step(column):
+                return False
+        return True
+
+    def result(self):
+        """Per-session summary arrays, ready for pd.DataFrame."""
+        return {
+            'final_bankroll': self.bankroll.copy(),
+            'profit_lock': self.locked.copy(),
+            'session_profit': self.profit.copy(),
+            'max_drawdown': self.max_drawdown.copy(),
+            'hands_played': self.hands.copy(),
+            'exit': self.exit.copy(),
+        }
+
+
+def run_sessions(outcomes, strategy="Flatbet", **params):
+    """Play a prepared (sessions x hands) outcome block through a fresh batch."""
+    outcomes = np.asarray(outcomes, dtype=np.int8)
+    batch = BatchSession(outcomes.shape[0], strategy, **params)
+    batch.run(outcomes)
+    return batch.result()
+
+
+def simulate(sessions, hands, strategy="Flatbet", weights=WEIGHTS, seed=None, chunk=256, shoe=False, finish=False,
+             **params):
+    """Simulate `sessions` independent sessions of up to `hands` hands each.
+
+    Outcomes are drawn `chunk` hands at a time so memory stays bounded by
+    sessions x chunk bytes, and the loop stops as soon as every session exits.
+    With shoe=True they are dealt from consecutive card-accurate shoes
+    (cards.ShoeStream) instead, and `weights` is unused. The Pattern
+    predictor runs PATTERN_SESSIONS sessions at a time, so its per-session
+    count tables stay bounded too. An exit reached on the last hand is
+    normally only noticed at the start of the next one; finish=True applies
+    those exit checks once more, locking a win limit hit on the last hand.
+    """
+    rng = np.random.default_rng(seed)
+    if params.get('predictor') == "Pattern" and sessions > PATTERN_SESSIONS:
+        parts = [simulate(min(PATTERN_SESSIONS, sessions - start), hands, strategy, weights, rng, chunk, shoe, finish,
+                          **params)
+                 for start in range(0, sessions, PATTERN_SESSIONS)]
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    batch = BatchSession(sessions, strategy, **params)
+    if shoe:
+        from cards import ShoeStream  # cards imports this module's outcome codes
+        stream = ShoeStream(sessions, rng=rng)
+    for start in range(0, hands, chunk):
+        size = min(chunk, hands - start)
+        if not batch.run(stream.deal(size) if shoe else deal(sessions, size, weights, rng)):
+            break
+    if finish:
+        batch._check_exits()
+    return batch.result()
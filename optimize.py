@@ -0,0 +1,186 @@
+"""Successive-halving search over the money-management tunables, reported as a Pareto front.
+
+Example:
+    python optimize.py front.csv --configs 81 --min-sessions 300 --max-sessions 8100 --shoe
+
+Each configuration draws a strategy and the tunables it uses from SPACE:
+T3's evaluation window, Flatbet Level Up's loss limit, the profit lock as a
+multiple of the base amount, the stop-loss and the win limit. Every
+configuration is first simulated on a small number of sessions; each rung
+then ranks them by Pareto rank on expected net profit against risk of ruin
+(the share of sessions ending at the stop-loss or with the bankroll gone),
+keeps the best 1/eta, never cutting one on the first front, and simulates
+the survivors on eta times as many sessions.
+
+A rung's simulations are split into shards of at most SHARD_SESSIONS
+sessions and spread across a process pool. Shard k of every configuration
+plays the same hands, so configurations are compared on common random
+numbers rather than on different luck. Every evaluation is written to the
+CSV; the front of the last rung is printed.
+"""
+import argparse
+import csv
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import montecarlo
+from engine import STRATEGIES
+from strategies import LEVEL_UP_LOSSES, PROGRESSIONS, T3_WINDOW, flatbet_level_up, t3
+
+# Ranges the search draws from: (low, high), inclusive for the integer window.
+SPACE = {
+    't3_window': (2, 6),
+    'loss_limit': (2.0, 10.0),
+    'profit_lock_multiple': (1.0, 10.0),
+    'stop_loss': (0.5, 0.95),
+    'win_limit': (1.1, 3.0),
+}
+PARAMETERS = ('strategy',) + tuple(SPACE)
+FIELDS = ('rung', 'sessions', 'config_id') + PARAMETERS + ('mean_net', 'std_net', 'ruin_rate', 'win_limit_rate',
+                                                          'pareto_rank')
+SHARD_SESSIONS = 2000  # Most sessions one worker task simulates
+
+
+def sample(count, strategies=STRATEGIES, rng=None):
+    """`count` random configurations; a tunable the strategy does not use keeps the tracker's value."""
+    rng = np.random.default_rng(rng)
+    configs = []
+    for _ in range(count):
+        strategy = str(rng.choice(strategies))
+        config = {'strategy': strategy, 't3_window': T3_WINDOW, 'loss_limit': LEVEL_UP_LOSSES}
+        for name, (low, high) in SPACE.items():
+            if name == 't3_window':
+                if strategy == "T3":
+                    config[name] = int(rng.integers(low, high + 1))
+            elif name == 'loss_limit':
+                if strategy == "Flatbet Level Up":
+                    config[name] = round(float(rng.uniform(low, high)), 2)
+            else:
+                config[name] = round(float(rng.uniform(low, high)), 2)
+        configs.append(config)
+    return configs
+
+
+def tunables(config):
+    """Names of the parameters a configuration's strategy actually uses."""
+    unused = {"T3": ('loss_limit',), "Flatbet Level Up": ('t3_window',)}.get(config['strategy'],
+                                                                           ('t3_window', 'loss_limit'))
+    return [name for name in PARAMETERS if name not in unused]
+
+
+def progression(config):
+    """The Progression a configuration bets with."""
+    if config['strategy'] == "T3":
+        return t3(config['t3_window'])
+    if config['strategy'] == "Flatbet Level Up":
+        return flatbet_level_up(config['loss_limit'])
+    return PROGRESSIONS[config['strategy']]
+
+
+def run_shard(config, sessions, hands, seed, base_amount, initial_bankroll, shoe):
+    """Simulate one shard of a configuration; return (sessions, net sum, net sum of squares, ruined, won)."""
+    result = montecarlo.simulate(
+        sessions, hands, progression(config), seed=np.random.default_rng(seed), shoe=shoe,
+        base_amount=base_amount, initial_bankroll=initial_bankroll, stop_loss=config['stop_loss'],
+        win_limit=config['win_limit'], profit_lock_threshold=config['profit_lock_multiple'] * base_amount)
+    net = result['final_bankroll'] + result['profit_lock'] - initial_bankroll
+    exits = np.bincount(result['exit'], minlength=len(montecarlo.EXIT_NAMES))
+    ruined = exits[montecarlo.EXIT_STOP_LOSS] + exits[montecarlo.EXIT_DEPLETED]
+    return sessions, net.sum(), np.square(net).sum(), int(ruined), int(exits[montecarlo.EXIT_WIN_LIMIT])
+
+
+def pareto_ranks(profit, ruin):
+    """Rank 0 for configurations no other beats on both profit (higher) and ruin (lower), 1 for the next front..."""
+    profit, ruin = np.asarray(profit), np.asarray(ruin)
+    # dominates[i, j]: i is at least as good as j on both and better on one.
+    dominates = ((profit[:, None] >= profit) & (ruin[:, None] <= ruin)
+                 & ((profit[:, None] > profit) | (ruin[:, None] < ruin)))
+    ranks = np.full(len(profit), -1)
+    left = np.ones(len(profit), dtype=bool)
+    rank = 0
+    while left.any():
+        front = left & ~(dominates[left].any(axis=0))
+        ranks[front] = rank
+        left &= ~front
+        rank += 1
+    return ranks
+
+
+def optimize(configs, min_sessions=300, max_sessions=8100, eta=3, hands=200, seed=0, workers=None, shoe=False,
+             base_amount=10.0, initial_bankroll=1000.0, writer=None):
+    """Successively halve `configs`; return the rows of the last rung's Pareto front, best profit first."""
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    alive = list(range(len(configs)))
+    sessions = min_sessions
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rung in itertools.count():
+            shards = [min(SHARD_SESSIONS, sessions - start) for start in range(0, sessions, SHARD_SESSIONS)]
+            seeds = [np.random.SeedSequence(seed, spawn_key=(rung, k)) for k in range(len(shards))]
+            futures = {config_id: [pool.submit(run_shard, configs[config_id], size, hands, shard_seed, base_amount,
+                                               initial_bankroll, shoe)
+                                   for size, shard_seed in zip(shards, seeds)]
+                       for config_id in alive}
+            rows = []
+            for config_id in alive:
+                n, total, squares, ruined, won = np.sum([future.result() for future in futures[config_id]], axis=0)
+                mean = total / n
+                rows.append({'rung': rung, 'sessions': int(n), 'config_id': config_id, **configs[config_id],
+                             'mean_net': mean, 'std_net': np.sqrt(max(0.0, squares / n - mean ** 2)),
+                             'ruin_rate': ruined / n, 'win_limit_rate': won / n})
+            ranks = pareto_ranks([row['mean_net'] for row in rows], [row['ruin_rate'] for row in rows])
+            for row, rank in zip(rows, ranks):
+                row['pareto_rank'] = int(rank)
+            if writer is not None:
+                writer.writerows(rows)
+            print(f"Rung {rung}: {len(alive)} configurations x {sessions} sessions, front of {(ranks == 0).sum()}",
+                  flush=True)
+            if sessions >= max_sessions or len(alive) == 1:
+                break
+            order = np.lexsort((-np.array([row['mean_net'] for row in rows]), ranks))
+            keep = max(-(-len(alive) // eta), int((ranks == 0).sum()))
+            alive = [alive[i] for i in order[:keep]]
+            sessions = min(sessions * eta, max_sessions)
+    front = [row for row in rows if row['pareto_rank'] == 0]
+    return sorted(front, key=lambda row: -row['mean_net'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search money-management tunables for the profit / risk of ruin front.")
+    parser.add_argument('output', help="CSV file every evaluation is written to")
+    parser.add_argument('--strategy', nargs='+', default=['all'], help="Strategies to search, or 'all'")
+    parser.add_argument('--configs', type=int, default=81, help="Random configurations in the first rung")
+    parser.add_argument('--eta', type=int, default=3, help="Survivors are 1/eta of a rung, on eta times the sessions")
+    parser.add_argument('--min-sessions', type=int, default=300, help="Sessions per configuration in the first rung")
+    parser.add_argument('--max-sessions', type=int, default=8100, help="Sessions per configuration in the last rung")
+    parser.add_argument('--hands', type=int, default=200, help="Hands per session")
+    parser.add_argument('--shoe', action='store_true', help="Deal hands from 8-deck shoes (cards.py)")
+    parser.add_argument('--base-amount', type=float, default=10.0)
+    parser.add_argument('--initial-bankroll', type=float, default=1000.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    strategies = list(STRATEGIES) if args.strategy == ['all'] else args.strategy
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            parser.error(f"unknown strategy {strategy!r}; choose from {', '.join(STRATEGIES)} or 'all'")
+    configs = sample(args.configs, strategies, np.random.default_rng(args.seed))
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        try:
+            front = optimize(configs, args.min_sessions, args.max_sessions, args.eta, args.hands, args.seed,
+                             args.workers, args.shoe, args.base_amount, args.initial_bankroll, writer)
+        except ValueError as exc:
+            parser.error(str(exc))
+    print("\nPareto front (mean net profit vs. risk of ruin):")
+    for row in front:
+        used = ", ".join(f"{name}={row[name]}" for name in tunables(row))
+        print(f"  ${row['mean_net']:9.2f}  ruin {row['ruin_rate']:6.1%}  {used}")
+
+
+if __name__ == "__main__":
+    main()
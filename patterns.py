@@ -0,0 +1,171 @@
+"""Pattern predictor: what followed the latest P/B pattern, in this session and in a corpus of shoes.
+
+Build a corpus index once and point the app at it with TRACKER_CORPUS:
+    python patterns.py shoes.txt.gz corpus.npz --order 12
+"""
+import argparse
+from array import array
+from itertools import islice
+
+import numpy as np
+
+DEFAULT_ORDER = 8  # Longest pattern the session index counts
+MIN_COUNT = 3  # Times a pattern must have been seen before it drives a prediction
+PLAYER, BANKER = 0, 1  # Ties are not part of any pattern
+CODES = {'P': PLAYER, 'B': BANKER}
+PREDICTIONS = ("Player", "Banker")
+
+CORPUS = None  # Process-wide corpus index shared by every session, see use_corpus()
+
+
+class PatternIndex:
+    """Counts of the next P/B result after every pattern of up to `order` results.
+
+    With two outcomes a pattern of length L is L bits, and a leading 1 bit
+    gives every pattern of every length its own row in one table of
+    2^(order + 1) rows, so an order-12 index is 64 KB however many hands it
+    has seen. Counting a result touches one row per pattern length, O(order);
+    push() only queues the result and the counts catch up when predict()
+    next reads them, so sessions that never use patterns pay a byte append.
+    """
+
+    __slots__ = ('order', 'counts', 'history', 'counted', 'hands')
+
+    def __init__(self, order=DEFAULT_ORDER, counts=None):
+        if not 1 <= order <= 24:
+            raise ValueError("Pattern order must be between 1 and 24")
+        self.order = order
+        self.counts = array('I')  # Row `key` holds [P, B] at 2 * key and 2 * key + 1
+        self.counts.frombytes(bytes(4 * (4 << order)) if counts is None else counts)
+        self.history = bytearray()  # Session results for push/pop; a corpus index keeps none
+        self.counted = 0  # Results of history already in the counts
+        self.hands = 0  # Results seen
+
+    def _count(self, n, delta):
+        """Add `delta` to the rows that history[n] follows."""
+        history = self.history
+        counts = self.counts
+        outcome = history[n]
+        key = 1
+        for length in range(1, min(self.order, n) + 1):
+            key = key << 1 | history[n - length]
+            counts[2 * key + outcome] += delta
+
+    @property
+    def nbytes(self):
+        return len(self.counts) * self.counts.itemsize + len(self.history)
+
+    def push(self, result):
+        """Add a 'P' or 'B' result."""
+        self.history.append(CODES[result])
+        self.hands += 1
+
+    def pop(self):
+        """Remove the newest result, as undo does."""
+        history = self.history
+        if self.counted == len(history):
+            self.counted -= 1
+            self._count(self.counted, -1)
+        history.pop()
+        self.hands -= 1
+
+    def sync(self):
+        """Count every queued result."""
+        for n in range(self.counted, len(self.history)):
+            self._count(n, 1)
+        self.counted = len(self.history)
+
+    @classmethod
+    def from_shoes(cls, shoes, order=DEFAULT_ORDER, chunk=100_000):
+        """Index an iterable of 'PBT...' shoe strings; patterns never span two shoes.
+
+        Shoes are counted `chunk` at a time with array operations, so a corpus
+        of millions of hands builds in seconds in bounded memory.
+        """
+        index = cls(order)
+        table = np.zeros(4 << order, dtype=np.uint64)
+        shoes = iter(shoes)
+        while batch := list(islice(shoes, chunk)):
+            played = [shoe.replace('T', '') for shoe in batch]
+            joined = ''.join(played)
+            if not joined:
+                continue
+            outcomes = (np.frombuffer(joined.encode('ascii'), dtype=np.uint8) == ord('B')).astype(np.int64)
+            lengths = np.array([len(shoe) for shoe in played])
+            # Position of every result within its shoe.
+            offset = np.arange(len(outcomes)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            keys = np.ones(len(outcomes), dtype=np.int64)
+            for length in range(1, order + 1):
+                keys[length:] = keys[length:] << 1 | outcomes[:-length]
+                valid = offset >= length
+                table += np.bincount(2 * keys[valid] + outcomes[valid], minlength=len(table)).astype(np.uint64)
+            index.hands += len(outcomes)
+        index.counts = array('I')
+        index.counts.frombytes(np.minimum(table, 0xFFFFFFFF).astype(np.uint32).tobytes())
+        return index
+
+    def save(self, path):
+        """Write the counts to an .npz file."""
+        np.savez(path, counts=np.frombuffer(self.counts, dtype=np.uint32), hands=self.hands)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            counts = data['counts']
+            index = cls(len(counts).bit_length() - 3, counts.astype(np.uint32).tobytes())
+            index.hands = int(data['hands'])
+        return index
+
+
+def use_corpus(index):
+    """Make `index` the corpus every session's pattern predictions draw on (None to stop)."""
+    global CORPUS
+    CORPUS = index
+
+
+def predict(session_index, corpus=None, min_count=MIN_COUNT):
+    """Predict from the longest pattern seen at least `min_count` times, session and corpus combined.
+
+    Returns (prediction, player count, banker count, pattern length), with a
+    prediction of None when no pattern has been seen often enough. Equal
+    counts favour the Banker, which pays the better odds.
+    """
+    session_index.sync()
+    history = session_index.history
+    n = len(history)
+    session_order = session_index.order
+    corpus_order = corpus.order if corpus is not None else 0
+    keys = []
+    key = 1
+    for length in range(1, min(max(session_order, corpus_order), n) + 1):
+        key = key << 1 | history[n - length]
+        keys.append(key)
+    for length in range(len(keys), 0, -1):
+        row = 2 * keys[length - 1]
+        player = banker = 0
+        if length <= session_order:
+            player, banker = session_index.counts[row], session_index.counts[row + 1]
+        if length <= corpus_order:
+            player += corpus.counts[row]
+            banker += corpus.counts[row + 1]
+        if player + banker >= min_count:
+            return PREDICTIONS[PLAYER if player > banker else BANKER], player, banker, length
+    return None, 0, 0, 0
+
+
+def main(argv=None):
+    from shoes import open_shoes, parse_shoes
+
+    parser = argparse.ArgumentParser(description="Index a shoe file for the pattern predictor.")
+    parser.add_argument('input', help="Shoe file (text or CSV, optionally gzipped), or - for stdin")
+    parser.add_argument('output', help="Where to save the index (.npz)")
+    parser.add_argument('--order', type=int, default=12, help="Longest pattern to count")
+    args = parser.parse_args(argv)
+    with open_shoes(args.input) as lines:
+        index = PatternIndex.from_shoes((shoe for _, shoe in parse_shoes(lines)), args.order)
+    index.save(args.output)
+    print(f"Indexed {index.hands} hands with patterns up to {index.order} results into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
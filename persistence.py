@@ -0,0 +1,348 @@
+"""Crash-safe session storage: an append-only SQLite event log plus periodic snapshots."""
+import json
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+
+from engine import Session
+
+SNAPSHOT_EVERY = 500  # Logged actions between snapshots of a session
+BATCH_SIZE = 1000  # Buffered actions that force a commit without waiting for flush()
+IDLE_SECONDS = 900.0  # Time without use after which a browser session's tables are offloaded
+SWEEP_SECONDS = 60.0  # Least time between two sweeps for idle browser sessions
+LEASE_SECONDS = 60.0  # How long a store's claim on a session lasts unless a commit renews it
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    session_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    state BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    session_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+# How each logged action is re-run; events are the tuples Session passes to on_event.
+_ACTIONS = {
+    'record': Session.record,
+    'undo': Session.undo,
+    'undo_to': Session.undo_to,
+    'redo': Session.redo,
+    'configure': Session.configure,
+    'strategy': Session.set_strategy,
+    'prediction': lambda session, window, rules, predictor=None: session.set_prediction(window, dict(rules), predictor),
+    'reset_betting': Session.reset_betting,
+    'reset_all': Session.reset_all,
+    'lock': Session.lock_win_limit,
+}
+
+
+class SessionBusy(RuntimeError):
+    """Another store, usually in another process, holds the lease on a session."""
+
+
+def apply_event(session, event):
+    """Re-run one logged action against a session."""
+    kind, *args = event
+    _ACTIONS[kind](session, *args)
+
+
+def _dump(session):
+    return pickle.dumps((session.window_sizes, session.state, session.journal, session.redo_stack),
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _restore(blob):
+    windows, state, journal, redo_stack = pickle.loads(blob)
+    session = Session(windows=windows)
+    session.state = state
+    session.journal = journal
+    session.redo_stack = redo_stack
+    return session
+
+
+class SessionStore:
+    """Durable home for many sessions, keyed by an id such as a table or browser token.
+
+    Every state-changing action of an attached session is appended to the
+    event log and committed in batches by flush(); the database runs in WAL
+    mode, so a commit is one sequential write. Every `snapshot_every` actions
+    the whole session is pickled and the events it covers are dropped, so
+    open() only has to unpickle one snapshot and replay a short tail.
+
+    Each session has a single writer. Opening a session takes a lease on it
+    in the database, and every commit renews the leases of the sessions
+    still open. A store whose lease lapsed and was taken over by another
+    stops logging that session, so two stores never interleave events.
+    A lease another store holds makes open() raise SessionBusy until it is
+    released by offload(), delete() or close(), or LEASE_SECONDS pass
+    without a commit.
+    """
+
+    def __init__(self, path, snapshot_every=SNAPSHOT_EVERY, synchronous="NORMAL", lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex  # Whose leases are whose
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={synchronous}")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._pending = []  # (session_id, seq, event JSON) rows not yet committed
+        self._seq = {}  # Last sequence number used per session
+        self._since_snapshot = {}  # Actions logged per session since its last snapshot
+        self._due = set()  # Sessions that have logged snapshot_every actions since their last snapshot
+        self._sessions = weakref.WeakValueDictionary()
+        self._renew_at = 0.0  # When the leases of open sessions are next renewed
+
+    def _last_seq(self, session_id):
+        row = self._db.execute(
+            "SELECT max(seq) FROM (SELECT max(seq) AS seq FROM events WHERE session_id = ?"
+            " UNION ALL SELECT seq FROM snapshots WHERE session_id = ?)",
+            (session_id, session_id)).fetchone()
+        return row[0] or 0
+
+    def _listen(self, session_id):
+        pending = self._pending
+        seq = self._seq
+        since_snapshot = self._since_snapshot
+        due = self._due
+        snapshot_every = self.snapshot_every
+        lock = self._lock
+
+        def on_event(event):
+            with lock:
+                seq[session_id] += 1
+                since_snapshot[session_id] += 1
+                if since_snapshot[session_id] >= snapshot_every:
+                    due.add(session_id)
+                pending.append((session_id, seq[session_id], json.dumps(event)))
+                if len(pending) >= BATCH_SIZE:
+                    # The action this event logs has not run yet, so a snapshot
+                    # here would miss it; snapshots wait for flush().
+                    self._commit()
+        return on_event
+
+    def _acquire(self, session_id):
+        """Take or renew the lease on a session; raise SessionBusy if another store holds it."""
+        now = time.time()
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT owner, expires FROM leases WHERE session_id = ?", (session_id,)).fetchone()
+            if row is not None and row[0] != self.owner and row[1] > now:
+                raise SessionBusy(f"Table {session_id} is open in another process.")
+            db.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?)",
+                       (session_id, self.owner, now + self.lease_seconds))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _release(self, session_id):
+        self._db.execute("DELETE FROM leases WHERE session_id = ? AND owner = ?", (session_id, self.owner))
+
+    def _detach(self, session_id):
+        """Stop logging a session whose lease another store has taken."""
+        session = self._sessions.pop(session_id, None)
+        self._seq.pop(session_id, None)
+        self._since_snapshot.pop(session_id, None)
+        self._due.discard(session_id)
+        if session is not None:
+            session.on_event = None
+            session.alert("error", "This table is now open in another process; changes here are no longer saved.")
+
+    def attach(self, session_id, session):
+        """Make `session` the stored record for `session_id`, replacing whatever was there."""
+        with self._lock:
+            self._acquire(session_id)
+            self._pending[:] = [row for row in self._pending if row[0] != session_id]
+            self._seq[session_id] = self._last_seq(session_id) + 1
+            self._sessions[session_id] = session
+            self._write_snapshot(session_id, session)
+            session.on_event = self._listen(session_id)
+        return session
+
+    def open(self, session_id):
+        """Restore the stored session for `session_id`, or start a new one, and keep logging it."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                return session
+            self._acquire(session_id)
+            self._commit()
+            db = self._db
+            row = db.execute("SELECT seq, state FROM snapshots WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return self.attach(session_id, Session())
+            seq, blob = row
+            session = _restore(blob)
+            events = db.execute("SELECT seq, event FROM events WHERE session_id = ? AND seq > ? ORDER BY seq",
+                                (session_id, seq)).fetchall()
+            with session.alerts.suppressed():
+                for seq, event in events:
+                    apply_event(session, json.loads(event))
+            self._seq[session_id] = seq
+            self._since_snapshot[session_id] = len(events)
+            if len(events) >= self.snapshot_every:
+                self._due.add(session_id)
+            self._sessions[session_id] = session
+            session.on_event = self._listen(session_id)
+            return session
+
+    def _write_snapshot(self, session_id, session):
+        """Snapshot a session at its current sequence number and drop the events it covers."""
+        seq = self._seq[session_id]
+        db = self._db
+        db.execute("BEGIN")
+        try:
+            db.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)", (session_id, seq, _dump(session)))
+            db.execute("DELETE FROM events WHERE session_id = ? AND seq <= ?", (session_id, seq))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self._since_snapshot[session_id] = 0
+        self._due.discard(session_id)
+
+    def _commit(self):
+        """Write every buffered action to the event log and renew the leases of open sessions.
+
+        Leases are checked in the same transaction: actions of a session whose
+        lease another store has taken are dropped and the session detached.
+        """
+        pending = self._pending
+        now = time.time()
+        if not pending and not self._due and now < self._renew_at:
+            return
+        db = self._db
+        open_ids = list(self._sessions.keys())
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            held = {row[0] for row in db.execute("SELECT session_id FROM leases WHERE owner = ?", (self.owner,))}
+            rows = [row for row in pending if row[0] in held]
+            db.executemany("INSERT INTO events VALUES (?, ?, ?)", rows)
+            db.executemany("UPDATE leases SET expires = ? WHERE session_id = ? AND owner = ?",
+                           [(now + self.lease_seconds, session_id, self.owner)
+                            for session_id in open_ids if session_id in held])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        pending.clear()
+        self._renew_at = now + self.lease_seconds / 3
+        for session_id in open_ids:
+            if session_id not in held:
+                self._detach(session_id)
+
+    def flush(self):
+        """Commit every buffered action, then snapshot sessions that have logged enough of them."""
+        with self._lock:
+            self._commit()
+            for session_id in list(self._due):
+                session = self._sessions.get(session_id)
+                if session is not None:
+                    self._write_snapshot(session_id, session)
+                else:
+                    self._due.discard(session_id)
+
+    def offload(self, session_id):
+        """Snapshot a session and stop logging it, so it can be freed; open() restores it. Return True if it was open."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            self._commit()
+            if session_id not in self._sessions:
+                return False  # Its lease was lost, so the store no longer speaks for it
+            del self._sessions[session_id]
+            self._write_snapshot(session_id, session)
+            self._release(session_id)
+            session.on_event = None
+            return True
+
+    def delete(self, session_id):
+        """Forget a session and everything stored for it; raise SessionBusy if another store holds it."""
+        with self._lock:
+            self._acquire(session_id)
+            self._pending[:] = [row for row in self._pending if row[0] != session_id]
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                session.on_event = None
+            self._seq.pop(session_id, None)
+            self._since_snapshot.pop(session_id, None)
+            self._due.discard(session_id)
+            self._db.execute("DELETE FROM events WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM snapshots WHERE session_id = ?", (session_id,))
+            self._release(session_id)
+
+    def close(self):
+        """Commit and snapshot what is due, release every lease and close the database."""
+        with self._lock:
+            self.flush()
+            self._db.execute("DELETE FROM leases WHERE owner = ?", (self.owner,))
+            self._db.close()
+
+
+class IdleSessions:
+    """The tables of every browser session, offloaded to a SessionStore while unused and reopened on next use.
+
+    Each browser session (an `owner`) keeps its tables in a dict of table id
+    to Session. get() marks the owner active and reopens an offloaded table;
+    sweep() snapshots the tables of owners idle for `idle_seconds`, sets their
+    entries to None and drops its own references, so server memory follows
+    active users. An owner whose websocket has closed is offloaded the same
+    way. Both hold one lock, so a sweep never offloads a table mid-use.
+    """
+
+    def __init__(self, store, idle_seconds=IDLE_SECONDS, sweep_seconds=SWEEP_SECONDS):
+        self.store = store
+        self.idle_seconds = idle_seconds
+        self.sweep_seconds = sweep_seconds
+        self._lock = threading.Lock()
+        self._owners = {}  # owner -> (last use, tables dict, view cache dict)
+        self._swept = time.monotonic()
+
+    def get(self, owner, tables, table_id, views=None):
+        """tables[table_id], reopened from the store if it was offloaded; marks `owner` active."""
+        with self._lock:
+            self._owners[owner] = (time.monotonic(), tables, views)
+            session = tables[table_id]
+            if session is None:
+                session = tables[table_id] = self.store.open(table_id)
+            return session
+
+    def sweep(self):
+        """Offload the tables of owners idle for idle_seconds, at most every sweep_seconds; return how many."""
+        now = time.monotonic()
+        if now - self._swept < self.sweep_seconds:
+            return 0
+        offloaded = 0
+        with self._lock:
+            self._swept = now
+            for owner, (used, tables, views) in list(self._owners.items()):
+                if now - used < self.idle_seconds:
+                    continue
+                del self._owners[owner]
+                for table_id, session in tables.items():
+                    # A table the store is not logging would lose its state, so it stays.
+                    if session is not None and self.store.offload(table_id):
+                        tables[table_id] = None
+                        offloaded += 1
+                if views is not None:
+                    # Cached views are keyed by revision, which a reopened session starts again.
+                    views.clear()
+        return offloaded
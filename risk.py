@@ -0,0 +1,116 @@
+"""Block-bootstrap risk analytics over a session's recorded bets.
+
+A session's bet history is one realized path. Resampling its net bet
+outcomes in blocks of consecutive bets, which keeps the short-range
+dependence a progression puts between stakes, gives many paths the same
+bets could as well have taken. Each path starts from the initial bankroll
+and stops at the first bet that takes it to the stop-loss floor or the win
+limit, as the tracker does. Profit locks are not replayed: the path is the
+bankroll with locked profit counted in.
+
+All resamples of a chunk are one (resamples x bets) array, built by fancy
+indexing and a cumulative sum; chunks are sized so that array stays under
+CHUNK_CELLS values, whatever the number of resamples.
+"""
+from statistics import NormalDist
+
+import numpy as np
+
+RESAMPLES = 10_000
+CHUNK_CELLS = 262_144  # float64 values per chunk: 2 MB, small enough to stay in cache
+LEVEL = 0.95  # Coverage of the reported confidence intervals
+NEVER = -1  # Bets to the win limit of a path that never reached it
+
+
+def block_size(bets):
+    """Default block length: the cube root of the number of bets, as is usual for a moving-block bootstrap."""
+    return max(1, round(bets ** (1 / 3)))
+
+
+def _paths(outcomes, resamples, bets, block, rng):
+    """A (resamples x bets) array of bankroll changes, cumulated, from moving blocks of `outcomes`."""
+    blocks = -(-bets // block)
+    starts = rng.integers(0, len(outcomes) - block + 1, size=(resamples, blocks))
+    index = (starts[:, :, None] + np.arange(block)).reshape(resamples, -1)[:, :bets]
+    return np.cumsum(outcomes[index], axis=1)
+
+
+def _first(hit):
+    """Column of the first True in each row of `hit`, or NEVER."""
+    return np.where(hit.any(axis=1), hit.argmax(axis=1), NEVER)
+
+
+def bootstrap(outcomes, initial_bankroll, stop_loss=0.8, win_limit=1.5, resamples=RESAMPLES, bets=None,
+              block=None, seed=None):
+    """Resample `outcomes`, net bet amounts such as BetHistory.net(), into `resamples` paths of `bets` bets.
+
+    Returns per-path arrays: final bankroll, max drawdown below the running
+    peak, whether the stop-loss floor was hit, and the bets it took to reach
+    the win limit (NEVER if it was not reached).
+    """
+    outcomes = np.asarray(outcomes, dtype=np.float64)
+    if not len(outcomes):
+        raise ValueError("No bets to resample")
+    bets = len(outcomes) if bets is None else bets
+    block = min(block or block_size(len(outcomes)), len(outcomes))
+    floor = initial_bankroll * stop_loss
+    ceiling = initial_bankroll * win_limit
+    rng = np.random.default_rng(seed)
+    final = np.empty(resamples)
+    drawdown = np.empty(resamples)
+    stopped = np.empty(resamples, dtype=bool)
+    to_win = np.empty(resamples, dtype=np.int64)
+    chunk = max(1, CHUNK_CELLS // bets)
+    for start in range(0, resamples, chunk):
+        stop = min(start + chunk, resamples)
+        bankroll = initial_bankroll + _paths(outcomes, stop - start, bets, block, rng)
+        lost = _first(bankroll <= floor)
+        won = _first(bankroll >= ceiling)
+        # A path ends at the first barrier it meets; one that meets neither plays every bet.
+        end = np.full(stop - start, bets - 1)
+        end = np.where(lost != NEVER, lost, end)
+        end = np.where((won != NEVER) & ((lost == NEVER) | (won < lost)), won, end)
+        rows = np.arange(stop - start)
+        final[start:stop] = bankroll[rows, end]
+        stopped[start:stop] = (lost != NEVER) & (end == lost)
+        to_win[start:stop] = np.where((won != NEVER) & (end == won), won + 1, NEVER)
+        fall = np.maximum(np.maximum.accumulate(bankroll, axis=1), initial_bankroll) - bankroll
+        # Bets after a path has ended must not count toward its drawdown.
+        fall[np.arange(bets) > end[:, None]] = 0.0
+        drawdown[start:stop] = fall.max(axis=1)
+    return {
+        'final_bankroll': final,
+        'max_drawdown': drawdown,
+        'stop_loss': stopped,
+        'bets_to_win_limit': to_win,
+    }
+
+
+def _interval(values, level):
+    low, median, high = np.quantile(values, ((1 - level) / 2, 0.5, (1 + level) / 2))
+    return float(low), float(median), float(high)
+
+
+def summarize(result, level=LEVEL):
+    """Rows of (measure, estimate, low, high) at confidence `level`.
+
+    Bankroll and drawdown give their median and percentile interval, the
+    stop-loss and win-limit rates a normal interval for the resampling error,
+    and the bets to the win limit their mean over the paths that reached it.
+    """
+    rows = []
+    for name, key in (("Final Bankroll", 'final_bankroll'), ("Max Drawdown", 'max_drawdown')):
+        low, median, high = _interval(result[key], level)
+        rows.append((name, median, low, high))
+    n = len(result['stop_loss'])
+    z = NormalDist().inv_cdf((1 + level) / 2)
+    reached = result['bets_to_win_limit'] != NEVER
+    for name, hits in (("P(Stop-Loss)", result['stop_loss']), ("P(Win Limit)", reached)):
+        rate = float(hits.mean())
+        margin = z * np.sqrt(rate * (1 - rate) / n)
+        rows.append((name, rate, max(0.0, rate - margin), min(1.0, rate + margin)))
+    if reached.any():
+        times = result['bets_to_win_limit'][reached]
+        low, _, high = _interval(times, level)
+        rows.append(("Bets to Win Limit", float(times.mean()), low, high))
+    return rows
@@ -0,0 +1,256 @@
+"""Bead Plate, Big Road and the derived roads, kept up to date one hand at a time."""
+from array import array
+
+import numpy as np
+
+from history import ResultLog
+
+ROWS = 6  # Every road is drawn six cells high
+EMPTY = 0
+# Cell codes: 1 and 2 are Player and Banker on the Bead Plate and Big Road (3 is a Tie on
+# the Bead Plate), and red and blue on the derived roads.
+PLAYER, BANKER, TIE = 1, 2, 3
+RED, BLUE = 1, 2
+CODES = {'P': PLAYER, 'B': BANKER, 'T': TIE}
+# Each derived road compares the Big Road with the column this many columns back.
+DERIVED = (("Big Eye Boy", 1), ("Small Road", 2), ("Cockroach Pig", 3))
+
+
+def _grid(cells, start, width, dtype=np.int8):
+    """Copy columns [start, width) of a column-major cell buffer into a ROWS x n array."""
+    column = np.frombuffer(cells, dtype=dtype)[start * ROWS:width * ROWS]
+    return column.reshape(-1, ROWS).T.copy()
+
+
+class Road:
+    """A streak road: a repeated symbol goes down its column, a new one starts the next column.
+
+    A streak that reaches the bottom row, or runs into a cell already taken,
+    turns right and carries on along that row (the dragon tail). The grid is
+    a column-major bytearray that grows a column at a time, so each cell is
+    placed in O(1) and the road is never rebuilt; pop() takes the newest
+    cell back off for undo.
+    """
+
+    __slots__ = ('grid', 'symbols', 'rows', 'cols', 'widths', 'columns', 'starts', 'width')
+
+    def __init__(self):
+        self.grid = bytearray()  # Cell (row, col) is grid[col * ROWS + row]
+        self.symbols = bytearray()  # Symbol of every cell, oldest first
+        self.rows = bytearray()  # Where each cell was drawn
+        self.cols = array('i')
+        self.widths = array('i')  # Grid width before each cell, restored by pop()
+        self.columns = array('i')  # Length of every streak
+        self.starts = array('i')  # Grid column where every streak starts
+        self.width = 0  # Grid columns in use
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def nbytes(self):
+        buffers = (self.grid, self.symbols, self.rows, self.cols, self.widths, self.columns, self.starts)
+        return sum(len(buffer) * getattr(buffer, 'itemsize', 1) for buffer in buffers)
+
+    def push(self, symbol):
+        """Place the next symbol; return its (row, col) in the grid."""
+        symbols = self.symbols
+        grid = self.grid
+        if symbols and symbols[-1] == symbol:
+            row, col = self.rows[-1], self.cols[-1]
+            if col == self.starts[-1] and row + 1 < ROWS and not grid[col * ROWS + row + 1]:
+                row += 1
+            else:
+                col += 1
+                while col * ROWS < len(grid) and grid[col * ROWS + row]:
+                    col += 1
+            self.columns[-1] += 1
+        else:
+            row, col = 0, self.starts[-1] + 1 if symbols else 0
+            while col * ROWS < len(grid) and grid[col * ROWS]:
+                col += 1
+            self.columns.append(1)
+            self.starts.append(col)
+        if col * ROWS >= len(grid):
+            grid.extend(bytes((col + 1) * ROWS - len(grid)))
+        grid[col * ROWS + row] = symbol
+        symbols.append(symbol)
+        self.rows.append(row)
+        self.cols.append(col)
+        self.widths.append(self.width)
+        if col >= self.width:
+            self.width = col + 1
+        return row, col
+
+    def pop(self):
+        """Remove the newest cell and return its symbol."""
+        symbol = self.symbols.pop()
+        self.grid[self.cols.pop() * ROWS + self.rows.pop()] = EMPTY
+        self.width = self.widths.pop()
+        self.columns[-1] -= 1
+        if not self.columns[-1]:
+            self.columns.pop()
+            self.starts.pop()
+        return symbol
+
+    def view(self, last=None):
+        """ROWS x width array of the grid, or of only its `last` columns."""
+        start = 0 if last is None else max(0, self.width - last)
+        return _grid(self.grid, start, self.width)
+
+
+class BigRoad(Road):
+    """The Big Road: Player and Banker streaks, with ties counted on the cell before them."""
+
+    __slots__ = ('ties', 'leading_ties')
+
+    def __init__(self):
+        super().__init__()
+        self.ties = array('H')  # Ties drawn on each cell
+        self.leading_ties = 0  # Ties before the first Player or Banker
+
+    def push(self, symbol):
+        self.ties.append(0)
+        return Road.push(self, symbol)
+
+    def pop(self):
+        self.ties.pop()
+        return Road.pop(self)
+
+    def tie(self):
+        if self.symbols:
+            self.ties[-1] += 1
+        else:
+            self.leading_ties += 1
+
+    def untie(self):
+        if self.symbols:
+            self.ties[-1] -= 1
+        else:
+            self.leading_ties -= 1
+
+    def tie_view(self, last=None):
+        """Tie counts aligned with view()."""
+        start = 0 if last is None else max(0, self.width - last)
+        view = np.zeros((ROWS, self.width - start), dtype=np.uint16)
+        cols = np.frombuffer(self.cols, dtype=np.int32)
+        shown = cols >= start
+        view[np.frombuffer(self.rows, dtype=np.uint8)[shown], cols[shown] - start] = \
+            np.frombuffer(self.ties, dtype=np.uint16)[shown]
+        return view
+
+
+def derived_mark(columns, k):
+    """Red or blue for the newest Big Road cell on the road looking `k` columns back, or EMPTY.
+
+    A new streak is red when the two streaks before it, k apart, are the same
+    length. Further down a streak, the cell is blue only where the column k
+    back has just ended (it reached the row above but not this one), else red.
+    """
+    c = len(columns) - 1
+    r = columns[c] - 1
+    if r == 0:
+        if c < k + 1:
+            return EMPTY
+        return RED if columns[c - 1] == columns[c - 1 - k] else BLUE
+    if c < k:
+        return EMPTY
+    return BLUE if columns[c - k] == r else RED
+
+
+class Roads:
+    """Every road of a shoe, rolled back in O(1) on undo.
+
+    push() only queues the hand; the roads catch up, at O(1) per queued
+    hand, the next time they are read. Recording a hand therefore costs a
+    byte append even when nothing draws the roads, as in headless replays.
+    """
+
+    __slots__ = ('results', 'placed', 'big', 'derived', 'marks')
+
+    def __init__(self):
+        self.results = ResultLog()  # Every hand in order, packed: also the column-major Bead Plate
+        self.placed = 0  # Hands already drawn on the Big Road and derived roads
+        self.big = BigRoad()
+        self.derived = tuple(Road() for _ in DERIVED)
+        self.marks = bytearray()  # Per Big Road cell: bit i set when derived road i got a mark
+
+    def push(self, result):
+        """Add one 'P', 'B' or 'T' hand."""
+        self.results.append(result)
+
+    def pop(self):
+        """Take the newest hand back off every road."""
+        result = self.results.pop()
+        if self.placed > len(self.results):
+            self.placed -= 1
+            self._unplace(CODES[result])
+
+    def _place(self, code):
+        big = self.big
+        if code == TIE:
+            big.tie()
+            return
+        big.push(code)
+        columns = big.columns
+        marked = 0
+        for i, (road, (_, k)) in enumerate(zip(self.derived, DERIVED)):
+            mark = derived_mark(columns, k)
+            if mark:
+                road.push(mark)
+                marked |= 1 << i
+        self.marks.append(marked)
+
+    def _unplace(self, code):
+        if code == TIE:
+            self.big.untie()
+            return
+        self.big.pop()
+        marked = self.marks.pop()
+        for i, road in enumerate(self.derived):
+            if marked & 1 << i:
+                road.pop()
+
+    @property
+    def nbytes(self):
+        """Bytes of every hand and drawn road."""
+        big = self.big
+        return (self.results.nbytes + big.nbytes + len(big.ties) * big.ties.itemsize + len(self.marks)
+                + sum(road.nbytes for road in self.derived))
+
+    def sync(self):
+        """Draw every queued hand; return self for chaining."""
+        results = self.results
+        if self.placed < len(results):
+            for code in results.codes(self.placed).tolist():
+                self._place(code)
+            self.placed = len(results)
+        return self
+
+    def view(self, road, last=None):
+        """ROWS x n array of a road by name: "Big Road" or one of DERIVED."""
+        self.sync()
+        if road == "Big Road":
+            return self.big.view(last)
+        for (name, _), derived in zip(DERIVED, self.derived):
+            if name == road:
+                return derived.view(last)
+        raise ValueError(f"Unknown road: {road}")
+
+    def tie_view(self, last=None):
+        """Big Road tie counts, aligned with view("Big Road", last)."""
+        return self.sync().big.tie_view(last)
+
+    def bead_view(self, last=None):
+        """ROWS x n array of the Bead Plate, or of only its `last` columns."""
+        results = self.results
+        width = -(-len(results) // ROWS)
+        start = 0 if last is None else max(0, width - last)
+        cells = results.codes(start * ROWS).tobytes().ljust((width - start) * ROWS, b'\0')
+        return _grid(cells, 0, width - start)
+
+    def features(self):
+        """Latest cell of every road as (Big Road streak length, mark per derived road), for predictors."""
+        big = self.sync().big
+        streak = big.columns[-1] if big.columns else 0
+        return (streak,) + tuple(road.symbols[-1] if road.symbols else EMPTY for road in self.derived)
@@ -0,0 +1,250 @@
+"""Headless HTTP and WebSocket service that feeds results into tables and serves their next bet.
+
+Example:
+    python service.py --port 8502
+
+Routes, all JSON:
+    GET  /tables/<id>           next prediction, bet amount and bankroll of a table
+    POST /tables/<id>/hands     {"result": "P"}: record one hand
+    POST /tables/<id>/batch     {"results": "PBBT..."}: record many hands
+    POST /tables/<id>/undo      undo the last hand
+    WS   /tables/<id>/stream    that summary, pushed whenever the prediction or bet amount changes
+
+Tables are the app's: they are opened from, and logged to, the same session
+database, keyed by the id in the app's ?table= URL. A table has one writer
+at a time: whichever process opens it first holds a lease on it (see
+persistence.SessionStore) until it offloads or closes it, and requests for
+a table the app holds get 409 until then. The service keeps its tables open
+until it exits. It runs on a single asyncio loop, and each table has a lock
+that its requests hold while they touch it, so a long batch yields to other
+tables between chunks without letting another request of its own table
+interleave.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+
+import tornado.web
+import tornado.websocket
+from tornado.ioloop import PeriodicCallback
+
+import metrics
+import patterns
+from engine import OUTCOMES, Session
+from persistence import SessionBusy, SessionStore
+
+DATABASE = os.environ.get("TRACKER_DB", "tracker.db")
+CORPUS = os.environ.get("TRACKER_CORPUS")
+FLUSH_MS = 1000  # How often buffered actions are committed to the store
+BATCH_CHUNK = 500  # Hands a batch records before letting other requests run
+
+_TABLE_ID = r'([A-Za-z0-9_-]{1,64})'
+_RESULTS = re.compile(f"[{''.join(OUTCOMES)}]*")
+
+
+class Table:
+    """A served table: its session, the lock its requests take and its stream subscribers."""
+
+    __slots__ = ('id', 'session', 'lock', 'watchers', 'pushed')
+
+    def __init__(self, table_id, session):
+        self.id = table_id
+        self.session = session
+        self.lock = asyncio.Lock()
+        self.watchers = set()
+        self.pushed = None  # (prediction, bet amount) last streamed
+
+    def summary(self):
+        s = self.session.state
+        return {
+            'table': self.id,
+            'revision': self.session.revision,
+            'hands': len(s.roads.results),
+            'prediction': s.next_prediction,
+            'bet_amount': s.bet_amount,
+            'bankroll': s.result_tracker,
+            'session_profit': s.session_profit,
+            'profit_lock': s.profit_lock,
+            'strategy': s.betting_strategy,
+        }
+
+    def publish(self):
+        """Stream the summary to subscribers if the prediction or bet amount moved."""
+        s = self.session.state
+        key = (s.next_prediction, s.bet_amount)
+        if key == self.pushed or not self.watchers:
+            self.pushed = key
+            return
+        self.pushed = key
+        message = json.dumps(self.summary())
+        for watcher in list(self.watchers):
+            try:
+                watcher.write_message(message)
+            except tornado.websocket.WebSocketClosedError:
+                self.watchers.discard(watcher)
+
+
+class Tables:
+    """Every table the service has opened, kept in memory until the process exits."""
+
+    def __init__(self, store):
+        self.store = store
+        self._tables = {}
+
+    def get(self, table_id):
+        """The table, opened on first use; 409 if another process is writing it."""
+        table = self._tables.get(table_id)
+        if table is None:
+            try:
+                session = self.store.open(table_id)
+            except SessionBusy as exc:
+                raise tornado.web.HTTPError(409, reason=str(exc))
+            table = self._tables[table_id] = Table(table_id, session)
+        return table
+
+    def __len__(self):
+        return len(self._tables)
+
+
+def _newest_alert_id(session):
+    latest = session.alerts.latest(1)
+    return latest[0].id if latest else 0
+
+
+class JSONHandler(tornado.web.RequestHandler):
+    def initialize(self, tables):
+        self.tables = tables
+
+    def prepare(self):
+        self.started = time.perf_counter()
+
+    def finish(self, chunk=None):
+        if metrics.ENABLED and not self._finished:
+            # Handling time only: from the parsed request to the response, without socket I/O.
+            route = self.path_args[-1] if isinstance(self, ActionHandler) else 'table'
+            metrics.REGISTRY.observe('tracker_request_seconds', time.perf_counter() - self.started,
+                                     (('route', route),))
+        return super().finish(chunk)
+
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json")
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({'error': self._reason})
+
+    def body(self):
+        if not self.request.body:
+            return {}
+        try:
+            body = json.loads(self.request.body)
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Body is not valid JSON")
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, reason="Body must be a JSON object")
+        return body
+
+
+class TableHandler(JSONHandler):
+    async def get(self, table_id):
+        table = self.tables.get(table_id)
+        async with table.lock:
+            self.write(table.summary())
+
+
+class ActionHandler(JSONHandler):
+    async def post(self, table_id, action):
+        body = self.body()
+        table = self.tables.get(table_id)
+        session = table.session
+        async with table.lock:
+            newest = _newest_alert_id(session)
+            if action == 'hands':
+                result = body.get('result')
+                if result not in OUTCOMES:
+                    raise tornado.web.HTTPError(400, reason=f"result must be one of {', '.join(OUTCOMES)}")
+                session.record(result)
+            elif action == 'batch':
+                results = body.get('results')
+                if isinstance(results, list) and all(isinstance(result, str) for result in results):
+                    results = ''.join(results)
+                if not isinstance(results, str) or not _RESULTS.fullmatch(results):
+                    raise tornado.web.HTTPError(400, reason="results must be a string or list of P, B and T")
+                for start in range(0, len(results), BATCH_CHUNK):
+                    if start:
+                        await asyncio.sleep(0)
+                    session.replay(results[start:start + BATCH_CHUNK])
+            elif not session.undo():
+                raise tornado.web.HTTPError(409, reason="No hands to undo")
+            table.publish()
+            summary = table.summary()
+            summary['alerts'] = [alert.message for alert in session.alerts.latest(3) if alert.id > newest]
+        self.write(summary)
+
+
+class StreamHandler(tornado.websocket.WebSocketHandler):
+    def initialize(self, tables):
+        self.tables = tables
+        self.table = None
+
+    def open(self, table_id):
+        try:
+            self.table = self.tables.get(table_id)
+        except tornado.web.HTTPError as exc:
+            self.close(4409, exc.reason)
+            return
+        self.table.watchers.add(self)
+        self.write_message(json.dumps(self.table.summary()))
+
+    def on_close(self):
+        if self.table is not None:
+            self.table.watchers.discard(self)
+
+
+def make_app(store):
+    """The tornado application serving every table of `store`."""
+    tables = Tables(store)
+    args = {'tables': tables}
+    return tornado.web.Application([
+        (rf'/tables/{_TABLE_ID}', TableHandler, args),
+        (rf'/tables/{_TABLE_ID}/(hands|batch|undo)', ActionHandler, args),
+        (rf'/tables/{_TABLE_ID}/stream', StreamHandler, args),
+    ], log_function=lambda handler: None)
+
+
+async def serve(host, port, store):
+    app = make_app(store)
+    app.listen(port, host)
+    flusher = PeriodicCallback(store.flush, FLUSH_MS)
+    flusher.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        flusher.stop()
+        store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve tables over HTTP and WebSocket.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--db', default=DATABASE, help="Session store shared with the app (:memory: for none)")
+    parser.add_argument('--corpus', default=CORPUS, help="Pattern index built by patterns.py")
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        patterns.use_corpus(patterns.PatternIndex.load(args.corpus))
+    metrics.instrument(Session)
+    if metrics.PORT:
+        metrics.serve()
+    print(f"Serving tables on http://{args.host}:{args.port}/tables/<id>", flush=True)
+    try:
+        asyncio.run(serve(args.host, args.port, SessionStore(args.db)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Stream historical shoe files through the tracker and backtest the predictor.
+
+Example:
+    python shoes.py shoes.txt.gz --strategy T3 --window 20 --output per_shoe.csv
+
+Input is text or CSV, optionally gzip-compressed, with one shoe per line.
+Every comma, semicolon or whitespace separated field made only of P, B and
+T is part of the shoe, so "PBBPT", "P,B,B,P,T" and "shoe-17,PBBPT" all
+read the same; other fields and blank or '#' lines are ignored. Files are
+read lazily and each shoe is replayed through a fresh Session, so memory
+stays constant however large the file is.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import math
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+
+import patterns
+from dominance import RULES, SESSION
+from engine import DEFAULT_BANKROLL, DEFAULT_BASE_AMOUNT, PREDICTORS, STRATEGIES, Session
+
+SHOE_FIELDS = ('shoe', 'hands', 'ties', 'bets', 'wins', 'losses', 'final_bankroll', 'profit_lock', 'net',
+               'max_drawdown', 'exit')
+EXITS = ("Played out", "Stop-loss", "Win limit", "Depleted")  # As montecarlo.EXIT_NAMES
+BATCH_SHOES = 2000  # Shoes per work unit handed to a worker process
+
+_FIELD = re.compile(r'(?<![^\s,;])[PBT]+(?![^\s,;])')
+
+
+def open_shoes(path):
+    """Open a shoe file as text, decompressing it when it starts with the gzip magic."""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='ascii', errors='replace')
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == b'\x1f\x8b'
+    if compressed:
+        return gzip.open(path, 'rt', encoding='ascii', errors='replace')
+    return open(path, encoding='ascii', errors='replace')
+
+
+def parse_shoes(lines):
+    """Yield (line number, 'PBT...' string) for every line that holds a shoe."""
+    for number, line in enumerate(lines, 1):
+        if line.startswith('#'):
+            continue
+        shoe = ''.join(_FIELD.findall(line.upper()))
+        if shoe:
+            yield number, shoe
+
+
+def replay_shoe(shoe, strategy="Flatbet", base_amount=DEFAULT_BASE_AMOUNT, initial_bankroll=DEFAULT_BANKROLL,
+                window=SESSION, rule="Follow", predictor=PREDICTORS[0]):
+    """Play one shoe through a fresh session with the given settings; return its stats row.
+
+    The shoe stops early when the tracker turns a hand away: at the stop-loss,
+    or at the win limit, whose lock is then the shoe's exit. Drawdown is
+    measured on bankroll plus locked profit, so a lock is not a loss.
+    """
+    session = Session(quiet=True, keep_history=False, windows=() if window is SESSION else (window,))
+    if not session.configure(base_amount, initial_bankroll):
+        raise ValueError(f"Invalid base amount {base_amount} or initial bankroll {initial_bankroll}")
+    session.set_strategy(strategy)
+    session.set_prediction(window, {window: rule}, predictor)
+    s = session.state
+    peak = initial_bankroll
+    max_drawdown = 0.0
+    exit = EXITS[0]
+    for result in shoe:
+        hands, locked = s.game_count, s.profit_lock
+        session.record(result)
+        if s.game_count == hands:
+            if s.profit_lock > locked:
+                exit = EXITS[2]
+            break
+        equity = s.result_tracker + s.profit_lock
+        peak = max(peak, equity)
+        max_drawdown = max(max_drawdown, peak - equity)
+    if s.result_tracker <= 0:
+        exit = EXITS[3]
+    elif s.result_tracker <= initial_bankroll * s.stop_loss:
+        exit = EXITS[1]
+    return {
+        'hands': len(shoe),
+        'ties': s.ties,
+        'bets': s.wins + s.losses,
+        'wins': s.wins,
+        'losses': s.losses,
+        'final_bankroll': s.result_tracker,
+        'profit_lock': s.profit_lock,
+        'net': s.result_tracker + s.profit_lock - initial_bankroll,
+        'max_drawdown': max_drawdown,
+        'exit': exit,
+    }
+
+
+def _replay_batch(batch, params):
+    """Replay a list of (line number, shoe); runs inside a worker process."""
+    return [{'shoe': number, **replay_shoe(shoe, **params)} for number, shoe in batch]
+
+
+def _batches(shoes, size):
+    shoes = iter(shoes)
+    while batch := list(islice(shoes, size)):
+        yield batch
+
+
+def backtest(shoes, workers=1, **params):
+    """Yield a stats row per shoe, in input order.
+
+    With more than one worker, batches of shoes are replayed across a process
+    pool with only a few batches in flight at a time, so memory stays bounded.
+    Workers start with this process's pattern corpus.
+    """
+    if workers == 1:
+        for number, shoe in shoes:
+            yield {'shoe': number, **replay_shoe(shoe, **params)}
+        return
+    limit = 2 * (workers or os.cpu_count())
+    with ProcessPoolExecutor(max_workers=workers, initializer=patterns.use_corpus,
+                             initargs=(patterns.CORPUS,)) as pool:
+        in_flight = deque()
+        for batch in _batches(shoes, BATCH_SHOES):
+            in_flight.append(pool.submit(_replay_batch, batch, params))
+            if len(in_flight) > limit:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+class Summary:
+    """Running totals over per-shoe rows, in constant memory."""
+
+    def __init__(self):
+        self.shoes = 0
+        self.hands = 0
+        self.ties = 0
+        self.bets = 0
+        self.wins = 0
+        self.losses = 0
+        self.profit_lock = 0.0
+        self.max_drawdown = 0.0
+        self.exits = dict.fromkeys(EXITS, 0)
+        self._mean = 0.0  # Welford running mean and squared deviations of net
+        self._m2 = 0.0
+
+    def add(self, row):
+        self.shoes += 1
+        self.hands += row['hands']
+        self.ties += row['ties']
+        self.bets += row['bets']
+        self.wins += row['wins']
+        self.losses += row['losses']
+        self.profit_lock += row['profit_lock']
+        self.max_drawdown = max(self.max_drawdown, row['max_drawdown'])
+        self.exits[row['exit']] += 1
+        delta = row['net'] - self._mean
+        self._mean += delta / self.shoes
+        self._m2 += delta * (row['net'] - self._mean)
+
+    def as_dict(self):
+        shoes = self.shoes
+        return {
+            'shoes': shoes,
+            'hands': self.hands,
+            'ties': self.ties,
+            'bets': self.bets,
+            'wins': self.wins,
+            'losses': self.losses,
+            'win_rate': self.wins / self.bets if self.bets else 0.0,
+            'mean_net': self._mean,
+            'std_net': math.sqrt(self._m2 / shoes) if shoes else 0.0,
+            'total_net': self._mean * shoes,
+            'total_profit_lock': self.profit_lock,
+            'worst_drawdown': self.max_drawdown,
+            **{re.sub(r'\W+', '_', name.lower()) + '_rate': count / shoes if shoes else 0.0
+               for name, count in self.exits.items()},
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay historical shoes through the tracker and summarise the results.")
+    parser.add_argument('input', help="Shoe file (text or CSV, optionally gzipped), or - for stdin")
+    parser.add_argument('--strategy', choices=STRATEGIES, default="Flatbet")
+    parser.add_argument('--base-amount', type=float, default=DEFAULT_BASE_AMOUNT)
+    parser.add_argument('--initial-bankroll', type=float, default=DEFAULT_BANKROLL)
+    parser.add_argument('--window', type=int, default=0, help="Dominance window in pairs; 0 counts the whole shoe")
+    parser.add_argument('--rule', choices=RULES, default="Follow")
+    parser.add_argument('--predictor', choices=PREDICTORS, default=PREDICTORS[0])
+    parser.add_argument('--corpus', help="Pattern index built by patterns.py, for --predictor Pattern")
+    parser.add_argument('--output', help="CSV file for one row of stats per shoe")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes (0: all cores)")
+    args = parser.parse_args(argv)
+    if args.window < 0:
+        parser.error("--window must be 0 or a positive number of pairs")
+    probe = Session()
+    if not probe.configure(args.base_amount, args.initial_bankroll):
+        parser.error(probe.alerts.latest(1)[0].message)
+
+    params = dict(strategy=args.strategy, base_amount=args.base_amount, initial_bankroll=args.initial_bankroll,
+                  window=args.window or SESSION, rule=args.rule, predictor=args.predictor)
+    if args.corpus:
+        patterns.use_corpus(patterns.PatternIndex.load(args.corpus))
+    summary = Summary()
+    out = open(args.output, 'w', newline='') if args.output else None
+    try:
+        writer = csv.DictWriter(out, fieldnames=SHOE_FIELDS) if out else None
+        if writer:
+            writer.writeheader()
+        with open_shoes(args.input) as lines:
+            for row in backtest(parse_shoes(lines), args.workers or None, **params):
+                summary.add(row)
+                if writer:
+                    writer.writerow(row)
+    finally:
+        if out:
+            out.close()
+    json.dump(summary.as_dict(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Online session statistics: streaks, bet outcomes, drawdown and per-strategy records."""
+import math
+from array import array
+
+
+class SessionStats:
+    """Running statistics of a session, updated once per hand and rolled back in O(1) on undo.
+
+    P/B streaks are run-length encoded: `runs` holds the length of every
+    finished streak and `histogram[n]` how many of them were n long, the list
+    ending at the longest, so the current, longest and average streak are
+    read without scanning hands.
+    Bet outcomes (net amount won or lost) keep a Welford mean and variance
+    and the deepest drawdown below the peak bankroll. Each bet also keeps
+    the mean, M2 and drawdown it replaced, so pop_bet restores them exactly.
+    """
+
+    __slots__ = (
+        'strategies', 'side', 'streak', 'max_streak', 'runs', 'run_total', 'histogram',
+        'bets', 'mean', 'm2', 'max_drawdown', 'wins', 'losses', '_previous', '_bet_keys',
+    )
+
+    def __init__(self, strategies):
+        self.strategies = tuple(strategies)
+        self.side = None  # 'P' or 'B' of the current streak
+        self.streak = 0  # Length of the current streak
+        self.max_streak = 0
+        self.runs = array('I')  # Length of every finished streak, oldest first
+        self.run_total = 0  # Sum of runs
+        self.histogram = [0]  # histogram[n]: finished streaks n long
+        self.bets = 0
+        self.mean = 0.0  # Mean net outcome of a bet
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.max_drawdown = 0.0  # Deepest fall of the bankroll below its peak after a bet
+        self.wins = [0] * len(self.strategies)
+        self.losses = [0] * len(self.strategies)
+        self._previous = array('d')  # mean, m2 and max_drawdown before each bet
+        self._bet_keys = array('B')  # Strategy index * 2 + won, per bet
+
+    def push(self, result):
+        """Extend the streaks with a Player or Banker result."""
+        if result == self.side:
+            self.streak += 1
+        else:
+            if self.streak:
+                length = self.streak
+                self.runs.append(length)
+                self.run_total += length
+                histogram = self.histogram
+                if length >= len(histogram):
+                    histogram.extend([0] * (length + 1 - len(histogram)))
+                histogram[length] += 1
+            self.side = result
+            self.streak = 1
+        if self.streak > self.max_streak:
+            self.max_streak = self.streak
+
+    def pop(self):
+        """Remove the newest Player or Banker result."""
+        self.streak -= 1
+        if not self.streak and self.runs:
+            length = self.runs.pop()
+            self.run_total -= length
+            histogram = self.histogram
+            histogram[length] -= 1
+            while len(histogram) > 1 and not histogram[-1]:
+                histogram.pop()
+            self.side = 'P' if self.side == 'B' else 'B'
+            self.streak = length
+        elif not self.streak:
+            self.side = None
+        # The histogram ends at the longest finished streak.
+        self.max_streak = max(len(self.histogram) - 1, self.streak)
+
+    def bet(self, strategy, won, net, bankroll, peak):
+        """Add one settled bet: its net amount and the bankroll and peak after it."""
+        self._previous.extend((self.mean, self.m2, self.max_drawdown))
+        index = self.strategies.index(strategy)
+        self._bet_keys.append(index * 2 + won)
+        if won:
+            self.wins[index] += 1
+        else:
+            self.losses[index] += 1
+        self.bets = n = self.bets + 1
+        delta = net - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (net - self.mean)
+        if peak - bankroll > self.max_drawdown:
+            self.max_drawdown = peak - bankroll
+
+    def pop_bet(self):
+        """Remove the newest bet, restoring every figure it changed."""
+        previous = self._previous
+        self.max_drawdown = previous.pop()
+        self.m2 = previous.pop()
+        self.mean = previous.pop()
+        self.bets -= 1
+        index, won = divmod(self._bet_keys.pop(), 2)
+        if won:
+            self.wins[index] -= 1
+        else:
+            self.losses[index] -= 1
+
+    @property
+    def nbytes(self):
+        return sum(len(buffer) * buffer.itemsize for buffer in (self.runs, self._previous, self._bet_keys))
+
+    @property
+    def average_streak(self):
+        """Mean length of every streak so far, the current one included."""
+        count = len(self.runs) + (self.streak > 0)
+        return (self.run_total + self.streak) / count if count else 0.0
+
+    @property
+    def std(self):
+        """Sample standard deviation of bet outcomes."""
+        return math.sqrt(self.m2 / (self.bets - 1)) if self.bets > 1 else 0.0
+
+    def records(self):
+        """(strategy, wins, losses) of every strategy that has placed a bet."""
+        return [(strategy, won, lost) for strategy, won, lost in zip(self.strategies, self.wins, self.losses)
+                if won or lost]
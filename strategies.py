@@ -0,0 +1,148 @@
+"""Betting progressions declared as state machines, shared by the engine and the batch simulator."""
+import numpy as np
+
+# What a settled bet does to the level; the stake is base amount x level.
+KEEP, UP, DOWN, RESET = 0, 1, 2, 3
+START = ''  # Every progression starts in, and T3 returns to, the empty state
+
+
+class Progression:
+    """One betting progression, declared as a table instead of code.
+
+    `transitions` maps each state to {'win': (next state, action), 'loss':
+    (next state, action)}, where the action moves the level up, down (never
+    below 1), back to 1 or keeps it. A progression with no transitions has a
+    single state and never changes its level.
+
+    Two optional rules cover the parts of the tracker's progressions that
+    depend on money rather than on the win/loss sequence:
+      loss_limit: after losses totalling loss_limit x level x base since the
+        last level change, go up a level; a win that recovers that net loss,
+        or leaves the bankroll at its peak with profit, resets the level to 1.
+      cap_level: shrink the level whenever the bankroll cannot cover the stake.
+
+    `level_field`, `state_field` and `net_loss_field` name the SessionState
+    slots that hold the level, the list of results that spells the current
+    state and the loss_limit running total. compile()
+    turns the table into arrays indexed by [state, won] for BatchSession.
+    """
+
+    __slots__ = ('name', 'transitions', 'level_field', 'state_field', 'net_loss_field', 'label', 'loss_limit',
+                 'cap_level', 'states', 'static', 'next_state', 'step', 'reset')
+
+    def __init__(self, name, transitions=None, level_field=None, state_field=None, net_loss_field=None,
+                 label=None, loss_limit=None, cap_level=False):
+        self.name = name
+        self.transitions = transitions or {START: {'win': (START, KEEP), 'loss': (START, KEEP)}}
+        if START not in self.transitions:
+            raise ValueError(f"{name}: transitions must include the start state")
+        for state, moves in self.transitions.items():
+            for outcome in ('win', 'loss'):
+                target, action = moves[outcome]
+                if target not in self.transitions:
+                    raise ValueError(f"{name}: {state!r} moves to unknown state {target!r} on a {outcome}")
+                if action not in (KEEP, UP, DOWN, RESET):
+                    raise ValueError(f"{name}: unknown level action {action!r}")
+                if action != KEEP and level_field is None:
+                    raise ValueError(f"{name}: a level_field is needed to change the level")
+        if len(self.transitions) > 1 and state_field is None:
+            raise ValueError(f"{name}: a state_field is needed to track more than one state")
+        if (loss_limit is not None or cap_level) and level_field is None:
+            raise ValueError(f"{name}: a level_field is needed for loss_limit and cap_level")
+        if loss_limit is not None and net_loss_field is None:
+            raise ValueError(f"{name}: a net_loss_field is needed for loss_limit")
+        self.level_field = level_field
+        self.state_field = state_field
+        self.net_loss_field = net_loss_field
+        self.label = label or name
+        self.loss_limit = loss_limit
+        self.cap_level = cap_level
+        self.compile()
+
+    def compile(self):
+        """Build the [state, won] lookup tables the batch kernel steps through."""
+        self.states = (START,) + tuple(state for state in self.transitions if state != START)
+        index = {state: i for i, state in enumerate(self.states)}
+        n = len(self.states)
+        self.next_state = np.zeros((n, 2), dtype=np.int8)
+        self.step = np.zeros((n, 2), dtype=np.int64)  # Level change: +1 up, -1 down
+        self.reset = np.zeros((n, 2), dtype=bool)  # Level back to 1
+        for state, moves in self.transitions.items():
+            for won, outcome in enumerate(('loss', 'win')):
+                target, action = moves[outcome]
+                i = index[state]
+                self.next_state[i, won] = index[target]
+                self.step[i, won] = 1 if action == UP else -1 if action == DOWN else 0
+                self.reset[i, won] = action == RESET
+        # Nothing in the table ever changes: the level is left to the money rules.
+        self.static = n == 1 and not self.step.any() and not self.reset.any()
+
+    def move(self, state, level, outcome):
+        """Next (state, level) after a 'win' or 'loss' in `state`."""
+        target, action = self.transitions[state][outcome]
+        if action == UP:
+            level += 1
+        elif action == DOWN:
+            level = max(1, level - 1)
+        elif action == RESET:
+            level = 1
+        return target, level
+
+    def __repr__(self):
+        return f"Progression({self.name!r}, {len(self.states)} states)"
+
+
+T3_WINDOW = 3  # Bets T3 judges together
+LEVEL_UP_LOSSES = 5.0  # Flatbet Level Up's loss_limit: losses of this many stakes move up a level
+
+
+def _t3_verdict(wins, window):
+    """Level action for a finished T3 window holding `wins` wins."""
+    if 2 * wins > window:
+        return DOWN
+    return UP if 2 * wins < window else KEEP
+
+
+def _t3_transitions(window=T3_WINDOW):
+    """T3: judge every `window` bets; more wins than losses go down a level, more losses up, a tie keeps it.
+
+    The first win of each window also goes down a level straight away.
+    States spell the results so far in the current window.
+    """
+    if not 2 <= window <= 6:
+        raise ValueError("The T3 window must be 2 to 6 bets")
+    transitions = {START: {'win': ('W', DOWN), 'loss': ('L', KEEP)}}
+
+    def add(state):
+        if len(state) < window - 1:
+            transitions[state] = {'win': (state + 'W', KEEP), 'loss': (state + 'L', KEEP)}
+            add(state + 'W')
+            add(state + 'L')
+        else:
+            wins = state.count('W')
+            transitions[state] = {'win': (START, _t3_verdict(wins + 1, window)),
+                                  'loss': (START, _t3_verdict(wins, window))}
+
+    add('W')
+    add('L')
+    return transitions
+
+
+def t3(window=T3_WINDOW):
+    """The T3 progression, judged over `window` bets."""
+    return Progression("T3", _t3_transitions(window), level_field='t3_level', state_field='t3_results',
+                       cap_level=True)
+
+
+def flatbet_level_up(loss_limit=LEVEL_UP_LOSSES):
+    """Flatbet Level Up, moving up a level after losses of `loss_limit` stakes."""
+    return Progression("Flatbet Level Up", level_field='flatbet_level', net_loss_field='flatbet_net_loss',
+                       label="Flatbet Level", loss_limit=loss_limit)
+
+
+# Every strategy the tracker offers, in display order.
+PROGRESSIONS = {progression.name: progression for progression in (
+    Progression("Flatbet"),
+    flatbet_level_up(),
+    t3(),
+)}
@@ -0,0 +1,159 @@
+"""Parallel parameter sweep over money-management settings.
+
+Example:
+    python sweep.py sweep.csv --strategy all --base-amount 5 10 25 --stop-loss 0.6 0.8 --sessions 20000
+
+Rows are appended to the CSV as configurations finish; rerunning the same
+command skips configurations already in the file, so an interrupted sweep
+resumes where it stopped. The file opens with a comment line naming the
+sessions, hands and seed every row was run with, and a resume with other
+run settings is refused (read it with pandas.read_csv(path, comment='#')).
+"""
+import argparse
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import montecarlo
+from dominance import RULES, SESSION
+from engine import STRATEGIES
+
+PARAMETERS = ('strategy', 'base_amount', 'initial_bankroll', 'stop_loss', 'win_limit', 'profit_lock_multiple',
+              'window', 'rule')
+METRICS = (
+    'sessions', 'hands', 'mean_net', 'std_net', 'p05_net', 'p50_net', 'p95_net',
+    'mean_final_bankroll', 'mean_profit_lock', 'mean_max_drawdown', 'mean_hands_played',
+    'stop_loss_rate', 'win_limit_rate', 'depleted_rate',
+)
+FIELDS = ('config_id',) + PARAMETERS + METRICS
+
+
+def grid(strategies, base_amounts, initial_bankrolls, stop_losses, win_limits, profit_lock_multiples,
+         windows=(0,), rules=("Follow",)):
+    """Enumerate configurations in a fixed order; the position is the config id.
+
+    A window of 0 counts dominance over the whole session.
+    """
+    for values in itertools.product(strategies, base_amounts, initial_bankrolls, stop_losses,
+                                    win_limits, profit_lock_multiples, windows, rules):
+        yield dict(zip(PARAMETERS, values))
+
+
+def run_config(config_id, config, sessions, hands, seed):
+    """Simulate one configuration and summarise it; runs inside a worker process."""
+    # Each configuration gets its own stream keyed by its id, independent of scheduling.
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(config_id,)))
+    result = montecarlo.simulate(
+        sessions, hands, config['strategy'], seed=rng,
+        base_amount=config['base_amount'], initial_bankroll=config['initial_bankroll'],
+        stop_loss=config['stop_loss'], win_limit=config['win_limit'],
+        profit_lock_threshold=config['profit_lock_multiple'] * config['base_amount'],
+        window=config['window'] or SESSION, rule=config['rule'])
+    net = result['final_bankroll'] + result['profit_lock'] - config['initial_bankroll']
+    p05, p50, p95 = np.percentile(net, [5, 50, 95])
+    exits = np.bincount(result['exit'], minlength=len(montecarlo.EXIT_NAMES)) / sessions
+    row = {'config_id': config_id, **config}
+    row.update({
+        'sessions': sessions,
+        'hands': hands,
+        'mean_net': net.mean(),
+        'std_net': net.std(),
+        'p05_net': p05,
+        'p50_net': p50,
+        'p95_net': p95,
+        'mean_final_bankroll': result['final_bankroll'].mean(),
+        'mean_profit_lock': result['profit_lock'].mean(),
+        'mean_max_drawdown': result['max_drawdown'].mean(),
+        'mean_hands_played': result['hands_played'].mean(),
+        'stop_loss_rate': exits[montecarlo.EXIT_STOP_LOSS],
+        'win_limit_rate': exits[montecarlo.EXIT_WIN_LIMIT],
+        'depleted_rate': exits[montecarlo.EXIT_DEPLETED],
+    })
+    return row
+
+
+def run_header(sessions, hands, seed):
+    """The comment line that opens a sweep file, naming the run settings its rows share."""
+    return f"# sessions={sessions} hands={hands} seed={seed}\n"
+
+
+def completed(path, configs, header):
+    """Return the config ids already written to `path`, checking they match this grid and run header."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return set()
+    done = set()
+    with open(path, newline='') as f:
+        found = f.readline()
+        if found != header:
+            written = found.strip().lstrip('# ') if found.startswith('#') else "no run settings"
+            raise ValueError(f"{path} was written with {written}, not {header.strip().lstrip('# ')}; "
+                             "use a new output file.")
+        for row in csv.DictReader(f):
+            config_id = int(row['config_id'])
+            expected = configs.get(config_id)
+            if expected is None or any(str(expected[name]) != row[name] for name in PARAMETERS):
+                raise ValueError(f"{path} was written by a different grid (config {config_id}); use a new output file.")
+            done.add(config_id)
+    return done
+
+
+def sweep(path, configs, sessions=10000, hands=200, seed=0, workers=None):
+    """Run every configuration not yet in `path` across a process pool, appending rows as they finish."""
+    configs = dict(enumerate(configs))
+    header = run_header(sessions, hands, seed)
+    done = completed(path, configs, header)
+    pending = [config_id for config_id in configs if config_id not in done]
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, 'a', newline='') as f, ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        if new_file:
+            f.write(header)
+            writer.writeheader()
+            f.flush()
+        futures = [pool.submit(run_config, config_id, configs[config_id], sessions, hands, seed)
+                   for config_id in pending]
+        for count, future in enumerate(as_completed(futures), 1):
+            writer.writerow(future.result())
+            f.flush()
+            print(f"\r{len(done) + count}/{len(configs)} configurations", end='', flush=True)
+    print()
+    return len(pending)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep money-management settings with the Monte Carlo simulator.")
+    parser.add_argument('output', help="CSV file to append results to")
+    parser.add_argument('--strategy', nargs='+', default=["Flatbet"],
+                        help="Strategies to sweep, or 'all'")
+    parser.add_argument('--base-amount', nargs='+', type=float, default=[10.0])
+    parser.add_argument('--initial-bankroll', nargs='+', type=float, default=[1000.0])
+    parser.add_argument('--stop-loss', nargs='+', type=float, default=[0.8])
+    parser.add_argument('--win-limit', nargs='+', type=float, default=[1.5])
+    parser.add_argument('--profit-lock-multiple', nargs='+', type=float, default=[2.0],
+                        help="Profit lock threshold as a multiple of the base amount")
+    parser.add_argument('--window', nargs='+', type=int, default=[0],
+                        help="Dominance windows in pairs; 0 counts the whole session")
+    parser.add_argument('--rule', nargs='+', choices=RULES, default=["Follow"])
+    parser.add_argument('--sessions', type=int, default=10000, help="Sessions per configuration")
+    parser.add_argument('--hands', type=int, default=200, help="Hands per session")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    strategies = list(STRATEGIES) if args.strategy == ['all'] else args.strategy
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            parser.error(f"unknown strategy {strategy!r}; choose from {', '.join(STRATEGIES)} or 'all'")
+    configs = grid(strategies, args.base_amount, args.initial_bankroll, args.stop_loss,
+                   args.win_limit, args.profit_lock_multiple, args.window, args.rule)
+    try:
+        sweep(args.output, configs, args.sessions, args.hands, args.seed, args.workers)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+
+if __name__ == "__main__":
+    main()
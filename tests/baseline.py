@@ -0,0 +1,323 @@
+"""The tracker's original record_result logic, as it ran in app.py before engine.Session.
+
+A line-for-line port with st.session_state replaced by attributes of a
+Tracker, alert ids dropped, inputs passed as arguments and the two identical
+profit-lock blocks shared in _lock. It is kept only as the reference the
+parity tests replay shoes against, bugs included; do not fix it.
+"""
+from collections import deque
+
+
+class Tracker:
+    def __init__(self):
+        self.pair_types = deque(maxlen=100)  # Store up to 100 pairs
+        self.results = deque(maxlen=200)  # Store raw results
+        self.base_amount = 10.0
+        self.result_tracker = 1000.0  # Start with initial bankroll
+        self.peak_bankroll = 1000.0  # Track highest bankroll
+        self.session_profit = 0.0  # Track profits separately
+        self.profit_lock = 0.0
+        self.previous_result = None
+        self.state_history = []
+        self.next_prediction = "N/A"
+        self.current_dominance = "N/A"
+        self.bet_amount = 10.0
+        self.max_profit = 0.0
+        self.stats = {
+            'wins': 0,
+            'losses': 0,
+            'ties': 0,
+            'streaks': [],
+            'odd_pairs': 0,
+            'even_pairs': 0,
+            'alternating_pairs': 0,
+            'bet_history': []
+        }
+        self.alerts = []  # (type, message) of every alert raised
+        self.profit_lock_threshold = 2 * self.base_amount
+        # Money management variables
+        self.betting_strategy = "Flatbet"
+        self.t3_level = 1
+        self.t3_results = []
+        self.flatbet_level = 1  # Flatbet Level Up level
+        self.flatbet_net_loss = 0.0  # Track net loss for Flatbet Level Up
+        self.stop_loss = 0.8  # Stop at 80% of initial bankroll
+        self.win_limit = 1.5  # Win at 150% of initial bankroll
+        self.initial_bankroll = 1000.0  # Default initial bankroll
+        self.game_count = 0  # Track number of recorded games
+
+    def alert(self, alert_type, message):
+        self.alerts.append((alert_type, message))
+
+    def set_money_management(self, base_amount, initial_bankroll):
+        if 1 <= base_amount <= 100:
+            if initial_bankroll >= 10:
+                if base_amount > initial_bankroll * 0.05:
+                    self.alert("warning", "Base amount exceeds 5% of initial bankroll, which may be risky.")
+                self.base_amount = base_amount
+                self.initial_bankroll = initial_bankroll
+                self.result_tracker = initial_bankroll
+                self.peak_bankroll = initial_bankroll
+                self.session_profit = 0.0
+                self.profit_lock_threshold = 2 * base_amount
+                self.bet_amount = base_amount
+                self.game_count = 0
+                self.alert("success", f"Base amount (${base_amount:.2f}) and initial bankroll (${initial_bankroll:.2f}) updated successfully.")
+            else:
+                self.alert("error", "Initial bankroll must be at least $10.")
+        else:
+            self.alert("error", "Base amount must be between $1 and $100.")
+
+    def set_betting_strategy(self, strategy):
+        self.betting_strategy = strategy
+        if self.betting_strategy == "T3":
+            self.t3_level = 1
+            self.t3_results = []
+        elif self.betting_strategy == "Flatbet Level Up":
+            self.flatbet_level = 1
+            self.flatbet_net_loss = 0.0
+        self.bet_amount = self.base_amount
+        self.alert("success", f"Betting strategy set to {self.betting_strategy}.")
+
+    def reset_betting(self):
+        self.result_tracker = self.initial_bankroll
+        self.peak_bankroll = self.initial_bankroll
+        self.session_profit = 0.0
+        self.bet_amount = self.base_amount
+        self.max_profit = 0.0
+        self.next_prediction = "N/A"
+        self.current_dominance = "N/A"
+        self.t3_level = 1
+        self.t3_results = []
+        self.flatbet_level = 1
+        self.flatbet_net_loss = 0.0
+        self.game_count = 0
+        self.alert("success", "Betting parameters reset.")
+
+    def apply_betting_strategy(self, outcome, result, bet_selection):
+        bet_amount = self.bet_amount
+        bet_outcome = None
+
+        if self.betting_strategy == "Flatbet":
+            bet_amount = min(self.base_amount, self.result_tracker)
+        elif self.betting_strategy == "Flatbet Level Up":
+            bet_amount = min(self.base_amount * self.flatbet_level, self.result_tracker)
+            if outcome:
+                if outcome == 'win':
+                    new_bankroll = self.result_tracker + (bet_amount * 0.95 if bet_selection == "Banker" else bet_amount)
+                    self.flatbet_net_loss += bet_amount  # Net loss decreases with a win
+                    if self.flatbet_net_loss >= 0 or (new_bankroll >= self.peak_bankroll and self.session_profit >= 0):
+                        self.flatbet_level = 1
+                        self.flatbet_net_loss = 0.0
+                        if new_bankroll >= self.peak_bankroll and self.session_profit >= 0:
+                            self.alert("success", f"Bankroll reached peak (${new_bankroll:.2f}) with profit. Flatbet Level reset to 1.")
+                elif outcome == 'loss':
+                    self.flatbet_net_loss -= bet_amount  # Net loss increases with a loss
+                    threshold = -5.0 * self.flatbet_level * self.base_amount
+                    if self.flatbet_net_loss <= threshold:
+                        self.flatbet_level += 1
+                        self.flatbet_net_loss = 0.0  # Reset net loss after leveling up
+            # Ensure bet_amount is updated for the next bet
+            next_bet = self.base_amount * self.flatbet_level
+            self.bet_amount = min(next_bet, self.result_tracker)
+        elif self.betting_strategy == "T3":
+            proposed_bet = self.base_amount * self.t3_level
+            bet_amount = min(proposed_bet, self.result_tracker)
+            if bet_amount < proposed_bet:
+                self.t3_level = max(1, int(bet_amount / self.base_amount))
+                self.alert("warning", f"T3 bet reduced to ${bet_amount:.2f} due to bankroll limit.")
+
+            # Update T3 results based on outcome
+            if outcome:
+                if outcome == 'win':
+                    if len(self.t3_results) == 0:  # First result in sequence
+                        self.t3_level = max(1, self.t3_level - 1)
+                    self.t3_results.append('W')
+                elif outcome == 'loss':
+                    self.t3_results.append('L')
+
+                # Update T3 level after 3 results
+                if len(self.t3_results) == 3:
+                    wins = self.t3_results.count('W')
+                    losses = self.t3_results.count('L')
+                    if wins > losses:
+                        self.t3_level = max(1, self.t3_level - 1)
+                    elif losses > wins:
+                        self.t3_level += 1
+                    self.t3_results = []
+
+            # Cap T3 level to prevent excessive bets
+            max_t3_bet = self.result_tracker / self.base_amount
+            self.t3_level = min(self.t3_level, max(1, int(max_t3_bet)))
+
+        # Update bet amount for next round
+        if self.betting_strategy == "Flatbet":
+            next_bet = self.base_amount
+        elif self.betting_strategy == "Flatbet Level Up":
+            next_bet = self.base_amount * self.flatbet_level
+        else:  # T3
+            next_bet = self.base_amount * self.t3_level
+        self.bet_amount = min(next_bet, self.result_tracker)
+
+        return bet_amount, bet_outcome
+
+    def _lock(self):
+        lock_amount = self.session_profit
+        self.profit_lock += lock_amount
+        self.session_profit = 0.0
+        self.result_tracker = self.initial_bankroll
+        self.peak_bankroll = self.initial_bankroll
+        self.bet_amount = self.base_amount
+        self.t3_level = 1
+        self.t3_results = []
+        self.flatbet_level = 1
+        self.flatbet_net_loss = 0.0
+        return lock_amount
+
+    def record_result(self, result):
+        if self.initial_bankroll > 0:
+            if self.result_tracker <= self.initial_bankroll * self.stop_loss:
+                self.alert("warning", f"Stop-loss reached ({self.stop_loss*100:.0f}% of initial bankroll). Please reset betting to continue.")
+                return
+            if self.session_profit >= self.initial_bankroll * (self.win_limit - 1):
+                lock_amount = self._lock()
+                self.alert("success", f"Win limit reached! Locked ${lock_amount:.2f}. Total locked: ${self.profit_lock:.2f}. Please reset betting.")
+                return
+
+        self.game_count += 1
+
+        state = {
+            'pair_types': list(self.pair_types),
+            'results': list(self.results),
+            'previous_result': self.previous_result,
+            'result_tracker': self.result_tracker,
+            'peak_bankroll': self.peak_bankroll,
+            'session_profit': self.session_profit,
+            'profit_lock': self.profit_lock,
+            'stats': self.stats.copy(),
+            'next_prediction': self.next_prediction,
+            'current_dominance': self.current_dominance,
+            'bet_amount': self.bet_amount,
+            'max_profit': self.max_profit,
+            't3_level': self.t3_level,
+            't3_results': self.t3_results.copy(),
+            'betting_strategy': self.betting_strategy,
+            'flatbet_level': self.flatbet_level,
+            'flatbet_net_loss': self.flatbet_net_loss,
+            'initial_bankroll': self.initial_bankroll,
+            'game_count': self.game_count
+        }
+        self.state_history.append(state)
+
+        if result == 'T':
+            self.stats['ties'] += 1
+            self.previous_result = result
+            self.alert("info", "Tie recorded.")
+            return
+
+        self.results.append(result)
+
+        if self.previous_result is None or self.previous_result == 'T':
+            self.previous_result = result
+            self.next_prediction = "N/A"
+            self.alert("info", f"Result {result} recorded.")
+            return
+
+        pair = (self.previous_result, result)
+        self.pair_types.append(pair)
+        pair_type = "Even" if pair[0] == pair[1] else "Odd"
+        self.stats['odd_pairs' if pair_type == "Odd" else 'even_pairs'] += 1
+
+        if len(self.pair_types) >= 2:
+            last_two_pairs = list(self.pair_types)[-2:]
+            if last_two_pairs[0][1] != last_two_pairs[1][1]:
+                self.stats['alternating_pairs'] += 1
+
+        if len(self.pair_types) >= 5:
+            odd_count = self.stats['odd_pairs']
+            even_count = self.stats['even_pairs']
+            if odd_count > even_count:
+                self.current_dominance = "Odd"
+                self.next_prediction = "Player" if result == "B" else "Banker"
+            else:
+                self.current_dominance = "Even"
+                self.next_prediction = "Player" if result == "P" else "Banker"
+
+            if self.bet_amount == 0.0:
+                self.bet_amount = min(self.base_amount, self.result_tracker)
+
+            if len(self.pair_types) >= 6:
+                previous_prediction = self.state_history[-1]['next_prediction']
+                if previous_prediction != "N/A":
+                    bet_amount, _ = self.apply_betting_strategy(None, result, previous_prediction)
+                    if bet_amount > 0:
+                        if (previous_prediction == "Player" and result == "P") or \
+                           (previous_prediction == "Banker" and result == "B"):
+                            win_amount = bet_amount * 0.95 if previous_prediction == "Banker" else bet_amount
+                            self.result_tracker += win_amount
+                            self.session_profit += win_amount
+                            self.stats['wins'] += 1
+                            outcome = 'win'
+                            if self.session_profit >= self.profit_lock_threshold:
+                                lock_amount = self._lock()
+                                self.alert("success", f"Profit locked at ${lock_amount:.2f}. Total locked: ${self.profit_lock:.2f}.")
+                            elif self.session_profit > self.max_profit:
+                                self.max_profit = self.session_profit
+                                self.alert("success", f"New max profit: ${self.max_profit:.2f}")
+                        else:
+                            bet_amount = min(bet_amount, self.result_tracker)
+                            self.result_tracker -= bet_amount
+                            self.session_profit -= bet_amount
+                            self.stats['losses'] += 1
+                            outcome = 'loss'
+                            self.alert("error", f"Loss! -${bet_amount:.2f}")
+                            if self.result_tracker <= 0:
+                                self.alert("error", "Bankroll depleted! Please reset betting to continue.")
+                                return
+
+                        self.apply_betting_strategy(outcome, result, previous_prediction)
+
+                        # Update peak bankroll after the bet
+                        self.peak_bankroll = max(self.peak_bankroll, self.result_tracker)
+
+                        self.stats['bet_history'].append({
+                            'Bet': previous_prediction,
+                            'Result': result,
+                            'Amount': bet_amount,
+                            'Outcome': 'Win' if outcome == 'win' else 'Loss',
+                            'Bankroll': self.result_tracker,
+                            'Profit': self.session_profit,
+                            'Strategy': self.betting_strategy,
+                            'T3_Level': self.t3_level if self.betting_strategy == "T3" else None,
+                            'Flatbet_Level': self.flatbet_level if self.betting_strategy == "Flatbet Level Up" else None
+                        })
+
+        self.previous_result = result
+        self.alert("info", f"Result {result} recorded. Next bet: {self.next_prediction} (${self.bet_amount:.2f})")
+
+    def undo(self):
+        if not self.state_history:
+            self.alert("error", "No actions to undo.")
+            return
+
+        last_state = self.state_history.pop()
+        self.pair_types = deque(last_state['pair_types'], maxlen=100)
+        self.results = deque(last_state['results'], maxlen=200)
+        self.previous_result = last_state['previous_result']
+        self.result_tracker = last_state['result_tracker']
+        self.peak_bankroll = last_state['peak_bankroll']
+        self.session_profit = last_state['session_profit']
+        self.profit_lock = last_state['profit_lock']
+        self.stats = last_state['stats']
+        self.next_prediction = last_state['next_prediction']
+        self.current_dominance = last_state['current_dominance']
+        self.bet_amount = last_state['bet_amount']
+        self.max_profit = last_state['max_profit']
+        self.t3_level = last_state['t3_level']
+        self.t3_results = last_state['t3_results']
+        self.betting_strategy = last_state['betting_strategy']
+        self.flatbet_level = last_state['flatbet_level']
+        self.flatbet_net_loss = last_state['flatbet_net_loss']
+        self.initial_bankroll = last_state['initial_bankroll']
+        self.game_count = last_state['game_count']
+        self.alert("success", "Last action undone.")
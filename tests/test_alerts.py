@@ -0,0 +1,56 @@
+"""Alert ring bounding, coalescing and IDs."""
+import pytest
+
+from alerts import AlertLog
+
+
+def messages(log):
+    return [alert.message for alert in log]
+
+
+def test_ring_evicts_oldest_at_capacity():
+    log = AlertLog(capacity=3)
+    for i in range(3):
+        log.add("info", f"m{i}")
+    assert messages(log) == ["m0", "m1", "m2"]
+    log.add("info", "m3")
+    assert len(log) == 3 and messages(log) == ["m1", "m2", "m3"]
+    # A coalesced repeat is not a new row: nothing is evicted, the repeat moves to the newest slot.
+    log.add("warning", "m1")
+    assert messages(log) == ["m2", "m3", "m1"]
+    log.add("info", "m4")
+    assert messages(log) == ["m3", "m1", "m4"]
+    with pytest.raises(ValueError):
+        AlertLog(capacity=0)
+
+
+def test_repeats_coalesce_by_message_or_key():
+    log = AlertLog()
+    first = log.add("info", "Bankroll low")
+    again = log.add("warning", "Bankroll low")
+    assert again is first and first.count == 2 and first.type == "warning" and len(log) == 1
+    keyed = log.add("info", "Level 2", key="level")
+    log.add("info", "Level 3", key="level")
+    assert len(log) == 2 and keyed.count == 2 and keyed.message == "Level 3"
+    assert log.add("info", "Level 3") is not keyed  # Without the key, a new row
+
+
+def test_ids_increase_across_coalescing_eviction_and_clear():
+    log = AlertLog(capacity=2)
+    ids = [log.add("info", message).id for message in ("a", "b", "a", "c")]
+    assert ids == [1, 2, 3, 4]
+    log.clear()
+    assert len(log) == 0 and log.add("info", "a").id == 5
+
+
+def test_latest_and_filtering():
+    log = AlertLog(capacity=4, min_severity="warning")
+    assert log.add("info", "quiet") is None
+    for message in "abcd":
+        log.add("error", message)
+    assert [alert.message for alert in log.latest(2)] == ["c", "d"]
+    assert [alert.message for alert in log.latest(10)] == list("abcd")
+    assert log.latest(0) == []
+    with log.suppressed():
+        assert log.muted and log.add("error", "e") is None
+    assert not log.muted and len(log) == 4
@@ -0,0 +1,60 @@
+"""Third-card tableau, burn and cut card of the card-accurate dealer."""
+import numpy as np
+import pytest
+
+import cards
+from cards import BANKER_DRAWS, CUT_CARD, NO_HAND, deal_hand, deal_shoes
+from montecarlo import BANKER, PLAYER, TIE
+
+
+def test_banker_tableau():
+    # Banker total -> player third cards on which the Banker draws.
+    table = {0: range(10), 1: range(10), 2: range(10), 3: [0, 1, 2, 3, 4, 5, 6, 7, 9],
+             4: range(2, 8), 5: range(4, 8), 6: range(6, 8), 7: [], 8: [], 9: []}
+    for total, draws in table.items():
+        assert np.flatnonzero(BANKER_DRAWS[total]).tolist() == list(draws)
+
+
+# Cards in dealing order: Player, Banker, Player, Banker, then the third cards.
+@pytest.mark.parametrize('dealt, outcome, used', [
+    ([4, 9, 4, 9, 0, 0], TIE, 4),  # Natural 8 against 8: nobody draws
+    ([2, 1, 3, 2, 8, 4], TIE, 5),  # Player 5 draws an 8 to 3; Banker 3 stands on a third 8
+    ([2, 1, 3, 2, 7, 4], BANKER, 6),  # Banker 3 draws on a third 7: 7 beats 2
+    ([3, 2, 3, 3, 1, 9], TIE, 5),  # Player stands on 6; Banker 5 draws the fifth card to 6
+    ([1, 3, 4, 3, 6, 2], BANKER, 6),  # Banker 6 draws on a third 6: 8 beats 1
+    ([1, 3, 4, 3, 2, 2], PLAYER, 5),  # Banker 6 stands on a third 2: 7 beats 6
+])
+def test_deal_hand(dealt, outcome, used):
+    result, count = deal_hand(np.array([dealt], dtype=np.int8), np.array([0]))
+    assert (result[0], count[0]) == (outcome, used)
+
+
+def fixed_shoe(monkeypatch, burn, length=60):
+    """Make deal_shoes deal one shoe: a burn card, the cards it burns, then Player naturals of four cards."""
+    hands = [9, 0, 0, 0] * length
+    burned = 10 if burn == 0 else burn
+    shoe = np.array(([burn] + [0] * burned + hands)[:length], dtype=np.int8)
+    monkeypatch.setattr(cards, 'shuffled', lambda shoes, decks, rng: shoe[None, :])
+    return 1 + burned
+
+
+@pytest.mark.parametrize('burn', [1, 3, 0])
+def test_burn_and_cut_card(monkeypatch, burn):
+    start = fixed_shoe(monkeypatch, burn)
+    outcomes, dealt = deal_shoes(1)
+    # The hand that takes the position past the cut card is finished, then one more is dealt.
+    end = 60 - CUT_CARD
+    expected = -(-(end - start) // 4) + 1
+    assert dealt.tolist() == [expected]
+    # A misaligned burn would deal Banker naturals or zeros instead.
+    assert outcomes[0, :expected].tolist() == [PLAYER] * expected
+    assert (outcomes[0, expected:] == NO_HAND).all()
+
+
+def test_outcome_frequencies():
+    outcomes, dealt = deal_shoes(3000, rng=0)
+    played = outcomes[outcomes != NO_HAND]
+    shares = np.bincount(played, minlength=3) / len(played)
+    # Eight-deck probabilities; about 200,000 hands leave a standard error near 0.0011.
+    np.testing.assert_allclose(shares[[PLAYER, BANKER, TIE]], [0.446247, 0.458597, 0.095156], atol=0.005)
+    assert 70 <= dealt.mean() <= 90
@@ -0,0 +1,66 @@
+"""Downsampling keeps the endpoints, extremes and shape of a series."""
+import numpy as np
+import pytest
+
+from charts import lttb, minmax, rolling_accuracy
+
+
+def naive_lttb(y, points):
+    """Largest-Triangle-Three-Buckets one bucket at a time, on the same bucket edges as lttb."""
+    n = len(y)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    buckets = [range(edges[i], edges[i + 1]) for i in range(points - 2)]
+    keep = [0]
+    for i, bucket in enumerate(buckets):
+        if i + 1 < len(buckets):
+            nxt = buckets[i + 1]
+            cx, cy = (nxt[0] + nxt[-1]) / 2, sum(y[j] for j in nxt) / len(nxt)
+        else:
+            cx, cy = n - 1, y[n - 1]
+        a = keep[-1]
+        areas = [abs((a - cx) * (y[j] - y[a]) - (a - j) * (cy - y[a])) for j in bucket]
+        keep.append(bucket[int(np.argmax(areas))])
+    return keep + [n - 1]
+
+
+def walk(n, seed):
+    return 1000 + np.cumsum(np.random.default_rng(seed).choice([-10.0, 9.5], size=n))
+
+
+@pytest.mark.parametrize('n, points', [(10, 5), (101, 7), (5000, 300), (100_003, 2000)])
+def test_lttb_matches_naive_buckets(n, points):
+    y = walk(n, n)
+    keep = lttb(y, points)
+    assert len(keep) == points and keep[0] == 0 and keep[-1] == n - 1
+    assert (np.diff(keep) > 0).all()
+    if n < 10_000:
+        assert keep.tolist() == naive_lttb(y, points)
+
+
+def test_lttb_keeps_a_spike_and_short_series():
+    y = np.zeros(1000)
+    y[517], y[200] = 50.0, -50.0
+    keep = lttb(y, 20)
+    assert 517 in keep and 200 in keep
+    assert lttb(y[:20], 20).tolist() == list(range(20))
+
+
+@pytest.mark.parametrize('n, points', [(2001, 2000), (5000, 100), (99_999, 2000), (100, 10)])
+def test_minmax_keeps_endpoints_and_extremes(n, points):
+    y = np.random.default_rng(n).integers(1, 9, size=n)
+    keep = minmax(y, points)
+    assert len(keep) <= points and keep[0] == 0 and keep[-1] == n - 1
+    assert (np.diff(keep) > 0).all()
+    buckets = (points - 2) // 2
+    size = -(-n // buckets)
+    for start in range(0, n, size):
+        bucket = y[start:start + size]
+        kept = y[keep[(keep >= start) & (keep < start + size)]]
+        assert kept.min() == bucket.min() and kept.max() == bucket.max()
+    assert minmax(y[:points], points).tolist() == list(range(points))
+
+
+def test_rolling_accuracy():
+    wins = [1, 0, 1, 1, 0, 0, 1]
+    np.testing.assert_allclose(rolling_accuracy(wins, window=3),
+                               [1, 1 / 2, 2 / 3, 2 / 3, 2 / 3, 1 / 3, 1 / 3])
@@ -0,0 +1,127 @@
+"""Replay seeded random shoes through the original tracker logic and engine.Session and compare every hand."""
+import random
+
+import pytest
+
+from baseline import Tracker
+from engine import Session
+
+STRATEGIES = ("Flatbet", "Flatbet Level Up", "T3")
+SEEDS = range(40)
+SCALARS = (
+    'result_tracker', 'peak_bankroll', 'session_profit', 'profit_lock', 'next_prediction', 'current_dominance',
+    'bet_amount', 'max_profit', 't3_level', 't3_results', 'flatbet_level', 'flatbet_net_loss', 'previous_result',
+)
+COUNTS = ('wins', 'losses', 'ties', 'odd_pairs', 'even_pairs', 'alternating_pairs')
+# Alerts that mark the money-management paths the shoes must reach.
+PATHS = {
+    'stop_loss': "Stop-loss reached",
+    'win_limit': "Win limit reached",
+    'profit_lock': "Profit locked",
+    't3_cap': "T3 bet reduced",
+    'depleted': "Bankroll depleted",
+}
+
+
+def shoe(rng):
+    """A random shoe: 'P', 'B', 'T' hands with an occasional 'R' (reset betting)."""
+    resets = 0.02 if rng.random() < 0.3 else 0.0
+    return rng.choices(('P', 'B', 'T', 'R'), (0.44, 0.45, 0.09, resets), k=rng.randint(1, 400))
+
+
+def compare(tracker, session, undone):
+    s = session.state
+    for name in SCALARS:
+        assert getattr(s, name) == getattr(tracker, name), name
+    if not undone:
+        # The original undo copied the game count after counting the undone hand.
+        assert s.game_count == tracker.game_count
+        # ...and shared the bet history list with the snapshot, so undo never removed a bet.
+        assert list(s.bet_history) == tracker.stats['bet_history']
+    for name in COUNTS:
+        assert getattr(s, name) == tracker.stats[name], name
+    assert [r for r in s.results.recent(len(s.results)) if r != 'T'][-200:] == list(tracker.results)
+    assert s.results.pairs(100) == list(tracker.pair_types)
+    latest = session.alerts.latest(1)[0]
+    assert (latest.type, latest.message) == tracker.alerts[-1]
+
+
+def replay(strategy, seed, undo_every=0):
+    """Play one seeded shoe through both; return the PATHS the shoe reached."""
+    rng = random.Random(seed)
+    base = rng.choice((1.0, 10.0, 25.0, 100.0))
+    bankroll = rng.choice((10.0, 20.0, 200.0, 1000.0, 5000.0))
+    tracker = Tracker()
+    session = Session()
+    tracker.set_money_management(base, bankroll)
+    session.configure(base, bankroll)
+    tracker.set_betting_strategy(strategy)
+    session.set_strategy(strategy)
+    if undo_every:
+        # Session journals a win-limit lock so undo reverts it; the original
+        # kept no snapshot for it, so the two only agree without the lock.
+        tracker.win_limit = session.state.win_limit = float('inf')
+    reached = set()
+    undone = False
+    for i, hand in enumerate(shoe(rng)):
+        level = tracker.flatbet_level
+        raised = len(tracker.alerts)
+        # Session also journals settings changes, which the original could not undo.
+        if undo_every and i % undo_every == undo_every - 1 and tracker.state_history:
+            tracker.undo()
+            session.undo()
+            undone = True
+        elif hand == 'R':
+            tracker.reset_betting()
+            session.reset_betting()
+        else:
+            tracker.record_result(hand)
+            session.record(hand)
+            if any(message.startswith(PATHS['depleted']) for _, message in tracker.alerts[raised:]):
+                # The original left previous_result on the hand before a depleting one, so the next
+                # pair started a hand early; Session moves it on as ResultLog.pairs() does.
+                tracker.previous_result = hand
+        compare(tracker, session, undone)
+        for _, message in tracker.alerts[raised:]:
+            reached.update(path for path, text in PATHS.items() if message.startswith(text))
+        if tracker.flatbet_level > level:
+            reached.add('level_up')
+    return reached
+
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_parity(strategy, seed):
+    replay(strategy, seed)
+
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+@pytest.mark.parametrize('seed', SEEDS[:15])
+@pytest.mark.parametrize('undo_every', (7, 13))
+def test_parity_with_undo(strategy, seed, undo_every):
+    replay(strategy, seed, undo_every)
+
+
+def test_shoes_reach_every_path():
+    reached = set()
+    for strategy in STRATEGIES:
+        for seed in SEEDS:
+            reached |= replay(strategy, seed)
+    assert reached >= set(PATHS) | {'level_up'}
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_pair_counts_follow_result_log_through_depletion(seed):
+    rng = random.Random(seed)
+    session = Session()
+    session.configure(10.0, 10.0)  # A single lost bet depletes the bankroll
+    depleted = 0
+    for hand in rng.choices(('P', 'B', 'T'), (0.44, 0.45, 0.09), k=300):
+        session.record(hand)
+        s = session.state
+        if s.result_tracker <= 0:
+            depleted += 1
+            session.reset_betting()
+        pairs = s.results.pairs(len(s.results))
+        assert (s.odd_pairs, s.even_pairs) == (sum(a != b for a, b in pairs), sum(a == b for a, b in pairs))
+    assert depleted
@@ -0,0 +1,135 @@
+"""Columnar bet history paging, packed result log and compacted undo journal round trips."""
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from engine import OUTCOMES, STRATEGIES, WEIGHTS
+from history import HOT_HANDS, JOURNAL_BLOCK, BetHistory, Journal, ResultLog
+
+
+def hands(count, seed=0):
+    return random.Random(seed).choices(OUTCOMES, WEIGHTS, k=count)
+
+
+def bet_history(count):
+    history = BetHistory(STRATEGIES)
+    for i in range(count):
+        history.append("Banker" if i % 3 else "Player", "B" if i % 2 else "P", 10.0 + i, i % 2,
+                       1000.0 + i, 0.0, STRATEGIES[i % len(STRATEGIES)], t3_level=i % 4)
+    return history
+
+
+@pytest.mark.parametrize('count', [0, 1, 63, 64, 65, 255, 256, 257, 1000])
+def test_bet_history_columns_grow_and_flush(count):
+    history = bet_history(count)
+    assert len(history) == count
+    assert history.column('amount').tolist() == [10.0 + i for i in range(count)]
+    assert history.capacity >= count and history.capacity in (64, 128, 256, 512, 1024)
+    if count:
+        assert history[-1] == {
+            'Bet': "Banker" if (count - 1) % 3 else "Player", 'Result': "B" if (count - 1) % 2 else "P",
+            'Amount': 9.0 + count, 'Outcome': "Win" if (count - 1) % 2 else "Loss", 'Bankroll': 999.0 + count,
+            'Profit': 0.0, 'Strategy': STRATEGIES[(count - 1) % len(STRATEGIES)],
+            'T3_Level': (count - 1) % 4 or None, 'Flatbet_Level': None,
+        }
+    copy = pickle.loads(pickle.dumps(history))
+    assert list(copy) == list(history)
+    with pytest.raises(IndexError):
+        history.row(count)
+
+
+@pytest.mark.parametrize('count, page_size, pages', [(0, 200, 1), (1, 200, 1), (200, 200, 1), (201, 200, 2),
+                                                     (400, 200, 2), (450, 100, 5)])
+def test_bet_history_pages_at_boundaries(count, page_size, pages):
+    history = bet_history(count)
+    assert history.pages(page_size) == pages
+    seen = []
+    for page in range(pages):
+        frame = history.page(page, page_size)
+        assert 0 < len(frame) <= page_size or count == 0
+        seen = list(frame.index) + seen  # Newest first: each page is older than the one before
+    assert seen == list(range(count))
+    assert len(history.page(pages, page_size)) == 0
+    if count:
+        assert len(history.page(pages - 1, page_size)) == count - (pages - 1) * page_size
+
+
+def test_bet_history_page_cache_follows_truncate():
+    history = bet_history(300)
+    newest = history.page(0, 100)
+    assert history.page(0, 100) is newest
+    history.truncate(250)
+    history.append("Player", "P", 1.0, 1, 1.0, 0.0, STRATEGIES[0])
+    history.truncate(250)  # Same size as before the append, but a different history
+    history.append("Player", "P", 2.0, 1, 1.0, 0.0, STRATEGIES[0])
+    page = history.page(0, 100)
+    assert page is not newest and list(page.index) == list(range(151, 251))
+    assert page['Amount'].iloc[-1] == 2.0
+    np.testing.assert_allclose(history.net(247, 251), [257.0 * 0.95, -258.0, 259.0, 2.0])  # Banker pays 0.95
+
+
+def naive_pairs(results, count):
+    ends = [i for i in range(1, len(results)) if results[i] != 'T' and results[i - 1] != 'T']
+    return [(results[i - 1], results[i]) for i in ends[len(ends) - count:]] if count else []
+
+
+@pytest.mark.parametrize('count', [0, 1, 3, 4, 5, 8, 9, HOT_HANDS + 1, 1001])
+def test_result_log_round_trip(count):
+    results = hands(count, seed=count)
+    log = ResultLog(results)
+    assert len(log) == count
+    assert log.nbytes == -(-count // 4)  # Four hands to a byte, growing a byte at a time
+    assert list(log) == results
+    assert [log[i] for i in range(-count, count)] == results + results
+    assert log.recent(HOT_HANDS) == results[-HOT_HANDS:]
+    copy = pickle.loads(pickle.dumps(log))
+    assert list(copy) == results and copy.recent() == log.recent()
+
+
+def test_codes_slices_across_byte_boundaries():
+    results = hands(37)
+    log = ResultLog(results)
+    letters = ' PBT'
+    for start in range(0, 38, 3):
+        for stop in range(start, 38, 5):
+            assert [letters[code] for code in log.codes(start, stop)] == results[start:stop]
+
+
+def test_pop_restores_every_length():
+    results = hands(HOT_HANDS + 40, seed=1)
+    log = ResultLog(results)
+    while results:
+        assert log.pop() == results.pop()
+        assert list(log) == results
+        assert log.nbytes == -(-len(results) // 4)
+        assert log.recent(HOT_HANDS) == results[-HOT_HANDS:]
+    with pytest.raises(IndexError):
+        log.pop()
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pairs_match_naive_count(seed):
+    results = hands(500, seed=seed)
+    log = ResultLog(results)
+    for count in (0, 1, 5, 100, 1000):
+        assert log.pairs(count) == naive_pairs(results, count)
+    assert ResultLog("PTBTP").pairs(3) == []  # Every pair is broken by a tie
+
+
+def test_journal_compact_trim_round_trip():
+    journal = Journal()
+    entries = [(i % 3, i, (float(i),)) for i in range(3 * JOURNAL_BLOCK + 10)]
+    for entry in entries:
+        journal.append(entry)
+    assert journal.compact(keep=5) == 3 * JOURNAL_BLOCK
+    assert len(journal) == len(entries)
+    assert list(reversed(journal)) == entries[::-1]
+    assert journal.nbytes < len(entries) * 8  # The compressed blocks are far smaller than the tuples
+
+    assert journal.trim() == JOURNAL_BLOCK
+    assert journal.dropped == JOURNAL_BLOCK and len(journal) == len(entries) - JOURNAL_BLOCK
+    popped = [journal.pop() for _ in range(len(journal))]
+    assert popped == entries[:JOURNAL_BLOCK - 1:-1]
+    assert journal.trim() == 0
@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from dominance import SESSION
+from engine import OUTCOMES, WEIGHTS, Session
+from history import JOURNAL_BLOCK
+
+
+def state(session):
+    s = session.state
+    return (s.result_tracker, s.peak_bankroll, s.session_profit, s.betting_strategy, s.t3_level, list(s.t3_results),
+            s.flatbet_level, s.predictor, s.dominance_window, dict(s.windows.rules), s.base_amount,
+            s.profit_lock_threshold, s.next_prediction, s.game_count, list(s.bet_history), list(s.results))
+
+
+def played(seed):
+    """A session whose hands were recorded under several settings, and the state after each journal entry."""
+    hands = random.Random(seed).choices(OUTCOMES, WEIGHTS, k=60)
+    session = Session(quiet=True)
+    states = [state(session)]
+
+    def step(action, *args):
+        before = len(session.journal)
+        action(*args)
+        states.extend([state(session)] * (len(session.journal) - before))
+
+    step(session.configure, 10, 1000)
+    for hand in hands[:20]:
+        step(session.record, hand)
+    step(session.set_strategy, "T3")
+    step(session.set_prediction, SESSION, {SESSION: "Fade"})
+    for hand in hands[20:34]:
+        step(session.record, hand)
+    step(session.configure, 5, 1000)
+    step(session.set_prediction, 10, {10: "Fade"}, "Pattern")
+    for hand in hands[34:]:
+        step(session.record, hand)
+    return session, states
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_undo_restores_settings(seed):
+    session, states = played(seed)
+    while session.journal:
+        session.undo()
+        states.pop()
+        assert state(session) == states[-1]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_redo_inverts_undo_across_settings(seed):
+    session, states = played(seed)
+    session.undo_to(10)
+    assert state(session) == states[10]
+    while session.redo_stack:
+        session.redo()
+    assert state(session) == states[-1]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_undo_to_hand_skips_settings_entries(seed):
+    session, states = played(seed)
+    hand = random.Random(seed).randrange(session.state.game_count)
+    assert session.undo_to_hand(hand)
+    # The newest point at which game_count read `hand`, with any settings changed right after it.
+    position = max(p for p, s in enumerate(states) if s[13] == hand)
+    assert len(session.journal) == position
+    assert state(session) == states[position]
+    assert not session.undo_to_hand(hand)
+
+
+def long_session(count):
+    session = Session(quiet=True)
+    session.configure(1, 1e9)  # Never reaches the stop-loss or win limit
+    states = []
+    for i, hand in enumerate(random.Random(count).choices(OUTCOMES, WEIGHTS, k=count)):
+        session.record(hand)
+        # Only the newest states are ever compared, and each copies the whole bet history.
+        states.append(state(session) if count - i <= JOURNAL_BLOCK // 2 + 2 else None)
+    return session, states
+
+
+def test_undo_redo_across_compaction_boundary():
+    session, states = long_session(JOURNAL_BLOCK + 2)  # With the settings entry, three entries stay hot
+    assert session.journal.compact() == JOURNAL_BLOCK
+    for back in range(1, 6):  # The fourth undo unpacks the compressed block
+        assert session.undo()
+        assert state(session) == states[-1 - back]
+    while session.redo_stack:
+        session.redo()
+    assert state(session) == states[-1]
+    session.journal.compact()
+    session.undo_to(len(session.journal) - JOURNAL_BLOCK // 2)
+    assert state(session) == states[-1 - JOURNAL_BLOCK // 2]
+
+
+def test_fit_compacts_before_trimming():
+    session, states = long_session(3 * JOURNAL_BLOCK)
+    journal = session.journal
+    size = session.nbytes
+    assert not session.fit(size)
+    assert session.fit(size - 1)
+    assert journal.dropped == 0 and len(journal) == 3 * JOURNAL_BLOCK + 1
+    assert session.nbytes <= (size - 1) * 0.75
+    assert state(session) == states[-1]
+
+    assert session.fit(1)  # Nothing fits: every compressed block goes
+    assert journal.dropped == 3 * JOURNAL_BLOCK and len(journal) == 1
+    assert state(session) == states[-1]
+    assert session.undo() and not session.undo()  # Only the hot entry is left to undo
+    assert state(session) == states[-2]
@@ -0,0 +1,46 @@
+"""Pattern predictor kernel of BatchSession against engine.Session on the same hands."""
+import random
+
+import numpy as np
+import pytest
+
+import patterns
+from dominance import SESSION
+from engine import OUTCOMES, WEIGHTS, Session
+from montecarlo import BatchSession, encode
+
+
+class Script:
+    """Stands in for the random module in Session.simulate, dealing a fixed list of hands."""
+
+    def __init__(self, hands):
+        self.hands = iter(hands)
+
+    def choices(self, population, weights):
+        return [next(self.hands)]
+
+
+def session_outcome(hands, strategy):
+    session = Session(quiet=True, keep_history=False)
+    session.set_strategy(strategy)
+    session.set_prediction(SESSION, None, "Pattern")
+    session.simulate(len(hands), Script(hands))
+    s = session.state
+    return s.result_tracker, s.profit_lock
+
+
+@pytest.mark.parametrize('corpus', [False, True])
+@pytest.mark.parametrize('strategy', ["Flatbet", "Flatbet Level Up", "T3"])
+def test_pattern_predictor_matches_session(monkeypatch, strategy, corpus):
+    rng = random.Random(len(strategy) + corpus)
+    if corpus:
+        shoes = (''.join(rng.choices(OUTCOMES, WEIGHTS, k=80)) for _ in range(200))
+        monkeypatch.setattr(patterns, 'CORPUS', patterns.PatternIndex.from_shoes(shoes, order=10))
+    deals = [rng.choices(OUTCOMES, WEIGHTS, k=300) for _ in range(40)]
+
+    batch = BatchSession(len(deals), strategy, predictor="Pattern")
+    # One hand longer: BatchSession notices an exit at the start of the next hand.
+    batch.run(np.array([encode(hands + ['T']) for hands in deals]))
+    expected = np.array([session_outcome(hands, strategy) for hands in deals])
+    np.testing.assert_allclose(batch.bankroll, expected[:, 0])
+    np.testing.assert_allclose(batch.locked, expected[:, 1])
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from engine import OUTCOMES, WEIGHTS
+from persistence import BATCH_SIZE, SessionBusy, SessionStore
+
+
+def hands(count, seed=0):
+    return random.Random(seed).choices(OUTCOMES, WEIGHTS, k=count)
+
+
+def crashed_store(path, **kwargs):
+    """A store whose leases lapse at once, as if its process had died after each commit."""
+    return SessionStore(path, lease_seconds=0, **kwargs)
+
+
+def test_reopen_after_batch_flush(tmp_path):
+    path = str(tmp_path / "tracker.db")
+    store = crashed_store(path)
+    session = store.open("table")
+    session.configure(1, 1e9)  # Never reaches the stop-loss or win limit
+    session.replay(hands(BATCH_SIZE + 200))
+    store._commit()
+
+    reopened = SessionStore(path).open("table")
+    assert reopened.state.game_count == session.state.game_count == BATCH_SIZE + 200
+    assert list(reopened.state.results) == list(session.state.results)
+    assert reopened.state.result_tracker == session.state.result_tracker
+
+
+def test_reopen_after_flush_snapshot(tmp_path):
+    path = str(tmp_path / "tracker.db")
+    store = crashed_store(path, snapshot_every=50)
+    session = store.open("table")
+    session.configure(1, 1e9)
+    for result in hands(120, seed=1):
+        session.record(result)
+        store.flush()
+    session.undo()
+    store.flush()
+
+    reopened = SessionStore(path).open("table")
+    assert reopened.state.game_count == 119
+    assert list(reopened.state.results) == list(session.state.results)
+    assert reopened.redo_stack == session.redo_stack
+
+
+def test_one_writer_per_session(tmp_path):
+    path = str(tmp_path / "tracker.db")
+    first = SessionStore(path)
+    second = SessionStore(path)
+    session = first.open("table")
+    session.replay(hands(30))
+    first.flush()
+    with pytest.raises(SessionBusy):
+        second.open("table")
+    with pytest.raises(SessionBusy):
+        second.delete("table")
+    assert second.open("other") is not None  # Other sessions are free
+
+    assert first.offload("table")
+    assert second.open("table").state.game_count == session.state.game_count
+
+
+def test_lapsed_lease_detaches_old_writer(tmp_path):
+    path = str(tmp_path / "tracker.db")
+    first = crashed_store(path)
+    stale = first.open("table")
+    stale.replay(hands(30))
+    first.flush()
+
+    second = SessionStore(path)
+    session = second.open("table")
+    session.replay(hands(20, seed=1))
+    second.flush()
+    stale.replay(hands(40, seed=2))  # Logged with sequence numbers the second store has used
+    first.flush()
+
+    assert stale.on_event is None
+    assert stale.alerts.latest(1)[0].type == "error"
+    second.close()
+    reopened = SessionStore(path).open("table")
+    assert reopened.state.game_count == session.state.game_count
+    assert list(reopened.state.results) == list(session.state.results)
@@ -0,0 +1,67 @@
+"""Block bootstrap against a path-by-path replay of the same draws."""
+import numpy as np
+import pytest
+
+import risk
+from risk import NEVER, bootstrap, summarize
+
+
+def replay(outcomes, initial_bankroll, stop_loss, win_limit, resamples, bets, block, seed):
+    """Each path played one bet at a time from the block starts bootstrap draws with `seed`."""
+    rng = np.random.default_rng(seed)
+    blocks = -(-bets // block)
+    starts = rng.integers(0, len(outcomes) - block + 1, size=(resamples, blocks))
+    rows = []
+    for row in starts:
+        steps = [outcomes[start + i] for start in row for i in range(block)][:bets]
+        bankroll = peak = initial_bankroll
+        drawdown, stopped, to_win = 0.0, False, NEVER
+        for i, step in enumerate(steps):
+            bankroll += step
+            peak = max(peak, bankroll)
+            drawdown = max(drawdown, peak - bankroll)
+            if bankroll <= initial_bankroll * stop_loss:
+                stopped = True
+                break
+            if bankroll >= initial_bankroll * win_limit:
+                to_win = i + 1
+                break
+        rows.append((bankroll, drawdown, stopped, to_win))
+    return [np.array(column) for column in zip(*rows)]
+
+
+@pytest.mark.parametrize('block, bets', [(1, 40), (3, 40), (4, 30), (10, 10)])
+def test_bootstrap_matches_replay(monkeypatch, block, bets):
+    outcomes = [10.0, -10.0, 9.5, -20.0, 19.0, -40.0, 38.0, -10.0, 9.5, 9.5]
+    monkeypatch.setattr(risk, 'CHUNK_CELLS', 7 * bets)  # Several chunks, the last one short
+    result = bootstrap(outcomes, 100.0, stop_loss=0.5, win_limit=1.6, resamples=50, bets=bets,
+                       block=block, seed=7)
+    final, drawdown, stopped, to_win = replay(outcomes, 100.0, 0.5, 1.6, 50, bets, block, 7)
+    np.testing.assert_allclose(result['final_bankroll'], final)
+    np.testing.assert_allclose(result['max_drawdown'], drawdown)
+    np.testing.assert_array_equal(result['stop_loss'], stopped)
+    np.testing.assert_array_equal(result['bets_to_win_limit'], to_win)
+
+
+def test_whole_sequence_block_replays_the_session():
+    # One block as long as the history: every path is the session itself.
+    outcomes = [10.0, -30.0, 20.0, 15.0, -5.0]
+    result = bootstrap(outcomes, 100.0, stop_loss=0.5, win_limit=2.0, resamples=3, block=5, seed=0)
+    assert result['final_bankroll'].tolist() == [110.0] * 3
+    assert result['max_drawdown'].tolist() == [30.0] * 3
+    assert result['bets_to_win_limit'].tolist() == [NEVER] * 3
+    # The win limit ends a path at its fourth bet, before the loss after it.
+    result = bootstrap(outcomes, 100.0, stop_loss=0.5, win_limit=1.15, resamples=2, block=5, seed=0)
+    assert result['final_bankroll'].tolist() == [115.0] * 2
+    assert result['bets_to_win_limit'].tolist() == [4] * 2
+
+
+def test_summarize_rates():
+    result = bootstrap([-30.0, 60.0], 100.0, stop_loss=0.7, win_limit=1.6, resamples=1000, bets=1,
+                       block=1, seed=1)
+    rows = {name: row for name, *row in summarize(result)}
+    lost = result['stop_loss'].mean()
+    assert rows["P(Stop-Loss)"][0] == lost and rows["P(Win Limit)"][0] == 1 - lost
+    assert rows["Bets to Win Limit"] == [1.0, 1.0, 1.0]
+    with pytest.raises(ValueError):
+        bootstrap([], 100.0)
@@ -0,0 +1,91 @@
+"""Big Road and derived roads, drawn incrementally and rolled back on undo."""
+import random
+
+import numpy as np
+import pytest
+
+from engine import OUTCOMES, WEIGHTS
+from roads import BANKER, BLUE, DERIVED, PLAYER, RED, ROWS, Roads
+
+NAMES = ["Big Road"] + [name for name, _ in DERIVED]
+
+
+def build(hands):
+    roads = Roads()
+    for hand in hands:
+        roads.push(hand)
+    return roads.sync()
+
+
+def textbook(hands, k):
+    """A derived road by the usual cell-to-the-left rules, from the Big Road's streak lengths."""
+    streaks = []
+    for hand in hands:
+        if hand == 'T':
+            continue
+        if streaks and streaks[-1][0] == hand:
+            streaks[-1][1] += 1
+        else:
+            streaks.append([hand, 1])
+        c, r = len(streaks) - 1, streaks[-1][1] - 1
+        lengths = [length for _, length in streaks]
+        if r == 0:
+            if c >= k + 1:
+                yield RED if lengths[c - 1] == lengths[c - 1 - k] else BLUE
+        elif c >= k:
+            left = lengths[c - k]
+            if left > r:
+                yield RED  # A cell beside it
+            elif left == r:
+                yield BLUE  # The column k back has just ended
+            else:
+                yield RED  # Empty beside it and above it
+
+
+def test_known_shoe():
+    # Big Road streaks: B x2 (with a tie), P, B x3, P x2, B.
+    roads = build("BTBPBBBPPB")
+    big = roads.view("Big Road")
+    assert big[:, 0].tolist() == [BANKER, BANKER, 0, 0, 0, 0]
+    assert big[:3, 2].tolist() == [BANKER] * 3
+    assert big[0].tolist() == [BANKER, PLAYER, BANKER, PLAYER, BANKER]
+    assert roads.tie_view()[0, 0] == 1
+    marks = [list(road.symbols) for road in roads.derived]
+    assert marks == [[BLUE, BLUE, RED, BLUE, RED, BLUE], [RED, BLUE, BLUE, BLUE, BLUE], [RED, RED]]
+    assert roads.features() == (1, BLUE, BLUE, RED)
+
+
+def test_dragon_tail_turns_right():
+    big = build("B" * 8 + "P").view("Big Road")
+    assert big[:, 0].tolist() == [BANKER] * ROWS
+    assert big[ROWS - 1, 1:3].tolist() == [BANKER, BANKER]
+    assert big[0, 1] == PLAYER  # The next streak still starts in the column after the last one
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_derived_roads_match_textbook_rules(seed):
+    hands = random.Random(seed).choices(OUTCOMES, WEIGHTS, k=300)
+    roads = build(hands)
+    for road, (_, k) in zip(roads.derived, DERIVED):
+        assert list(road.symbols) == list(textbook(hands, k))
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_undo_then_readd_matches_fresh_build(seed):
+    rng = random.Random(seed)
+    hands = rng.choices(OUTCOMES, WEIGHTS, k=200)
+    roads = Roads()
+    for i, hand in enumerate(hands):
+        roads.push(hand)
+        if i % 7 == 0:
+            roads.sync()  # Mix drawn and queued hands, so pop() meets both
+    replaced = rng.choices(OUTCOMES, WEIGHTS, k=40)
+    for _ in range(60):
+        roads.pop()
+    for hand in replaced:
+        roads.push(hand)
+    fresh = build(hands[:-60] + replaced)
+    for name in NAMES:
+        np.testing.assert_array_equal(roads.view(name), fresh.view(name))
+    np.testing.assert_array_equal(roads.tie_view(), fresh.tie_view())
+    np.testing.assert_array_equal(roads.bead_view(), fresh.bead_view())
@@ -0,0 +1,25 @@
+"""Backtest rows and argument checks for shoes.py."""
+import pytest
+
+from shoes import main, replay_shoe
+
+
+def test_profit_lock_is_not_drawdown():
+    # Three winning bets, the last of which locks the profit and returns the bankroll to 1000.
+    row = replay_shoe("BBPPBPBPB")
+    assert (row['losses'], row['final_bankroll'], row['profit_lock']) == (0, 1000.0, 29.0)
+    assert row['max_drawdown'] == 0.0
+
+
+def test_invalid_settings_raise():
+    with pytest.raises(ValueError):
+        replay_shoe("PBPB", base_amount=150)
+
+
+@pytest.mark.parametrize('argv', [['--base-amount', '150'], ['--initial-bankroll', '5'], ['--window', '-3']])
+def test_main_reports_bad_arguments(tmp_path, capsys, argv):
+    path = tmp_path / "shoes.txt"
+    path.write_text("PBPBBPPB\n")
+    with pytest.raises(SystemExit):
+        main([str(path), *argv])
+    assert "error:" in capsys.readouterr().err
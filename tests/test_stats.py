@@ -0,0 +1,78 @@
+"""Streak and bet statistics against a recomputation from the full record."""
+import random
+from itertools import groupby
+
+import numpy as np
+import pytest
+
+from engine import STRATEGIES
+from stats import SessionStats
+
+
+def streaks(results):
+    return [len(list(group)) for _, group in groupby(results)]
+
+
+def check_streaks(stats, results):
+    lengths = streaks(results)
+    assert stats.side == (results[-1] if results else None)
+    assert stats.streak == (lengths[-1] if lengths else 0)
+    assert list(stats.runs) == lengths[:-1]
+    assert stats.max_streak == max(lengths, default=0)
+    assert stats.average_streak == pytest.approx(np.mean(lengths) if lengths else 0.0)
+    finished = np.bincount(lengths[:-1], minlength=1) if len(lengths) > 1 else [0]
+    assert stats.histogram == list(finished)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_streaks_push_and_pop(seed):
+    rng = random.Random(seed)
+    results = rng.choices("PB", k=300)
+    stats = SessionStats(STRATEGIES)
+    for i, result in enumerate(results):
+        stats.push(result)
+        check_streaks(stats, results[:i + 1])
+    while results:
+        results.pop()
+        stats.pop()
+        check_streaks(stats, results)
+
+
+def bets(count, seed):
+    rng = random.Random(seed)
+    bankroll = peak = 1000.0
+    rows = []
+    for _ in range(count):
+        strategy = rng.choice(STRATEGIES)
+        won = rng.random() < 0.5
+        net = rng.choice([10.0, 20.0, 40.0]) * (0.95 if won else -1)
+        bankroll += net
+        peak = max(peak, bankroll)
+        rows.append((strategy, won, net, bankroll, peak))
+    return rows
+
+
+def check_bets(stats, rows):
+    net = np.array([row[2] for row in rows])
+    assert stats.bets == len(rows)
+    assert stats.mean == pytest.approx(net.mean() if len(rows) else 0.0, abs=1e-9)
+    assert stats.std == pytest.approx(net.std(ddof=1) if len(rows) > 1 else 0.0, abs=1e-9)
+    falls = [peak - bankroll for _, _, _, bankroll, peak in rows]
+    assert stats.max_drawdown == max(falls, default=0.0)
+    expected = [(strategy, sum(r[0] == strategy and r[1] for r in rows),
+                 sum(r[0] == strategy and not r[1] for r in rows)) for strategy in STRATEGIES]
+    assert stats.records() == [record for record in expected if record[1] or record[2]]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_bets_match_numpy_and_pop_bet_restores(seed):
+    rows = bets(200, seed)
+    stats = SessionStats(STRATEGIES)
+    for i, row in enumerate(rows):
+        stats.bet(*row)
+        check_bets(stats, rows[:i + 1])
+    while rows:
+        rows.pop()
+        stats.pop_bet()
+        check_bets(stats, rows)
+    assert stats.nbytes == 4 * len(stats.runs)
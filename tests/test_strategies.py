@@ -0,0 +1,37 @@
+"""T3 windows judged as the tracker judges them: a tied window keeps the level."""
+import numpy as np
+import pytest
+
+from montecarlo import BANKER, BatchSession
+from strategies import t3
+
+
+def play(progression, outcomes, level=3):
+    state = ''
+    for outcome in outcomes:
+        state, level = progression.move(state, level, outcome)
+    return state, level
+
+
+@pytest.mark.parametrize('window', [2, 4, 6])
+def test_tied_window_keeps_level(window):
+    progression = t3(window)
+    # Losses first, so the first-win rule does not move the level before the window closes.
+    outcomes = ['loss'] * (window // 2) + ['win'] * (window // 2)
+    assert play(progression, outcomes) == ('', 3)
+
+
+def test_two_bet_window():
+    progression = t3(2)
+    assert play(progression, ['win', 'loss']) == ('', 2)  # Down on the first win, then the tie keeps it
+    assert play(progression, ['loss', 'win']) == ('', 3)
+    assert play(progression, ['loss', 'loss']) == ('', 4)
+    assert play(progression, ['loss', 'win', 'win', 'win']) == ('', 1)
+
+
+def test_batch_kernel_keeps_level_on_tie():
+    batch = BatchSession(1, t3(2), profit_lock_threshold=1e9)
+    batch.level[:] = 3
+    for result in (1 - BANKER, BANKER):  # A Banker bet lost, then won
+        batch._settle(np.ones(1, dtype=bool), np.array([result], dtype=np.int8), np.array([BANKER], dtype=np.int8))
+    assert batch.level[0] == 3
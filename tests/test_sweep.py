@@ -0,0 +1,27 @@
+import csv
+
+import pytest
+
+from sweep import grid, sweep
+
+
+def configs():
+    return grid(["Flatbet"], [10.0], [1000.0], [0.8], [1.5, 2.0], [2.0])
+
+
+def test_resume_skips_finished_configs(tmp_path):
+    path = str(tmp_path / "sweep.csv")
+    assert sweep(path, configs(), sessions=20, hands=10, workers=1) == 2
+    assert sweep(path, configs(), sessions=20, hands=10, workers=1) == 0
+    with open(path, newline='') as f:
+        assert f.readline() == "# sessions=20 hands=10 seed=0\n"
+        assert sorted(row['config_id'] for row in csv.DictReader(f)) == ['0', '1']
+
+
+@pytest.mark.parametrize('run', [dict(sessions=30, hands=10, seed=0), dict(sessions=20, hands=15, seed=0),
+                                 dict(sessions=20, hands=10, seed=1)])
+def test_resume_refuses_other_run_settings(tmp_path, run):
+    path = str(tmp_path / "sweep.csv")
+    sweep(path, configs(), sessions=20, hands=10, workers=1)
+    with pytest.raises(ValueError, match="written with"):
+        sweep(path, configs(), workers=1, **run)